@@ -0,0 +1,253 @@
+"""Runs the Sortium benchmark suite and writes machine-readable results.
+
+Usage::
+
+    python benchmarks/run.py --files 20000 --repeat 3 --output results.json
+    python benchmarks/run.py --compare results-main.json --output results.json
+
+Every benchmark runs against a freshly generated tree (see ``treegen.py``),
+so runs do not influence each other. Results are written as JSON containing
+the environment, the tree specification and, per benchmark, every timing
+plus the minimum and median. ``--compare`` prints the median ratio against
+an earlier result file so regressions stand out. ``--instrument`` attaches a
+``PhaseRecorder`` and adds its phase timings and counters (from the last
+repetition) to each result; timings then include the instrumentation
+overhead.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import sortium  # noqa: E402
+from sortium import FileUtils, Sorter  # noqa: E402
+from sortium.instrumentation import PhaseRecorder  # noqa: E402
+from treegen import TreeSpec, generate_tree, top_level_dirs  # noqa: E402
+
+REGEX_RULES = {
+    "Collided": r"file_\d{7}\.(jpg|png)$",
+    "Data": r".*\.(csv|json)$",
+    "Early": r"file_00",
+}
+
+
+def _setup_plan(workdir: Path, source: Path) -> Path:
+    return Sorter().sort_by_type(
+        str(source),
+        str(workdir / "sorted"),
+        plan_output=str(workdir / "plan.json"),
+        recursive=True,
+    )
+
+
+def _benchmarks(
+    observer: PhaseRecorder | None = None,
+) -> Dict[str, Callable[[Path, Path], Callable[[], object]]]:
+    """Maps benchmark names to factories returning the timed callable.
+
+    Each factory receives a scratch directory and the generated source tree;
+    work done in the factory (e.g. producing a plan to apply) is not timed.
+    """
+    file_utils = FileUtils(observer=observer)
+    sorter = Sorter(file_utils=file_utils, observer=observer)
+
+    def scan(workdir, source):
+        return lambda: sum(1 for _ in file_utils.iter_all_files_recursive(str(source)))
+
+    def sort_type(workdir, source):
+        return lambda: sorter.sort_by_type(
+            str(source), str(workdir / "out"), plan_output=str(workdir / "p.json"),
+            recursive=True,
+        )
+
+    def sort_extension(workdir, source):
+        return lambda: sorter.sort_by_extension(
+            str(source), str(workdir / "out"), plan_output=str(workdir / "p.json")
+        )
+
+    def sort_regex(workdir, source):
+        return lambda: sorter.sort_by_regex(
+            str(source), REGEX_RULES, str(workdir / "out"),
+            plan_output=str(workdir / "p.json"),
+        )
+
+    def sort_date(workdir, source):
+        folders = top_level_dirs(source)
+        return lambda: sorter.sort_by_date(
+            str(source), folders, str(workdir / "out"),
+            plan_output=str(workdir / "p.json"), recursive=True,
+        )
+
+    def sort_composite(workdir, source):
+        return lambda: sorter.sort_by_composite(
+            str(source), ["type", "date"], str(workdir / "out"),
+            plan_output=str(workdir / "p.json"),
+        )
+
+    def apply_forward(workdir, source):
+        plan = _setup_plan(workdir, source)
+        return lambda: file_utils.apply_move_plan(str(plan))
+
+    def apply_reverse(workdir, source):
+        plan = _setup_plan(workdir, source)
+        file_utils.apply_move_plan(str(plan))
+        return lambda: file_utils.apply_move_plan(str(plan), reverse=True)
+
+    def flatten(workdir, source):
+        return lambda: file_utils.flatten_dir(str(source), str(workdir / "flat"))
+
+    def export(workdir, source):
+        return lambda: file_utils.export_directory_structure(
+            str(source), str(workdir / "tree.json")
+        )
+
+    return {
+        "scan.iter_all_files_recursive": scan,
+        "sort.type": sort_type,
+        "sort.extension": sort_extension,
+        "sort.regex": sort_regex,
+        "sort.date": sort_date,
+        "sort.composite": sort_composite,
+        "apply.forward": apply_forward,
+        "apply.reverse": apply_reverse,
+        "flatten_dir": flatten,
+        "export_directory_structure": export,
+    }
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(
+    spec: TreeSpec, repeat: int, selected: List[str] | None, instrument: bool = False
+) -> dict:
+    """Runs the selected benchmarks ``repeat`` times each."""
+    benchmarks = _benchmarks()
+    names = selected or list(benchmarks)
+    unknown = sorted(set(names) - set(benchmarks))
+    if unknown:
+        raise SystemExit(f"Unknown benchmark(s): {', '.join(unknown)}")
+
+    results = []
+    for name in names:
+        timings: List[float] = []
+        recorder = None
+        for _ in range(repeat):
+            if instrument:
+                recorder = PhaseRecorder()
+                benchmarks = _benchmarks(recorder)
+            workdir = Path(tempfile.mkdtemp(prefix="sortium-bench-"))
+            try:
+                source = workdir / "source"
+                tree = generate_tree(source, spec)
+                with contextlib.redirect_stdout(io.StringIO()):
+                    timed = benchmarks[name](workdir, source)
+                    start = time.perf_counter()
+                    timed()
+                    timings.append(time.perf_counter() - start)
+            finally:
+                shutil.rmtree(workdir, ignore_errors=True)
+        result = {
+            "name": name,
+            "timings": timings,
+            "min": min(timings),
+            "median": statistics.median(timings),
+            "files_per_second": tree["files"] / min(timings) if min(timings) else None,
+        }
+        if recorder is not None:
+            result["instrumentation"] = recorder.report()
+        results.append(result)
+        print(f"{name:32s} median {statistics.median(timings):8.4f}s")
+
+    return {
+        "environment": {
+            "sortium_version": sortium.__version__,
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+        },
+        "tree": {**spec.to_dict(), **tree},
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline_file: str) -> None:
+    """Prints median ratios (current / baseline) per benchmark."""
+    baseline = json.loads(Path(baseline_file).read_text(encoding="utf-8"))
+    previous = {item["name"]: item["median"] for item in baseline["results"]}
+    print(f"\nCompared with {baseline.get('environment', {}).get('git_commit')}:")
+    for item in current["results"]:
+        old = previous.get(item["name"])
+        if old:
+            print(f"{item['name']:32s} x{item['median'] / old:6.2f}")
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=10_000)
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--fanout", type=int, default=4)
+    parser.add_argument("--collision-rate", type=float, default=0.1)
+    parser.add_argument("--file-size", type=int, default=0,
+                        help="apparent (sparse) size of each file in bytes")
+    parser.add_argument("--extensions", type=str, default=None,
+                        help='JSON extension weights, e.g. \'{".jpg": 3, ".txt": 1}\'')
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--only", action="append", default=None,
+                        help="benchmark name to run (repeatable)")
+    parser.add_argument("--output", type=str, default=None,
+                        help="write JSON results to this file")
+    parser.add_argument("--instrument", action="store_true",
+                        help="record per-phase timings and counters")
+    parser.add_argument("--compare", type=str, default=None,
+                        help="earlier JSON results to compare against")
+    args = parser.parse_args(argv)
+
+    spec = TreeSpec(
+        files=args.files,
+        depth=args.depth,
+        fanout=args.fanout,
+        collision_rate=args.collision_rate,
+        file_size=args.file_size,
+        seed=args.seed,
+    )
+    if args.extensions:
+        spec.extension_mix = json.loads(args.extensions)
+
+    report = run_suite(spec, args.repeat, args.only, args.instrument)
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2), encoding="utf-8")
+    if args.compare:
+        compare(report, args.compare)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
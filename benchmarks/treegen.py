@@ -0,0 +1,128 @@
+"""Synthetic directory tree generator for the Sortium benchmarks.
+
+Trees are fully determined by their parameters and ``seed``, so the same
+command produces the same tree on every machine and every commit.
+"""
+
+import os
+import random
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List
+
+DEFAULT_EXTENSION_MIX: Dict[str, float] = {
+    ".jpg": 0.20,
+    ".png": 0.08,
+    ".pdf": 0.12,
+    ".docx": 0.06,
+    ".txt": 0.10,
+    ".csv": 0.05,
+    ".mp4": 0.04,
+    ".mp3": 0.05,
+    ".zip": 0.04,
+    ".py": 0.10,
+    ".json": 0.06,
+    ".bin": 0.02,
+    "": 0.03,
+    ".xyz": 0.05,
+}
+"""Default extension weights; ``""`` produces extensionless files."""
+
+
+@dataclass
+class TreeSpec:
+    """Shape of a synthetic tree.
+
+    Attributes:
+        files: Total number of files.
+        depth: Number of directory levels below the root.
+        fanout: Subdirectories per directory.
+        extension_mix: Extension weights (normalized automatically).
+        collision_rate: Fraction of files reusing a name already used in
+            another directory, so flattening and sorting hit name collisions.
+        file_size: Apparent size of each file in bytes. Files are created
+            sparse (no data blocks are written), so large sizes stay cheap.
+        seed: Random seed.
+    """
+
+    files: int = 10_000
+    depth: int = 3
+    fanout: int = 4
+    extension_mix: Dict[str, float] = field(
+        default_factory=lambda: dict(DEFAULT_EXTENSION_MIX)
+    )
+    collision_rate: float = 0.1
+    file_size: int = 0
+    seed: int = 0
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def _directories(root: Path, depth: int, fanout: int) -> List[Path]:
+    """Lists every directory of a full ``fanout``-ary tree, root included."""
+    levels = [[root]]
+    for level in range(depth):
+        levels.append(
+            [
+                parent / f"d{level}_{idx}"
+                for parent in levels[-1]
+                for idx in range(fanout)
+            ]
+        )
+    return [directory for level in levels for directory in level]
+
+
+def generate_tree(root: str | Path, spec: TreeSpec) -> Dict[str, int]:
+    """Creates a synthetic tree under ``root``.
+
+    Args:
+        root: Directory to populate. Created if missing.
+        spec: Shape of the tree.
+
+    Returns:
+        Counts describing the generated tree: ``files``, ``directories``
+        and ``colliding_names``.
+    """
+    rng = random.Random(spec.seed)
+    root_path = Path(root)
+    directories = _directories(root_path, spec.depth, spec.fanout)
+    for directory in directories:
+        directory.mkdir(parents=True, exist_ok=True)
+
+    extensions = list(spec.extension_mix)
+    weights = [spec.extension_mix[ext] for ext in extensions]
+    used_names: List[str] = []
+    names_per_dir: Dict[Path, set] = {}
+    collisions = 0
+
+    for idx in range(spec.files):
+        directory = rng.choice(directories)
+        taken = names_per_dir.setdefault(directory, set())
+        name = None
+        if used_names and rng.random() < spec.collision_rate:
+            candidate = rng.choice(used_names)
+            if candidate not in taken:
+                name = candidate
+                collisions += 1
+        if name is None:
+            extension = rng.choices(extensions, weights)[0]
+            name = f"file_{idx:07d}{extension}"
+            used_names.append(name)
+        taken.add(name)
+
+        path = directory / name
+        with open(path, "wb") as stream:
+            if spec.file_size:
+                stream.truncate(spec.file_size)
+
+    return {
+        "files": spec.files,
+        "directories": len(directories),
+        "colliding_names": collisions,
+    }
+
+
+def top_level_dirs(root: str | Path) -> List[str]:
+    """Names of the generated first-level directories (for date sorting)."""
+    return sorted(entry.name for entry in os.scandir(root) if entry.is_dir())
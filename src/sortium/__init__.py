@@ -1,10 +1,15 @@
 """Public API for the Sortium package."""
 
+import logging
+
 from .sorter import Sorter
 from .file_utils import FileUtils
 
 __version__ = "2.1.0"
 
+# Diagnostics go through ``logging``; applications decide where they end up.
+logging.getLogger(__name__).addHandler(logging.NullHandler())
+
 __all__ = [
     "Sorter",
     "FileUtils",
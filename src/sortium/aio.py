@@ -0,0 +1,288 @@
+"""asyncio front-end for ``Sorter`` and ``FileUtils``.
+
+:class:`AsyncSorter` and :class:`AsyncFileUtils` mirror the blocking API
+with coroutines. Each call runs the corresponding blocking operation (its
+directory listings, ``stat`` calls and moves) on a thread pool bounded by
+``max_concurrency``, so the event loop is never blocked. Calls beyond that
+limit queue first-come, first-served on the pool: there is no fairness
+between jobs, so while long operations occupy every worker, later calls
+wait for one of them to finish. Give latency-sensitive work its own
+``executor`` if that matters.
+
+Cancelling the awaiting task cancels the operation: a call still waiting
+for a thread never starts, and a running one is stopped through its
+progress callback at the next report (so within ``progress_interval``
+seconds). The task waits for the worker to stop before the cancellation
+propagates, so no thread keeps moving files behind the caller's back. As
+with a cancelled :meth:`FileUtils.apply_move_plan`, the moves done so far
+stay done; they can be resumed or rolled back only when the call was given
+a ``journal_file``.
+
+Progress callbacks are called from worker threads; use
+``loop.call_soon_threadsafe`` to hand reports to the loop.
+"""
+
+import asyncio
+import copy
+import threading
+from concurrent.futures import Executor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Dict, Set
+
+from .file_utils import FileUtils
+from .histogram import ExtensionHistogram
+from .plans import load_plan
+from .progress import Progress
+from .sorter import Sorter
+
+
+def _cancellable(progress: Callable[[Progress], Any] | None, cancelled: threading.Event):
+    """Wraps ``progress`` so it also cancels once ``cancelled`` is set."""
+
+    def report(snapshot: Progress) -> Any:
+        if cancelled.is_set():
+            return False
+        if progress is not None:
+            return progress(snapshot)
+        return None
+
+    return report
+
+
+class _AsyncRunner:
+    """Runs blocking calls on a bounded pool with cooperative cancellation."""
+
+    def __init__(self, max_concurrency: int, executor: Executor | None):
+        if executor is None:
+            executor = ThreadPoolExecutor(
+                max_workers=max_concurrency, thread_name_prefix="sortium-aio"
+            )
+            self._owns_executor = True
+        else:
+            self._owns_executor = False
+        self.executor = executor
+
+    async def run(self, call: Callable[[], Any], cancelled: threading.Event) -> Any:
+        future = self.executor.submit(call)
+        waiter = asyncio.wrap_future(future)
+        try:
+            return await asyncio.shield(waiter)
+        except asyncio.CancelledError:
+            if future.cancel():
+                raise
+            cancelled.set()
+            try:
+                await waiter
+            except Exception:
+                # The operation's own outcome (typically OperationCancelled)
+                # is superseded by the cancellation.
+                pass
+            raise
+
+    def close(self) -> None:
+        if self._owns_executor:
+            self.executor.shutdown(wait=True)
+
+
+class AsyncFileUtils:
+    """Coroutine counterpart of :class:`~sortium.file_utils.FileUtils`.
+
+    Attributes:
+        file_utils (FileUtils): The blocking implementation; its
+            configuration (scan workers, observer, progress) applies.
+        executor (Executor): Pool running the blocking calls.
+    """
+
+    def __init__(
+        self,
+        file_utils: FileUtils | None = None,
+        max_concurrency: int = 4,
+        executor: Executor | None = None,
+    ):
+        """Initializes the instance.
+
+        Args:
+            file_utils: Blocking implementation to delegate to. Defaults to
+                a new ``FileUtils()``.
+            max_concurrency: Number of operations running at once when no
+                ``executor`` is given.
+            executor: Pool to run operations on, e.g. one shared with an
+                :class:`AsyncSorter`. It is not shut down by :meth:`close`.
+        """
+        self.file_utils = file_utils or FileUtils()
+        self._runner = _AsyncRunner(max_concurrency, executor)
+        self.executor = self._runner.executor
+
+    async def _call(self, method: str, *args, **kwargs) -> Any:
+        cancelled = threading.Event()
+        worker = copy.copy(self.file_utils)
+        worker.progress = _cancellable(self.file_utils.progress, cancelled)
+        return await self._runner.run(
+            lambda: getattr(worker, method)(*args, **kwargs), cancelled
+        )
+
+    async def flatten_dir(self, *args, **kwargs) -> None:
+        """Async :meth:`FileUtils.flatten_dir`."""
+        return await self._call("flatten_dir", *args, **kwargs)
+
+    async def find_unique_extensions(self, *args, **kwargs) -> Set[str]:
+        """Async :meth:`FileUtils.find_unique_extensions`."""
+        return await self._call("find_unique_extensions", *args, **kwargs)
+
+    async def profile_extensions(self, *args, **kwargs) -> ExtensionHistogram:
+        """Async :meth:`FileUtils.profile_extensions`."""
+        return await self._call("profile_extensions", *args, **kwargs)
+
+    async def find_duplicates(self, *args, **kwargs) -> Path:
+        """Async :meth:`FileUtils.find_duplicates`."""
+        return await self._call("find_duplicates", *args, **kwargs)
+
+    async def export_directory_structure(self, *args, **kwargs) -> Path:
+        """Async :meth:`FileUtils.export_directory_structure`."""
+        return await self._call("export_directory_structure", *args, **kwargs)
+
+    async def diff_snapshots(self, *args, **kwargs) -> Path:
+        """Async :meth:`FileUtils.diff_snapshots`."""
+        return await self._call("diff_snapshots", *args, **kwargs)
+
+    async def apply_move_plan(self, *args, **kwargs) -> Dict[str, Any]:
+        """Async :meth:`FileUtils.apply_move_plan`."""
+        return await self._call("apply_move_plan", *args, **kwargs)
+
+    async def resume_move_plan(self, *args, **kwargs) -> Dict[str, Any]:
+        """Async :meth:`FileUtils.resume_move_plan`."""
+        return await self._call("resume_move_plan", *args, **kwargs)
+
+    async def rollback_move_plan(self, *args, **kwargs) -> Dict[str, Any]:
+        """Async :meth:`FileUtils.rollback_move_plan`."""
+        return await self._call("rollback_move_plan", *args, **kwargs)
+
+    async def iter_plan(
+        self, plan_file: str | Path, batch_size: int = 512
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Yields the entries of a plan without blocking the loop.
+
+        The plan is read on the executor ``batch_size`` entries at a time;
+        JSON Lines and binary plans are thereby streamed with bounded
+        memory.
+
+        Args:
+            plan_file: Plan to read.
+            batch_size: Entries read per executor call.
+
+        Yields:
+            Plan entries, in order.
+        """
+        loop = asyncio.get_running_loop()
+        _, entries = await loop.run_in_executor(self.executor, load_plan, plan_file)
+        iterator = iter(entries)
+
+        def next_batch():
+            batch = []
+            for entry in iterator:
+                batch.append(entry)
+                if len(batch) == batch_size:
+                    break
+            return batch
+
+        future = None
+        try:
+            while True:
+                future = self.executor.submit(next_batch)
+                batch = await asyncio.shield(asyncio.wrap_future(future))
+                if not batch:
+                    return
+                for entry in batch:
+                    yield entry
+        finally:
+            # A cancelled consumer may leave a batch being read; the reader
+            # must finish before its plan is closed under it.
+            if future is not None and not future.cancel() and not future.done():
+                await asyncio.wait([asyncio.wrap_future(future)])
+            close = getattr(entries, "close", None)
+            if close is not None:
+                close()
+
+    def close(self) -> None:
+        """Shuts the executor down if this instance created it."""
+        self._runner.close()
+
+    async def __aenter__(self) -> "AsyncFileUtils":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await asyncio.get_running_loop().run_in_executor(None, self.close)
+
+
+class AsyncSorter:
+    """Coroutine counterpart of :class:`~sortium.sorter.Sorter`.
+
+    Attributes:
+        sorter (Sorter): The blocking implementation; its configuration
+            (file types, plan format, sniffer, observer, progress) applies.
+        file_utils (AsyncFileUtils): Async file utilities sharing this
+            sorter's executor, e.g. to apply the plans it writes.
+        executor (Executor): Pool running the blocking calls.
+    """
+
+    def __init__(
+        self,
+        sorter: Sorter | None = None,
+        max_concurrency: int = 4,
+        executor: Executor | None = None,
+    ):
+        """Initializes the instance.
+
+        Args:
+            sorter: Blocking implementation to delegate to. Defaults to a
+                new ``Sorter()``.
+            max_concurrency: Number of operations running at once when no
+                ``executor`` is given.
+            executor: Pool to run operations on. It is not shut down by
+                :meth:`close`.
+        """
+        self.sorter = sorter or Sorter()
+        self._runner = _AsyncRunner(max_concurrency, executor)
+        self.executor = self._runner.executor
+        self.file_utils = AsyncFileUtils(self.sorter.file_utils, executor=self.executor)
+
+    async def _call(self, method: str, *args, **kwargs) -> Any:
+        cancelled = threading.Event()
+        worker = copy.copy(self.sorter)
+        worker.progress = _cancellable(self.sorter.progress, cancelled)
+        # auto_apply moves through the sorter's FileUtils.
+        worker.file_utils = copy.copy(self.sorter.file_utils)
+        worker.file_utils.progress = _cancellable(self.sorter.file_utils.progress, cancelled)
+        return await self._runner.run(
+            lambda: getattr(worker, method)(*args, **kwargs), cancelled
+        )
+
+    async def sort_by_type(self, *args, **kwargs) -> Path:
+        """Async :meth:`Sorter.sort_by_type`."""
+        return await self._call("sort_by_type", *args, **kwargs)
+
+    async def sort_by_date(self, *args, **kwargs) -> Path:
+        """Async :meth:`Sorter.sort_by_date`."""
+        return await self._call("sort_by_date", *args, **kwargs)
+
+    async def sort_by_regex(self, *args, **kwargs) -> Path:
+        """Async :meth:`Sorter.sort_by_regex`."""
+        return await self._call("sort_by_regex", *args, **kwargs)
+
+    async def sort_by_extension(self, *args, **kwargs) -> Path:
+        """Async :meth:`Sorter.sort_by_extension`."""
+        return await self._call("sort_by_extension", *args, **kwargs)
+
+    async def sort_by_composite(self, *args, **kwargs) -> Path:
+        """Async :meth:`Sorter.sort_by_composite`."""
+        return await self._call("sort_by_composite", *args, **kwargs)
+
+    def close(self) -> None:
+        """Shuts the executor down if this instance created it."""
+        self._runner.close()
+
+    async def __aenter__(self) -> "AsyncSorter":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await asyncio.get_running_loop().run_in_executor(None, self.close)
@@ -7,7 +7,17 @@ DEFAULT_FILE_TYPES: Dict[str, List[str]] = {
     "Presentations": [".ppt", ".pptx", ".odp", ".key"],
     "Videos": [".mp4", ".avi", ".mov", ".wmv", ".mkv", ".flv", ".webm"],
     "Music": [".mp3", ".wav", ".aac", ".flac", ".ogg", ".wma"],
-    "Archives": [".zip", ".rar", ".7z", ".tar", ".gz", ".bz2"],
+    "Archives": [
+        ".zip",
+        ".rar",
+        ".7z",
+        ".tar",
+        ".gz",
+        ".bz2",
+        ".tar.gz",
+        ".tar.bz2",
+        ".tar.xz",
+    ],
     "Code": [
         ".py",
         ".js",
@@ -30,6 +40,8 @@ DEFAULT_FILE_TYPES: Dict[str, List[str]] = {
 """Default file type categories and their associated file extensions.
 
 Used to map file extensions to logical categories during file sorting.
+Extensions may be compound (``.tar.gz``); a file name is matched against
+the longest registered extension it ends with.
 
 Examples:
     >>> DEFAULT_FILE_TYPES["Images"]
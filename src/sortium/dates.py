@@ -0,0 +1,133 @@
+"""Date buckets for ``sort_by_date``.
+
+A :class:`DateBucketer` turns a file's ``stat`` result into the name of its
+date folder. The timestamp comes from the ``stat`` the walker already made,
+so bucketing a file costs no further system call, and labels are cached
+per calendar day: ``strftime`` runs once per distinct day rather than once
+per file.
+
+Buckets are a ``"year"``, ``"month"``, ISO ``"week"`` (starting on Monday)
+or ``"day"``. The label is the first day of the bucket formatted with
+``date_format``, which defaults to :data:`DATE_FORMATS` for the
+granularity; ``"day"`` keeps the historic ``01-Jan-2023`` folder names.
+"""
+
+import os
+from datetime import date, datetime, timedelta
+from typing import Dict, Tuple
+
+DATE_GRANULARITIES = ("year", "month", "week", "day")
+"""Supported bucket sizes."""
+
+DATE_SOURCES = ("mtime", "ctime", "birthtime")
+"""Supported timestamps: modification, status change and creation time."""
+
+DATE_FORMATS: Dict[str, str] = {
+    "year": "%Y",
+    "month": "%b-%Y",
+    "week": "%G-W%V",
+    "day": "%d-%b-%Y",
+}
+"""Default ``strftime`` format of the folder names per granularity."""
+
+TIMESTAMP_FIELDS: Dict[str, str] = {
+    "mtime": "modified_at",
+    "ctime": "changed_at",
+    "birthtime": "created_at",
+}
+"""Plan entry field holding the bucketed timestamp, per date source."""
+
+
+def _birthtime(stat_result: os.stat_result) -> float:
+    """Creation time, or the earliest known timestamp where it is not kept."""
+    birth = getattr(stat_result, "st_birthtime", None)
+    if birth is None:
+        return min(stat_result.st_mtime, stat_result.st_ctime)
+    return birth
+
+
+_TIMESTAMPS = {
+    "mtime": lambda stat_result: stat_result.st_mtime,
+    "ctime": lambda stat_result: stat_result.st_ctime,
+    "birthtime": _birthtime,
+}
+
+
+def _bucket_start(day: date, granularity: str) -> date:
+    if granularity == "year":
+        return day.replace(month=1, day=1)
+    if granularity == "month":
+        return day.replace(day=1)
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    return day
+
+
+class DateBucketer:
+    """Maps ``stat`` results to date folder names.
+
+    Labels are cached per day ordinal, so ``date_format`` should only use
+    date fields. Instances may be shared between threads.
+
+    Attributes:
+        granularity (str): One of :data:`DATE_GRANULARITIES`.
+        date_source (str): One of :data:`DATE_SOURCES`. Where the platform
+            does not record creation times (e.g. most Linux builds),
+            ``"birthtime"`` falls back to the earlier of mtime and ctime.
+        date_format (str): ``strftime`` format of the labels.
+        field (str): Plan entry field for the timestamp (see
+            :data:`TIMESTAMP_FIELDS`).
+    """
+
+    def __init__(
+        self,
+        granularity: str = "day",
+        date_source: str = "mtime",
+        date_format: str | None = None,
+    ):
+        """Initializes the bucketer.
+
+        Args:
+            granularity: Bucket size.
+            date_source: Timestamp to bucket on.
+            date_format: Label format. Defaults to the granularity's entry
+                in :data:`DATE_FORMATS`.
+
+        Raises:
+            ValueError: If ``granularity`` or ``date_source`` is unsupported.
+        """
+        if granularity not in DATE_GRANULARITIES:
+            raise ValueError(
+                f"Unsupported granularity '{granularity}'. "
+                f"Expected one of: {', '.join(DATE_GRANULARITIES)}."
+            )
+        if date_source not in DATE_SOURCES:
+            raise ValueError(
+                f"Unsupported date source '{date_source}'. "
+                f"Expected one of: {', '.join(DATE_SOURCES)}."
+            )
+        self.granularity = granularity
+        self.date_source = date_source
+        self.date_format = date_format or DATE_FORMATS[granularity]
+        self.field = TIMESTAMP_FIELDS[date_source]
+        self._timestamp = _TIMESTAMPS[date_source]
+        self._labels: Dict[int, str] = {}
+
+    def label(self, moment: datetime) -> str:
+        """Returns the folder name of the bucket holding ``moment``."""
+        ordinal = moment.toordinal()
+        label = self._labels.get(ordinal)
+        if label is None:
+            start = _bucket_start(moment.date(), self.granularity)
+            label = self._labels[ordinal] = start.strftime(self.date_format)
+        return label
+
+    def bucket(self, stat_result: os.stat_result) -> Tuple[str, datetime]:
+        """Returns the folder name and local timestamp for a ``stat`` result.
+
+        Raises:
+            OverflowError, OSError, ValueError: If the timestamp cannot be
+                represented as a local date.
+        """
+        moment = datetime.fromtimestamp(self._timestamp(stat_result))
+        return self.label(moment), moment
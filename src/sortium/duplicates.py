@@ -0,0 +1,163 @@
+"""Staged content-duplicate detection used by ``FileUtils.find_duplicates``.
+
+Candidates are narrowed in three stages so that most files are never read
+in full:
+
+1. **Size** -- files are grouped by size; a file with a unique size cannot
+   have a duplicate. Hard links to one inode are counted once.
+2. **Edges** -- the first and last ``block_size`` bytes of each remaining
+   file are hashed. Files no larger than two blocks are fully covered by
+   this digest and skip the last stage.
+3. **Full content** -- surviving files are hashed completely through a
+   memory map.
+
+The hashing stages run on a thread pool; ``hashlib`` releases the GIL while
+digesting, so reads and hashing of different files overlap.
+"""
+
+import hashlib
+import logging
+import mmap
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Tuple
+
+from .walker import FileEntry
+
+logger = logging.getLogger(__name__)
+
+_FULL_HASH_CHUNK = 8 * 1024 * 1024
+
+
+def _edge_digest(path: str, size: int, block_size: int) -> str | None:
+    """Hashes the first and last ``block_size`` bytes of a file."""
+    digest = hashlib.blake2b(digest_size=20)
+    try:
+        with open(path, "rb") as stream:
+            digest.update(stream.read(block_size))
+            if size > block_size:
+                stream.seek(max(size - block_size, block_size))
+                digest.update(stream.read(block_size))
+    except OSError as exc:
+        logger.warning("Could not read file '%s': %s", path, exc)
+        return None
+    return digest.hexdigest()
+
+
+def _full_digest(path: str) -> str | None:
+    """Hashes a whole file through a read-only memory map."""
+    digest = hashlib.blake2b(digest_size=32)
+    try:
+        with open(path, "rb") as stream, mmap.mmap(
+            stream.fileno(), 0, access=mmap.ACCESS_READ
+        ) as mapped:
+            view = memoryview(mapped)
+            try:
+                for start in range(0, len(view), _FULL_HASH_CHUNK):
+                    digest.update(view[start : start + _FULL_HASH_CHUNK])
+            finally:
+                view.release()
+    except (OSError, ValueError) as exc:
+        logger.warning("Could not read file '%s': %s", path, exc)
+        return None
+    return digest.hexdigest()
+
+
+def _split_by_digest(
+    groups: Iterable[List[FileEntry]], digests: Iterable[str | None]
+) -> List[Tuple[str, List[FileEntry]]]:
+    """Splits each group by digest, dropping unreadable and unique files.
+
+    ``digests`` holds one digest per file, in group order.
+    """
+    result: List[Tuple[str, List[FileEntry]]] = []
+    digest_iter = iter(digests)
+    for group in groups:
+        by_digest: Dict[str, List[FileEntry]] = {}
+        for item in group:
+            digest = next(digest_iter)
+            if digest is not None:
+                by_digest.setdefault(digest, []).append(item)
+        result.extend(
+            (digest, members) for digest, members in by_digest.items() if len(members) > 1
+        )
+    return result
+
+
+def find_duplicate_groups(
+    entries: Iterable[FileEntry],
+    max_workers: int = 4,
+    block_size: int = 64 * 1024,
+    min_size: int = 1,
+) -> Tuple[List[Tuple[str, List[FileEntry]]], Dict[str, int]]:
+    """Groups files with identical content.
+
+    Args:
+        entries: Files to compare.
+        max_workers: Number of hashing threads.
+        block_size: Bytes hashed at each end of a file in the edge stage.
+        min_size: Files smaller than this are ignored. The default skips
+            empty files, which are all trivially identical.
+
+    Returns:
+        A ``(groups, stats)`` tuple. ``groups`` lists ``(digest, files)``
+        pairs, each with two or more files sorted by path. ``stats`` counts
+        the files ``scanned``, ``edge_hashed`` and ``fully_hashed``.
+    """
+    by_size: Dict[int, List[FileEntry]] = {}
+    seen_inodes = set()
+    scanned = 0
+    for item in entries:
+        try:
+            st = item.stat()
+        except OSError:
+            continue
+        scanned += 1
+        if st.st_size < min_size:
+            continue
+        inode_key = (st.st_dev, st.st_ino)
+        if inode_key in seen_inodes:
+            continue  # another hard link to a file already considered
+        seen_inodes.add(inode_key)
+        by_size.setdefault(st.st_size, []).append(item)
+    seen_inodes.clear()
+
+    size_groups = [group for group in by_size.values() if len(group) > 1]
+    by_size.clear()
+    stats = {"scanned": scanned, "edge_hashed": 0, "fully_hashed": 0}
+
+    with ThreadPoolExecutor(
+        max_workers=max(1, max_workers), thread_name_prefix="sortium-hash"
+    ) as pool:
+        candidates = [item for group in size_groups for item in group]
+        stats["edge_hashed"] = len(candidates)
+        edge_digests = pool.map(
+            lambda item: _edge_digest(item.path, item.stat().st_size, block_size),
+            candidates,
+        )
+        edge_groups = _split_by_digest(size_groups, edge_digests)
+
+        # Files of at most two blocks were hashed in full by the edge stage.
+        complete = [
+            (digest, group)
+            for digest, group in edge_groups
+            if group[0].stat().st_size <= 2 * block_size
+        ]
+        needs_full = [
+            group
+            for _, group in edge_groups
+            if group[0].stat().st_size > 2 * block_size
+        ]
+        candidates = [item for group in needs_full for item in group]
+        stats["fully_hashed"] = len(candidates)
+        complete.extend(
+            _split_by_digest(
+                needs_full, pool.map(lambda item: _full_digest(item.path), candidates)
+            )
+        )
+
+    groups = [
+        (digest, sorted(members, key=lambda item: item.path))
+        for digest, members in complete
+    ]
+    groups.sort(key=lambda pair: pair[1][0].path)
+    return groups, stats
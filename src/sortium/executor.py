@@ -0,0 +1,598 @@
+"""Execution engine for Sortium move plans.
+
+``FileUtils.apply_move_plan`` delegates here. Plans can be executed
+sequentially, streaming one entry at a time, or concurrently on a worker
+pool with entries grouped by destination directory.
+
+Where the platform supports it, moves within one filesystem skip
+``shutil.move`` and full path resolution: source and destination
+directories are opened once and each file is renamed relative to those
+descriptors (``renameat``). Only moves that really cross devices fall back
+to ``shutil.move``'s copy.
+
+Execution can be journaled (see :mod:`sortium.journal`): every completed
+entry index is appended to a write-ahead log so an interrupted run can be
+resumed from the first unfinished entry or rolled back exactly.
+"""
+
+import errno
+import os
+import shutil
+import stat
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Set, Tuple
+
+from .journal import MoveJournal
+from .progress import ProgressReporter
+
+if TYPE_CHECKING:
+    from .instrumentation import Observer
+
+# (entry index, source path, destination path)
+_Move = Tuple[int, str, str]
+
+_DIR_FD_RENAME = (
+    os.rename in os.supports_dir_fd
+    and os.stat in os.supports_dir_fd
+    and hasattr(os, "O_DIRECTORY")
+)
+_DIR_OPEN_FLAGS = os.O_RDONLY | getattr(os, "O_DIRECTORY", 0)
+
+
+class _DirHandles:
+    """Bounded LRU cache of open directory descriptors and their devices.
+
+    Not thread-safe; each worker uses its own instance.
+    """
+
+    def __init__(self, limit: int = 64):
+        self._limit = limit
+        self._handles: "OrderedDict[str, Tuple[int, int]]" = OrderedDict()
+
+    def get(self, dir_path: str, create: bool = False) -> Tuple[int, int]:
+        """Returns ``(fd, st_dev)`` for ``dir_path``, opening it on first use.
+
+        Raises:
+            OSError: If the directory cannot be opened (or created).
+        """
+        key = dir_path or "."
+        handle = self._handles.get(key)
+        if handle is not None:
+            self._handles.move_to_end(key)
+            return handle
+        try:
+            fd = os.open(key, _DIR_OPEN_FLAGS)
+        except FileNotFoundError:
+            if not create:
+                raise
+            os.makedirs(key, exist_ok=True)
+            fd = os.open(key, _DIR_OPEN_FLAGS)
+        handle = (fd, os.fstat(fd).st_dev)
+        self._handles[key] = handle
+        if len(self._handles) > self._limit:
+            _, (old_fd, _) = self._handles.popitem(last=False)
+            os.close(old_fd)
+        return handle
+
+    def close(self) -> None:
+        """Closes every cached descriptor; the cache stays usable."""
+        for fd, _ in self._handles.values():
+            os.close(fd)
+        self._handles.clear()
+
+
+def _new_dir_handles() -> _DirHandles | None:
+    return _DirHandles() if _DIR_FD_RENAME else None
+
+
+def _move_file_to_path(
+    source_path_str: str, dest_path_str: str, create_parent: bool = True
+) -> str:
+    """Moves a file to an explicit destination path without renaming.
+
+    Args:
+        source_path_str: Current location of the file.
+        dest_path_str: Final location of the file.
+        create_parent: Whether to create the destination's parent directory.
+
+    Returns:
+        An empty string on success, otherwise an error description.
+    """
+
+    try:
+        if create_parent:
+            os.makedirs(os.path.dirname(dest_path_str) or ".", exist_ok=True)
+        shutil.move(source_path_str, dest_path_str)
+        return ""
+    except Exception as exc:  # pragma: no cover - error string used for diagnostics
+        return f"Error moving file '{source_path_str}' -> '{dest_path_str}': {exc}"
+
+
+def _entry_paths(
+    idx: int, entry: Dict[str, Any], source_key: str, dest_key: str
+) -> Tuple[str, str] | str:
+    """Extracts the move endpoints of a plan entry.
+
+    Returns:
+        ``(source, destination)`` or an error message if a key is missing.
+    """
+    source_val = entry.get(source_key)
+    dest_val = entry.get(dest_key)
+    if not source_val or not dest_val:
+        return f"Entry #{idx} is missing required keys '{source_key}' or '{dest_key}'."
+    return str(source_val), str(dest_val)
+
+
+def _check_and_move(
+    source: str,
+    dest: str,
+    create_parent: bool,
+    handles: _DirHandles | None = None,
+) -> str:
+    """Validates one move against the filesystem and performs it.
+
+    Args:
+        source: Current location of the file.
+        dest: Final location of the file.
+        create_parent: Whether the destination directory may need creating.
+        handles: Directory descriptor cache enabling the ``renameat`` fast
+            path, or ``None`` to use plain path-based calls.
+
+    Returns:
+        An empty string on success, otherwise an error description.
+    """
+    if handles is not None:
+        return _check_and_move_at(source, dest, create_parent, handles)
+    if not os.path.exists(source):
+        return f"Source path does not exist: {source}"
+    if os.path.exists(dest):
+        return f"Destination already exists (plan stale?): {dest}"
+    return _move_file_to_path(source, dest, create_parent)
+
+
+def _exists_at(name: str, dir_fd: int) -> bool:
+    try:
+        os.stat(name, dir_fd=dir_fd)
+    except (FileNotFoundError, NotADirectoryError):
+        return False
+    return True
+
+
+def _check_and_move_at(
+    source: str, dest: str, create_parent: bool, handles: _DirHandles
+) -> str:
+    """``renameat``-based variant of :func:`_check_and_move`."""
+    src_dir, src_name = os.path.split(source)
+    dst_dir, dst_name = os.path.split(dest)
+    try:
+        src_fd, src_dev = handles.get(src_dir)
+    except (FileNotFoundError, NotADirectoryError):
+        return f"Source path does not exist: {source}"
+    except OSError:
+        # Unopenable (e.g. search-only) directory: use the generic path.
+        return _check_and_move(source, dest, create_parent)
+    try:
+        src_mode = os.stat(src_name, dir_fd=src_fd).st_mode
+    except (FileNotFoundError, NotADirectoryError):
+        return f"Source path does not exist: {source}"
+    if stat.S_ISDIR(src_mode):
+        # Descriptors are cached by path: once a directory moves, handles
+        # opened under its old path (or the path a later move gives it)
+        # point at the wrong directory. Drop them and reopen on demand.
+        handles.close()
+        try:
+            src_fd, src_dev = handles.get(src_dir)
+        except OSError:
+            return _check_and_move(source, dest, create_parent)
+
+    try:
+        dst_fd, dst_dev = handles.get(dst_dir, create=create_parent)
+    except OSError as exc:
+        return f"Error moving file '{source}' -> '{dest}': {exc}"
+    if _exists_at(dst_name, dst_fd):
+        return f"Destination already exists (plan stale?): {dest}"
+
+    if src_dev == dst_dev:
+        try:
+            os.rename(src_name, dst_name, src_dir_fd=src_fd, dst_dir_fd=dst_fd)
+            return ""
+        except OSError as exc:
+            if exc.errno != errno.EXDEV:
+                return f"Error moving file '{source}' -> '{dest}': {exc}"
+    # Different devices (or a bind mount rename refused): copy and delete.
+    return _move_file_to_path(source, dest, create_parent=False)
+
+
+def execute_plan(
+    entries: Iterable[Dict[str, Any]],
+    reverse: bool = False,
+    max_workers: int = 1,
+    chunk_size: int = 256,
+    journal: MoveJournal | None = None,
+    start: int = 0,
+    completed: Set[int] | None = None,
+    observer: "Observer | None" = None,
+    progress: ProgressReporter | None = None,
+) -> Dict[str, int | List[str]]:
+    """Executes plan entries and summarizes the outcome.
+
+    Entries flagged with ``skip`` are counted but not moved. A move is
+    refused when its source is missing or its destination already exists.
+
+    When resuming (``completed`` is given), an entry whose source is gone
+    and whose destination exists is treated as moved by the interrupted run
+    (it completed after the journal's last sync) and is logged instead of
+    being reported as an error.
+
+    Args:
+        entries: Plan entries, typically the lazy iterator from
+            :func:`sortium.plans.load_plan`.
+        reverse: If ``True``, moves files from ``destination_path`` back to
+            ``source_path``.
+        max_workers: Number of worker threads. ``1`` executes sequentially
+            in plan order with constant memory; higher values execute
+            concurrently (see :func:`_execute_concurrent`).
+        chunk_size: Maximum number of moves handed to a worker at once in
+            concurrent mode.
+        journal: Optional journal receiving the index of every completed
+            move.
+        start: Plan index of the first entry in ``entries``, for iterators
+            that begin part-way through a plan.
+        completed: Indices already logged by an interrupted run; they are
+            skipped without touching the filesystem.
+        observer: Optional :class:`~sortium.instrumentation.Observer`
+            counting ``bytes_moved`` (one extra ``lstat`` of each moved
+            file, reported as a ``stat_calls``) and ``errors``.
+        progress: Optional reporter advanced once per entry (once per
+            finished batch in concurrent mode), with the bytes moved. Moved
+            files are measured with one ``lstat`` each.
+
+    Returns:
+        A summary dictionary containing ``entries``, ``moved`` and
+        ``errors`` keys, plus ``recovered`` when resuming.
+
+    Raises:
+        OperationCancelled: If the progress callback cancelled the run. The
+            exception's ``summary`` describes the moves made until then.
+    """
+    source_key = "destination_path" if reverse else "source_path"
+    dest_key = "source_path" if reverse else "destination_path"
+    run = _Run(journal, completed, observer, measure_bytes=progress is not None)
+    if max_workers > 1:
+        summary = _execute_concurrent(
+            entries, source_key, dest_key, max_workers, chunk_size, run, start, progress
+        )
+    else:
+        if progress is not None:
+            entries = _tracked(entries, progress, run)
+        summary = _execute_sequential(entries, source_key, dest_key, run, start)
+    if completed is not None:
+        summary["recovered"] = run.recovered
+    if observer is not None and summary["errors"]:
+        observer.count("errors", len(summary["errors"]))
+    if progress is not None:
+        progress.finish()
+        if run.cancelled:
+            summary["cancelled"] = True
+            raise progress.cancel(summary)
+    return summary
+
+
+def _tracked(
+    entries: Iterable[Dict[str, Any]], progress: ProgressReporter, run: "_Run"
+) -> Iterator[Dict[str, Any]]:
+    """Reports each entry once it has been handled; stops when cancelled."""
+    for entry in entries:
+        yield entry
+        if not progress.advance(1, run.take_bytes()):
+            run.cancelled = True
+            close = getattr(entries, "close", None)
+            if close is not None:
+                close()
+            return
+
+
+class _Run:
+    """Journal bookkeeping shared by the workers of one execution."""
+
+    def __init__(
+        self,
+        journal: MoveJournal | None,
+        completed: Set[int] | None,
+        observer: "Observer | None" = None,
+        measure_bytes: bool = False,
+    ):
+        self.journal = journal
+        self.completed = completed
+        self.observer = observer
+        self.measure_bytes = measure_bytes
+        self.recovered = 0
+        self.cancelled = False
+        self._moved_bytes = 0
+        self._lock = threading.Lock()
+
+    def is_done(self, idx: int) -> bool:
+        return self.completed is not None and idx in self.completed
+
+    def finish(self, idx: int, source: str, dest: str, error_msg: str) -> bool:
+        """Records the outcome of one move; returns whether it counts as done."""
+        if error_msg and self.completed is not None and _looks_moved(source, dest):
+            with self._lock:
+                self.recovered += 1
+        elif error_msg:
+            return False
+        elif self.observer is not None or self.measure_bytes:
+            size = _moved_size(dest, self.observer)
+            with self._lock:
+                self._moved_bytes += size
+        if self.journal is not None:
+            self.journal.record(idx)
+        return True
+
+    def take_bytes(self) -> int:
+        """Returns the bytes moved since the previous call."""
+        with self._lock:
+            moved, self._moved_bytes = self._moved_bytes, 0
+        return moved
+
+
+def _looks_moved(source: str, dest: str) -> bool:
+    return not os.path.lexists(source) and os.path.lexists(dest)
+
+
+def _moved_size(dest: str, observer: "Observer | None" = None) -> int:
+    """Measures a file that was just moved to ``dest``, reporting it."""
+    if observer is not None:
+        observer.count("stat_calls")
+    try:
+        size = os.lstat(dest).st_size
+    except OSError:
+        return 0
+    if observer is not None:
+        observer.count("bytes_moved", size)
+    return size
+
+
+def _execute_sequential(
+    entries: Iterable[Dict[str, Any]],
+    source_key: str,
+    dest_key: str,
+    run: _Run,
+    start: int,
+) -> Dict[str, int | List[str]]:
+    """Executes entries one at a time, in plan order."""
+    errors: List[str] = []
+    moved = 0
+    entry_count = start
+    handles = _new_dir_handles()
+    try:
+        for idx, entry in enumerate(entries, start):
+            entry_count += 1
+            if entry.get("skip") or run.is_done(idx):
+                continue
+
+            paths = _entry_paths(idx, entry, source_key, dest_key)
+            if isinstance(paths, str):
+                errors.append(paths)
+                continue
+
+            error_msg = _check_and_move(paths[0], paths[1], True, handles)
+            if not run.finish(idx, paths[0], paths[1], error_msg):
+                errors.append(error_msg)
+            elif not error_msg:
+                moved += 1
+    finally:
+        if handles is not None:
+            handles.close()
+
+    return {"entries": entry_count, "moved": moved, "errors": errors}
+
+
+def _make_dir(dir_path: str) -> str:
+    try:
+        os.makedirs(dir_path or ".", exist_ok=True)
+        return ""
+    except OSError as exc:
+        return str(exc)
+
+
+def _source_dir(move: _Move) -> str:
+    return os.path.dirname(move[1])
+
+
+def _move_chunk(moves: List[_Move], run: _Run) -> Tuple[int, List[Tuple[int, str]]]:
+    """Moves a batch of files whose destinations share one directory.
+
+    Moves are ordered by source directory, so each (source directory,
+    destination directory) pair is opened once per batch.
+    """
+    moved = 0
+    errors: List[Tuple[int, str]] = []
+    handles = _new_dir_handles()
+    try:
+        for idx, source, dest in moves:
+            error_msg = _check_and_move(source, dest, False, handles)
+            if not run.finish(idx, source, dest, error_msg):
+                errors.append((idx, error_msg))
+            elif not error_msg:
+                moved += 1
+    finally:
+        if handles is not None:
+            handles.close()
+    return moved, errors
+
+
+def _cancel_chunks(futures: Iterable[Any], run: _Run) -> None:
+    """Cancels the batches no worker has started; running ones finish."""
+    run.cancelled = True
+    for future in futures:
+        future.cancel()
+
+
+def _execute_concurrent(
+    entries: Iterable[Dict[str, Any]],
+    source_key: str,
+    dest_key: str,
+    max_workers: int,
+    chunk_size: int,
+    run: _Run,
+    start: int,
+    progress: ProgressReporter | None = None,
+) -> Dict[str, int | List[str]]:
+    """Executes entries on a thread pool, grouped by destination directory.
+
+    The plan is read once to group moves by destination directory; every
+    destination directory is then created exactly once, and each group is
+    ordered by source directory and split into chunks that workers process
+    independently. Errors are reported in plan order, as in sequential mode.
+
+    The ``(source, destination)`` pairs of the whole plan are held in memory
+    while grouping. Plans whose entries depend on each other (one entry
+    moving a file into a path another entry vacates) must be executed
+    sequentially.
+    """
+    errors: List[Tuple[int, str]] = []
+    groups: Dict[str, List[_Move]] = {}
+    seen_dests: Set[str] = set()
+    entry_count = start
+
+    for idx, entry in enumerate(entries, start):
+        entry_count += 1
+        if entry.get("skip") or run.is_done(idx):
+            continue
+        paths = _entry_paths(idx, entry, source_key, dest_key)
+        if isinstance(paths, str):
+            errors.append((idx, paths))
+            continue
+        source, dest = paths
+        if dest in seen_dests:
+            # A second move onto the same destination would overwrite the
+            # first one; sequential mode refuses it the same way.
+            errors.append((idx, f"Destination already exists (plan stale?): {dest}"))
+            continue
+        seen_dests.add(dest)
+        groups.setdefault(os.path.dirname(dest), []).append((idx, source, dest))
+    seen_dests.clear()
+
+    moved = 0
+    with ThreadPoolExecutor(
+        max_workers=max_workers, thread_name_prefix="sortium-move"
+    ) as pool:
+        dir_errors = dict(zip(groups, pool.map(_make_dir, groups)))
+        futures: Dict[Any, int] = {}
+        queued = 0
+        for dest_dir, moves in groups.items():
+            dir_error = dir_errors[dest_dir]
+            if dir_error:
+                errors.extend(
+                    (idx, f"Error moving file '{source}' -> '{dest}': {dir_error}")
+                    for idx, source, dest in moves
+                )
+                continue
+            moves.sort(key=_source_dir)
+            for pos in range(0, len(moves), chunk_size):
+                chunk = moves[pos : pos + chunk_size]
+                futures[pool.submit(_move_chunk, chunk, run)] = len(chunk)
+                queued += len(chunk)
+
+        # Entries that needed no move (skipped, invalid, failed mkdir).
+        if progress is not None and not progress.advance(entry_count - start - queued):
+            _cancel_chunks(futures, run)
+        for future in as_completed(futures):
+            if future.cancelled():
+                continue
+            chunk_moved, chunk_errors = future.result()
+            moved += chunk_moved
+            errors.extend(chunk_errors)
+            if (
+                progress is not None
+                and not run.cancelled
+                and not progress.advance(futures[future], run.take_bytes())
+            ):
+                _cancel_chunks(futures, run)
+
+    errors.sort(key=lambda item: item[0])
+    return {
+        "entries": entry_count,
+        "moved": moved,
+        "errors": [message for _, message in errors],
+    }
+
+
+def rollback_moves(
+    entries: Dict[int, Dict[str, Any]],
+    indices: List[int],
+    reverse: bool = False,
+    observer: "Observer | None" = None,
+    progress: ProgressReporter | None = None,
+) -> Tuple[Dict[str, int | List[str]], List[int]]:
+    """Undoes journaled moves, newest first.
+
+    Args:
+        entries: Plan entries by index, covering every index in ``indices``.
+        indices: Completed entry indices in the order they were logged.
+        reverse: Direction the journaled run applied the plan in.
+        observer: Optional observer, as in :func:`execute_plan`.
+        progress: Optional reporter, as in :func:`execute_plan`. When the
+            callback cancels, the moves not undone yet stay in
+            ``remaining`` and the summary gains ``cancelled: True``.
+
+    Returns:
+        A ``(summary, remaining)`` tuple. ``summary`` contains ``entries``,
+        ``moved`` and ``errors`` keys; ``remaining`` lists, in log order, the
+        indices whose moves could not be undone.
+    """
+    # Undoing swaps the direction the plan was executed in.
+    source_key = "source_path" if reverse else "destination_path"
+    dest_key = "destination_path" if reverse else "source_path"
+    errors: List[str] = []
+    remaining: List[int] = []
+    moved = 0
+    cancelled = False
+    last_size = 0
+    handles = _new_dir_handles()
+    try:
+        for pos in range(len(indices) - 1, -1, -1):
+            if progress is not None and pos < len(indices) - 1:
+                if not progress.advance(1, last_size):
+                    # Everything not undone yet stays journaled.
+                    remaining.extend(reversed(indices[: pos + 1]))
+                    cancelled = True
+                    break
+                last_size = 0
+            idx = indices[pos]
+            entry = entries.get(idx)
+            if entry is None:
+                errors.append(f"Entry #{idx} is not in the plan.")
+                remaining.append(idx)
+                continue
+            paths = _entry_paths(idx, entry, source_key, dest_key)
+            if isinstance(paths, str):
+                errors.append(paths)
+                remaining.append(idx)
+                continue
+            error_msg = _check_and_move(paths[0], paths[1], True, handles)
+            if error_msg:
+                errors.append(error_msg)
+                remaining.append(idx)
+            else:
+                moved += 1
+                if observer is not None or progress is not None:
+                    last_size = _moved_size(paths[1], observer)
+    finally:
+        if handles is not None:
+            handles.close()
+
+    if observer is not None and errors:
+        observer.count("errors", len(errors))
+    if progress is not None:
+        if not cancelled and indices:
+            progress.advance(1, last_size)
+        progress.finish()
+    remaining.reverse()
+    summary = {"entries": len(indices), "moved": moved, "errors": errors}
+    if cancelled:
+        summary["cancelled"] = True
+    return summary, remaining
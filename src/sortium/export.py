@@ -0,0 +1,323 @@
+"""Streaming writer behind ``FileUtils.export_directory_structure``.
+
+The snapshot is written while the tree is walked, without building it in
+memory and without recursion: an explicit stack holds, for each directory
+on the current path, the sorted listing still to be written. Memory use
+therefore grows with the depth of the tree (times the width of the
+directories on the current path), not with the number of files.
+
+The output is byte-for-byte what ``json.dump(snapshot, indent=2)`` produced
+for the nested snapshot built by earlier versions::
+
+    {
+      "name": "root",
+      "path": "/data/root",
+      "type": "directory",
+      "children": [
+        {
+          "name": "a.txt",
+          "path": "/data/root/a.txt",
+          "type": "file",
+          "size": 5
+        }
+      ]
+    }
+
+Directories come before files and both are ordered by case-insensitive
+name. A directory that cannot be listed gets ``"children": []`` and
+``"error": "permission-denied"``. Symlinked directories are followed, except
+into one of their own ancestors: such a link gets ``"children": []`` and
+``"error": "symlink-loop"`` instead of being expanded forever.
+
+With rollups, every directory node also gets, after ``children``, the
+recursive ``total_size`` and ``file_count`` of its subtree and an
+``extensions`` map of the same two figures per lower-cased extension::
+
+      "children": [...],
+      "total_size": 5,
+      "file_count": 1,
+      "extensions": {
+        ".txt": {
+          "file_count": 1,
+          "total_size": 5
+        }
+      }
+
+They are accumulated from the sizes ``scandir`` already provides while the
+tree is walked, and written when a directory's last descendant is done.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import IO, List, Set, Tuple
+
+from .progress import ProgressReporter
+from .suffix_trie import SuffixTrie
+
+_dumps = json.dumps
+
+# (is_file, name, is_symlink) of each listed entry, in output order.
+_Listing = List[Tuple[bool, str, bool]]
+
+
+def _child_path(parent: str, name: str) -> str:
+    """Joins like ``str(Path(parent) / name)`` for a normalized ``parent``."""
+    if parent == ".":
+        return name
+    if parent.endswith(os.sep):
+        return parent + name
+    return parent + os.sep + name
+
+
+def _list_sorted(
+    dir_path: str, ignore_set: Set[str], exclude: Tuple[str, str] | None
+) -> Tuple[_Listing, dict]:
+    """Lists a directory in snapshot order.
+
+    Returns:
+        The listing and a ``{name: size}`` map for the files, taken from
+        the ``scandir`` entries.
+
+    Raises:
+        OSError: If the directory cannot be listed.
+    """
+    listing: _Listing = []
+    sizes = {}
+    with os.scandir(dir_path) as entries:
+        for entry in entries:
+            name = entry.name
+            if name in ignore_set:
+                continue
+            try:
+                if entry.is_file():
+                    if (
+                        exclude is not None
+                        and name == exclude[0]
+                        and os.path.abspath(entry.path) == exclude[1]
+                    ):
+                        continue
+                    listing.append((True, name, False))
+                    try:
+                        sizes[name] = entry.stat().st_size
+                    except OSError:
+                        sizes[name] = None
+                elif entry.is_dir():
+                    listing.append((False, name, entry.is_symlink()))
+                # Broken symlinks, sockets and FIFOs are not part of the tree.
+            except OSError:
+                continue
+    listing.sort(key=lambda item: (item[0], item[1].lower()))
+    return listing, sizes
+
+
+def _header(indent: str, name: str, path: str, node_type: str) -> str:
+    inner = indent + "  "
+    return (
+        f"{{\n{inner}\"name\": {_dumps(name)},\n"
+        f"{inner}\"path\": {_dumps(path)},\n"
+        f"{inner}\"type\": \"{node_type}\",\n"
+    )
+
+
+def _new_totals() -> list:
+    # [total bytes, file count, {extension: [file count, total bytes]}]
+    return [0, 0, {}]
+
+
+def _merge_totals(into: list, totals: list) -> None:
+    into[0] += totals[0]
+    into[1] += totals[1]
+    extensions = into[2]
+    for suffix, (count, size) in totals[2].items():
+        current = extensions.get(suffix)
+        if current is None:
+            extensions[suffix] = [count, size]
+        else:
+            current[0] += count
+            current[1] += size
+
+
+def _rollup_fields(indent: str, totals: list) -> str:
+    """Renders the rollup keys of a directory node, without separators."""
+    extensions = {
+        suffix: {"file_count": count, "total_size": size}
+        for suffix, (count, size) in sorted(totals[2].items())
+    }
+    inner = indent + "  "
+    rendered = _dumps(extensions, indent=2).replace("\n", "\n" + inner)
+    return (
+        f"{inner}\"total_size\": {totals[0]},\n"
+        f"{inner}\"file_count\": {totals[1]},\n"
+        f"{inner}\"extensions\": {rendered}"
+    )
+
+
+def _empty_directory(
+    indent: str, name: str, path: str, error: str, rollups: bool = False
+) -> str:
+    rollup_text = _rollup_fields(indent, _new_totals()) + ",\n" if rollups else ""
+    return (
+        _header(indent, name, path, "directory")
+        + f"{indent}  \"children\": [],\n"
+        + rollup_text
+        + f"{indent}  \"error\": \"{error}\"\n{indent}}}"
+    )
+
+
+def _summary_directory(
+    indent: str, name: str, path: str, parts: List[str], totals: list
+) -> str:
+    """Renders a directory node of a summary export from its child nodes."""
+    if parts:
+        child_indent = indent + "    "
+        children = (
+            f"[\n{child_indent}"
+            + f",\n{child_indent}".join(parts)
+            + f"\n{indent}  ]"
+        )
+    else:
+        children = "[]"
+    return (
+        _header(indent, name, path, "directory")
+        + f"{indent}  \"children\": {children},\n"
+        + _rollup_fields(indent, totals)
+        + f"\n{indent}}}"
+    )
+
+
+def write_tree(
+    stream: IO[str],
+    root: str | Path,
+    ignore_set: Set[str],
+    exclude: str | None = None,
+    reporter: ProgressReporter | None = None,
+    rollups: bool = False,
+    min_dir_size: int | None = None,
+    suffix_trie: SuffixTrie | None = None,
+) -> None:
+    """Streams the snapshot of ``root`` to ``stream``.
+
+    Args:
+        stream: Text stream receiving the JSON document.
+        root: Directory to export.
+        ignore_set: Names skipped at every level.
+        exclude: Absolute path of a file to leave out (the output file when
+            it lives inside the exported tree).
+        reporter: Optional progress reporter, advanced once per file with
+            the file's size.
+        rollups: Whether directory nodes get ``total_size``, ``file_count``
+            and ``extensions`` keys after their ``children``.
+        min_dir_size: When given, writes a summary instead: only directory
+            nodes (with rollups) whose ``total_size`` is at least this many
+            bytes, plus the root. A directory's node is only known to qualify
+            once its subtree is walked, so summary nodes are kept in memory
+            until their parent is complete.
+        suffix_trie: Matcher giving each file its rollup extension.
+            Defaults to the last suffix only.
+
+    Raises:
+        OSError: If a directory vanishes or cannot be listed for a reason
+            other than permissions.
+        OperationCancelled: If the progress callback cancelled.
+    """
+    write = stream.write
+    summary = min_dir_size is not None
+    rollups = rollups or summary
+    excluded = (os.path.basename(exclude), exclude) if exclude is not None else None
+    extension_of = (suffix_trie or SuffixTrie(())).match
+    # Frames of the directories on the current path: [path, real path,
+    # depth, listing, position, sizes, name, totals, summary parts].
+    stack: List[list] = []
+    ancestors: Set[str] = set()
+
+    def emit_child(text: str) -> None:
+        """Adds a finished summary node to its parent, or writes the root."""
+        if stack:
+            stack[-1][8].append(text)
+        else:
+            write(text)
+
+    def open_directory(path: str, real: str, name: str, depth: int) -> None:
+        indent = "    " * depth
+        try:
+            listing, sizes = _list_sorted(path, ignore_set, excluded)
+        except PermissionError:
+            if not summary:
+                write(_empty_directory(indent, name, path, "permission-denied", rollups))
+            elif min_dir_size <= 0 or not stack:
+                emit_child(_empty_directory(indent, name, path, "permission-denied", True))
+            return
+        if not summary:
+            write(_header(indent, name, path, "directory"))
+            write(f"{indent}  \"children\": [")
+        totals = _new_totals() if rollups else None
+        stack.append([path, real, depth, listing, 0, sizes, name, totals, []])
+        ancestors.add(real)
+
+    root_path = Path(root)
+    root_str = str(root_path)
+    open_directory(root_str, os.path.realpath(root_str), root_path.name, 0)
+
+    while stack:
+        frame = stack[-1]
+        path, real, depth, listing, position, sizes, name, totals, parts = frame
+        indent = "    " * depth
+        if position == len(listing):
+            stack.pop()
+            ancestors.discard(real)
+            if rollups and stack:
+                _merge_totals(stack[-1][7], totals)
+            if summary:
+                if totals[0] >= min_dir_size or not stack:
+                    emit_child(_summary_directory(indent, name, path, parts, totals))
+                continue
+            closing = f"\n{indent}  ]" if listing else "]"
+            if rollups:
+                closing += ",\n" + _rollup_fields(indent, totals)
+            write(f"{closing}\n{indent}}}")
+            continue
+
+        frame[4] = position + 1
+        is_file, child_name, is_link = listing[position]
+        child_indent = indent + "    "
+        if not summary:
+            write(f"\n{child_indent}" if position == 0 else f",\n{child_indent}")
+        child_path = _child_path(path, child_name)
+        if is_file:
+            size = sizes[child_name]
+            if rollups:
+                totals[0] += size or 0
+                totals[1] += 1
+                suffix = extension_of(child_name)
+                counts = totals[2].get(suffix)
+                if counts is None:
+                    totals[2][suffix] = [1, size or 0]
+                else:
+                    counts[0] += 1
+                    counts[1] += size or 0
+            if not summary:
+                write(_header(child_indent, child_name, child_path, "file"))
+                write(f"{child_indent}  \"size\": {_dumps(size)}\n{child_indent}}}")
+            if reporter is not None and not reporter.advance(1, size or 0):
+                reporter.finish()
+                raise reporter.cancel()
+        else:
+            child_real = (
+                os.path.realpath(child_path) if is_link else _child_path(real, child_name)
+            )
+            if child_real not in ancestors:
+                open_directory(child_path, child_real, child_name, depth + 1)
+            elif not summary:
+                write(
+                    _empty_directory(
+                        child_indent, child_name, child_path, "symlink-loop", rollups
+                    )
+                )
+            elif min_dir_size <= 0:
+                emit_child(
+                    _empty_directory(child_indent, child_name, child_path, "symlink-loop", True)
+                )
+
+    if reporter is not None:
+        reporter.finish()
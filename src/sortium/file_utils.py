@@ -1,10 +1,30 @@
 import json
-import shutil
+import logging
+import os
 from pathlib import Path
-from datetime import datetime
-from typing import Set, Generator, Sequence, List, Dict
-
-from .config import DEFAULT_IGNORE_ENTRIES
+from datetime import datetime, timezone
+from typing import Set, Generator, Sequence, List, Dict, Tuple
+from uuid import uuid4
+
+from .config import DEFAULT_FILE_TYPES, DEFAULT_IGNORE_ENTRIES
+from .duplicates import find_duplicate_groups
+from .export import write_tree
+from .executor import _move_file_to_path, _moved_size, execute_plan, rollback_moves
+from .histogram import ExtensionHistogram, profile_tree
+from .instrumentation import Observer, _ObservedFileEntry, observe_phase, observe_scan
+from .journal import MoveJournal, read_journal, rewrite_journal
+from .plans import load_plan, open_plan_writer, plan_format_for_path
+from .progress import (
+    OperationCancelled,
+    ProgressCallback,
+    iter_with_progress,
+    new_reporter,
+)
+from .snapshot import CHANGE_TYPES, diff_snapshots, snapshot_root
+from .suffix_trie import SuffixTrie
+from .walker import FileEntry, walk_files, walk_files_parallel
+
+logger = logging.getLogger(__name__)
 
 
 def _build_ignore_set(user_ignore: Sequence[str] | None) -> Set[str]:
@@ -12,6 +32,15 @@ def _build_ignore_set(user_ignore: Sequence[str] | None) -> Set[str]:
     return DEFAULT_IGNORE_ENTRIES.union(user_ignore or [])
 
 
+def _extension_map(file_types_dict: Dict[str, List[str]] | None) -> Dict[str, str]:
+    """Category per lower-cased extension, as ``Sorter`` builds it."""
+    return {
+        ext.lower(): category
+        for category, extensions in (file_types_dict or DEFAULT_FILE_TYPES).items()
+        for ext in extensions
+    }
+
+
 def _generate_unique_path(dest_path: Path) -> Path:
     """Creates a unique path to avoid overwriting existing files.
 
@@ -38,35 +67,176 @@ def _generate_unique_path(dest_path: Path) -> Path:
         counter += 1
 
 
-def _move_file_safely(source_path_str: str, dest_folder_str: str) -> str:
-    """Moves a single file while handling destination name collisions."""
+def _split_name(file_name: str) -> Tuple[str, str]:
+    """Splits a file name into ``(stem, suffix)`` like ``Path.stem``/``suffix``."""
+    idx = file_name.rfind(".")
+    if 0 < idx < len(file_name) - 1:
+        return file_name[:idx], file_name[idx:]
+    return file_name, ""
 
+
+def _entry_size(item: FileEntry) -> int:
+    """Size of a scanned file, ``0`` if it cannot be inspected."""
     try:
-        source_path = Path(source_path_str)
-        dest_folder = Path(dest_folder_str)
-        dest_folder.mkdir(parents=True, exist_ok=True)
-        final_dest_path = _generate_unique_path(dest_folder / source_path.name)
-        shutil.move(str(source_path), str(final_dest_path))
-        return ""
-    except Exception as exc:  # pragma: no cover - surface error for caller
-        return f"Error moving file '{source_path_str}': {exc}"
+        return item.stat().st_size
+    except OSError:
+        return 0
+
+
+class DestinationIndex:
+    """In-memory reservation index for collision-safe destination names.
+
+    Each destination directory is listed once, the first time a name is
+    reserved in it. Existing names and names handed out earlier in the same
+    run are kept in a set, and the next free `` (n)`` counter is remembered
+    per ``(directory, stem, suffix)``, so resolving a collision costs O(1)
+    amortized with no per-candidate ``exists()`` probes. Two files with the
+    same name planned into the same folder therefore receive distinct
+    destinations.
+
+    A single index should be shared by every destination computed for one
+    plan, and discarded afterwards since it does not observe later changes
+    on disk.
+
+    Attributes:
+        listings (int): Number of destination folders listed so far.
+        probes (int): Number of alternative `` (n)`` names tried because
+            the desired name was taken.
+    """
 
+    def __init__(self, case_sensitive: bool | None = None):
+        """Initializes an empty index.
 
-def _move_file_to_path(source_path_str: str, dest_path_str: str) -> str:
-    """Moves a file to an explicit destination path without renaming."""
+        Args:
+            case_sensitive: Whether names differing only in case are distinct.
+                Defaults to ``False`` on Windows and ``True`` elsewhere.
+        """
+        if case_sensitive is None:
+            case_sensitive = os.name != "nt"
+        self._case_sensitive = case_sensitive
+        self._taken: Dict[str, Set[str]] = {}
+        self._counters: Dict[Tuple[str, str, str], int] = {}
+        self.listings = 0
+        self.probes = 0
+
+    def _key(self, name: str) -> str:
+        return name if self._case_sensitive else name.casefold()
+
+    def _names_in(self, folder: str) -> Set[str]:
+        """Returns the taken-name set for ``folder``, listing it on first use."""
+        names = self._taken.get(folder)
+        if names is None:
+            self.listings += 1
+            try:
+                names = {self._key(name) for name in os.listdir(folder)}
+            except OSError:
+                # Missing (or unreadable) folders have no existing names yet.
+                names = set()
+            self._taken[folder] = names
+        return names
 
-    try:
-        source_path = Path(source_path_str)
-        dest_path = Path(dest_path_str)
-        dest_path.parent.mkdir(parents=True, exist_ok=True)
-        shutil.move(str(source_path), str(dest_path))
-        return ""
-    except Exception as exc:  # pragma: no cover - error string used for diagnostics
-        return f"Error moving file '{source_path_str}' -> '{dest_path_str}': {exc}"
+    def reserve(self, dest_folder: str | Path, file_name: str) -> Path:
+        """Reserves a unique name for ``file_name`` inside ``dest_folder``.
+
+        Args:
+            dest_folder: Folder the file will be moved into.
+            file_name: Desired file name.
+
+        Returns:
+            The reserved destination path. The name is ``file_name`` when it
+            is free, otherwise ``"<stem> (<n>)<suffix>"`` with the lowest
+            counter not taken on disk or by an earlier reservation.
+        """
+        folder = os.path.normpath(str(dest_folder))
+        return Path(folder) / self.reserve_name(folder, file_name)
+
+    def reserve_name(self, folder: str, file_name: str) -> str:
+        """Like :meth:`reserve`, returning only the reserved file name.
+
+        Args:
+            folder: Destination folder, already normalized with
+                ``os.path.normpath``.
+            file_name: Desired file name.
+        """
+        names = self._names_in(folder)
+
+        key = self._key(file_name)
+        if key not in names:
+            names.add(key)
+            return file_name
+
+        stem, suffix = _split_name(file_name)
+        counter_key = (folder, self._key(stem), self._key(suffix))
+        counter = self._counters.get(counter_key, 1)
+        candidate = f"{stem} ({counter}){suffix}"
+        self.probes += 1
+        while self._key(candidate) in names:
+            counter += 1
+            candidate = f"{stem} ({counter}){suffix}"
+            self.probes += 1
+
+        names.add(self._key(candidate))
+        self._counters[counter_key] = counter + 1
+        return candidate
 
 
 class FileUtils:
-    """Provides memory-efficient utilities for file and directory manipulation."""
+    """Provides memory-efficient utilities for file and directory manipulation.
+
+    Attributes:
+        scan_workers (int): Default number of threads used to list
+            directories during recursive scans. ``1`` scans sequentially.
+        ordered_scan (bool): Whether recursive scans yield files in a
+            deterministic (name-sorted, depth-first) order by default.
+        observer (Observer | None): Optional observer receiving phase
+            timings and counters (see :mod:`sortium.instrumentation`).
+        progress (ProgressCallback | None): Optional progress callback (see
+            :mod:`sortium.progress`).
+        progress_interval (float): Minimum seconds between progress reports.
+    """
+
+    def __init__(
+        self,
+        scan_workers: int = 1,
+        ordered_scan: bool = False,
+        observer: Observer | None = None,
+        progress: ProgressCallback | None = None,
+        progress_interval: float = 0.5,
+    ):
+        """Initializes the FileUtils instance.
+
+        Args:
+            scan_workers: Default number of directory-listing threads for
+                recursive scans. Values above ``1`` enable parallel
+                traversal, which mainly helps on slow or networked
+                filesystems (NFS, FUSE). Defaults to ``1``.
+            ordered_scan: When ``True``, recursive scans yield files in a
+                deterministic order regardless of ``scan_workers``.
+                Defaults to ``False``.
+            observer: Optional :class:`~sortium.instrumentation.Observer`
+                (e.g. a ``PhaseRecorder``) notified of scan, probe and apply
+                phases and of file, directory, stat, probe, byte and error
+                counts. Defaults to ``None``, which skips instrumentation
+                entirely.
+            progress: Optional callback receiving a
+                :class:`~sortium.progress.Progress` snapshot (files, bytes,
+                throughput, ETA) while scanning, flattening, finding
+                duplicates and applying, rolling back or resuming plans.
+                Returning ``False`` cancels the operation with
+                :class:`~sortium.progress.OperationCancelled`.
+            progress_interval: Minimum number of seconds between two
+                progress reports. Defaults to ``0.5``.
+
+        Raises:
+            ValueError: If ``scan_workers`` is less than ``1``.
+        """
+        if scan_workers < 1:
+            raise ValueError("scan_workers must be at least 1.")
+        self.scan_workers = scan_workers
+        self.ordered_scan = ordered_scan
+        self.observer = observer
+        self.progress = progress
+        self.progress_interval = progress_interval
 
     def get_file_modified_date(self, file_path: str) -> datetime:
         """Returns the last modified datetime of a file.
@@ -81,13 +251,18 @@ class FileUtils:
             FileNotFoundError: If the file does not exist.
         """
         path = Path(file_path)
+        if self.observer is not None:
+            self.observer.count("stat_calls", 2)
         if not path.is_file():
             raise FileNotFoundError(f"File does not exist: {file_path}")
         return datetime.fromtimestamp(path.stat().st_mtime)
 
     def iter_shallow_files(
-        self, folder_path: str, ignore_dir: Sequence[str] | None = None
-    ) -> Generator[Path, None, None]:
+        self,
+        folder_path: str,
+        ignore_dir: Sequence[str] | None = None,
+        as_entries: bool = False,
+    ) -> Generator[Path | FileEntry, None, None]:
         """Yields files in the top level of a directory.
 
         This is a non-recursive generator.
@@ -96,55 +271,92 @@ class FileUtils:
             folder_path: Path to the folder to iterate.
             ignore_dir: Additional names to ignore alongside the
                 built-in defaults (``DEFAULT_IGNORE_ENTRIES``).
+            as_entries: When ``True``, yields lightweight ``FileEntry``
+                objects (path string plus cached ``stat``) instead of
+                ``Path`` objects.
 
         Yields:
-            A generator of ``Path`` objects for each file.
+            A generator of ``Path`` (or ``FileEntry``) objects for each file.
         """
-        source_root = Path(folder_path)
         ignore_set = _build_ignore_set(ignore_dir)
-        try:
-            for item in source_root.iterdir():
-                if item.name in ignore_set:
-                    continue
-                if item.is_file():
-                    yield item
-        except FileNotFoundError:
-            print(f"Directory not found: {folder_path}")
-        except PermissionError:
-            print(f"Permission denied for directory: {folder_path}")
+        yield from self._iter_files(folder_path, ignore_set, False, as_entries)
 
     def iter_all_files_recursive(
-        self, folder_path: str, ignore_dir: Sequence[str] | None = None
-    ) -> Generator[Path, None, None]:
+        self,
+        folder_path: str,
+        ignore_dir: Sequence[str] | None = None,
+        as_entries: bool = False,
+        max_workers: int | None = None,
+        ordered: bool | None = None,
+    ) -> Generator[Path | FileEntry, None, None]:
         """Recursively yields all files in a directory and its subdirectories.
 
         This is a memory-efficient generator that does not load the entire
-        file list into memory.
+        file list into memory. The tree is walked with ``os.scandir`` and an
+        explicit stack, so the file type reported by the directory listing is
+        reused and very deep trees do not hit the recursion limit.
 
         Args:
             folder_path: Path to the root directory to scan.
             ignore_dir: Additional directory names to ignore alongside the
                 built-in defaults (``DEFAULT_IGNORE_ENTRIES``).
+            as_entries: When ``True``, yields lightweight ``FileEntry``
+                objects (path string plus cached ``stat``) instead of
+                ``Path`` objects.
+            max_workers: Number of threads listing directories concurrently.
+                Defaults to ``scan_workers``.
+            ordered: When ``True``, files are yielded in a deterministic
+                order. Defaults to ``ordered_scan``.
 
         Yields:
-            A generator of ``Path`` objects for each file found.
+            A generator of ``Path`` (or ``FileEntry``) objects for each file
+            found.
         """
-        source_root = Path(folder_path)
-        if not source_root.is_dir():
+        if not os.path.isdir(folder_path):
             return
 
         ignore_set = _build_ignore_set(ignore_dir)
+        yield from self._iter_files(
+            folder_path,
+            ignore_set,
+            True,
+            as_entries,
+            max_workers=max_workers,
+            ordered=ordered,
+        )
 
-        try:
-            for item in source_root.iterdir():
-                if item.name in ignore_set:
-                    continue
-                if item.is_dir():
-                    yield from self.iter_all_files_recursive(str(item), ignore_dir)
-                elif item.is_file():
-                    yield item
-        except PermissionError:
-            print(f"Permission denied for directory: {folder_path}")
+    def _iter_files(
+        self,
+        folder_path: str,
+        ignore_set: Set[str],
+        recursive: bool,
+        as_entries: bool,
+        skip_paths: Set[str] | None = None,
+        max_workers: int | None = None,
+        ordered: bool | None = None,
+    ) -> Generator[Path | FileEntry, None, None]:
+        """Runs the walker engine and converts entries to the requested type."""
+        workers = self.scan_workers if max_workers is None else max_workers
+        ordered = self.ordered_scan if ordered is None else ordered
+        observer = self.observer
+        if recursive and workers > 1:
+            entries = walk_files_parallel(
+                str(folder_path), ignore_set, workers, skip_paths, ordered,
+                observer=observer,
+            )
+        else:
+            entries = walk_files(
+                str(folder_path), ignore_set, recursive, skip_paths, ordered, observer
+            )
+        if as_entries and observer is not None:
+            for entry in entries:
+                yield _ObservedFileEntry(entry.path, entry.name, entry, observer)
+        elif as_entries:
+            for entry in entries:
+                yield FileEntry(entry.path, entry.name, entry)
+        else:
+            for entry in entries:
+                yield Path(entry.path)
 
     def flatten_dir(
         self,
@@ -170,6 +382,8 @@ class FileUtils:
 
         Raises:
             FileNotFoundError: If ``folder_path`` does not exist.
+            OperationCancelled: If the progress callback cancelled; files
+                moved until then stay in ``dest_folder_path``.
         """
         source_root = Path(folder_path)
         dest_root = Path(dest_folder_path)
@@ -178,35 +392,64 @@ class FileUtils:
 
         dest_root.mkdir(parents=True, exist_ok=True)
 
-        combined_ignore = tuple(_build_ignore_set(ignore_dir))
-
-        print("Starting directory flattening...")
-        for file_path in self.iter_all_files_recursive(
-            str(source_root), combined_ignore
-        ):
-            error_msg = _move_file_safely(str(file_path), str(dest_root))
+        ignore_set = _build_ignore_set(ignore_dir)
+        # Never descend into the destination when it lives inside the tree,
+        # otherwise already-flattened files would be picked up again.
+        skip_paths = {os.path.abspath(dest_root)}
+
+        index = DestinationIndex()
+
+        observer = self.observer
+        files = self._iter_files(str(source_root), ignore_set, True, True, skip_paths)
+        if observer is not None:
+            files = observe_scan(files, observer)
+        reporter = new_reporter(self.progress, "flatten", None, self.progress_interval)
+
+        logger.info("Flattening '%s' into '%s'.", source_root, dest_root)
+        for entry in files:
+            final_dest_path = index.reserve(dest_root, entry.name)
+            error_msg = _move_file_to_path(entry.path, str(final_dest_path))
             if error_msg:
-                print(error_msg)
-        print("Flattening complete.")
+                logger.error(error_msg)
+            if observer is not None or reporter is not None:
+                size = 0 if error_msg else _moved_size(str(final_dest_path), observer)
+                if observer is not None and error_msg:
+                    observer.count("errors")
+                if reporter is not None and not reporter.advance(1, size):
+                    reporter.finish()
+                    raise reporter.cancel()
+        if observer is not None:
+            observer.count("dirs_listed", index.listings)
+            observer.count("collision_probes", index.probes)
+        if reporter is not None:
+            reporter.finish()
+        logger.info("Flattening complete.")
 
     def find_unique_extensions(
-        self, source_path: str, ignore_dir: List[str] | None = None
+        self,
+        source_path: str,
+        ignore_dir: List[str] | None = None,
+        max_workers: int | None = None,
     ) -> Set[str]:
         """Recursively finds all unique file extensions in a directory.
 
         This method is memory-efficient, scanning the directory tree without
-        loading all paths into memory at once.
+        loading all paths into memory at once. Use :meth:`profile_extensions`
+        to also learn how many files and bytes each extension accounts for.
 
         Args:
             source_path: Path to the root directory to scan.
             ignore_dir: Additional directory names to ignore alongside the
                 built-in defaults (``DEFAULT_IGNORE_ENTRIES``).
+            max_workers: Number of threads listing directories concurrently.
+                Defaults to ``scan_workers``.
 
         Returns:
             A set of unique file extensions (e.g., {".txt", ".jpg"}).
 
         Raises:
             FileNotFoundError: If ``source_path`` does not exist.
+            OperationCancelled: If the progress callback cancelled.
         """
         source_root = Path(source_path)
         if not source_root.exists():
@@ -214,28 +457,229 @@ class FileUtils:
 
         extensions: Set[str] = set()
         file_generator = self.iter_all_files_recursive(
-            str(source_root), tuple(_build_ignore_set(ignore_dir))
+            str(source_root), ignore_dir, as_entries=True, max_workers=max_workers
         )
+        reporter = new_reporter(self.progress, "scan", None, self.progress_interval)
+        if reporter is not None:
+            file_generator = iter_with_progress(file_generator, reporter)
 
-        for file_path in file_generator:
-            if file_path.suffix:
-                extensions.add(file_path.suffix.lower())
+        for entry in file_generator:
+            suffix = entry.suffix
+            if suffix:
+                extensions.add(suffix.lower())
 
         return extensions
 
+    def profile_extensions(
+        self,
+        source_path: str,
+        ignore_dir: List[str] | None = None,
+        file_types_dict: Dict[str, List[str]] | None = None,
+        max_workers: int = 4,
+        sample: float | None = None,
+        seed: int = 0,
+    ) -> ExtensionHistogram:
+        """Profiles file counts and sizes per extension in one parallel pass.
+
+        Unlike :meth:`find_unique_extensions`, the result tells how many
+        files and bytes each extension accounts for, how their sizes are
+        distributed and which category ``Sorter`` would put them in, which
+        is what tuning a file-type mapping for a share needs. Subtrees are
+        profiled on a thread pool and merged; see :mod:`sortium.histogram`.
+
+        Args:
+            source_path: Path to the root directory to profile.
+            ignore_dir: Additional directory names to ignore alongside the
+                built-in defaults (``DEFAULT_IGNORE_ENTRIES``).
+            file_types_dict: Category mapping, as given to ``Sorter``, used
+                to fill ``categories`` and to key compound extensions
+                (``.tar.gz``) as the sorters do. Defaults to
+                ``DEFAULT_FILE_TYPES``.
+            max_workers: Number of threads profiling subtrees.
+            sample: When given, estimates the histogram by entering each
+                subdirectory with this probability only (in ``(0, 1]``).
+            seed: Seed of the sampling decisions.
+
+        Returns:
+            An :class:`~sortium.histogram.ExtensionHistogram`; histograms
+            of separately profiled subtrees can be combined with its
+            ``merge`` method, and ``to_dict`` summarizes it.
+
+        Raises:
+            FileNotFoundError: If ``source_path`` does not exist.
+            ValueError: If ``sample`` is not in ``(0, 1]``.
+            OperationCancelled: If the progress callback cancelled.
+        """
+        source_root = Path(source_path)
+        if not source_root.exists():
+            raise FileNotFoundError(f"The path '{source_root}' does not exist.")
+
+        reporter = new_reporter(self.progress, "scan", None, self.progress_interval)
+        on_shard = None
+        if reporter is not None:
+
+            def on_shard(shard: ExtensionHistogram) -> None:
+                if not reporter.advance(int(shard.file_count), int(shard.total_size)):
+                    raise reporter.cancel()
+
+        mapping = _extension_map(file_types_dict)
+        histogram = profile_tree(
+            str(source_root),
+            _build_ignore_set(ignore_dir),
+            max_workers,
+            sample,
+            seed,
+            on_shard,
+            SuffixTrie(mapping),
+        )
+        if reporter is not None:
+            reporter.finish()
+
+        histogram.categorize(lambda suffix: mapping.get(suffix, "Others"))
+        return histogram
+
+    def find_duplicates(
+        self,
+        folder_path: str,
+        quarantine_folder: str | None = None,
+        ignore_dir: Sequence[str] | None = None,
+        plan_output: str | None = None,
+        max_workers: int = 4,
+        min_size: int = 1,
+        block_size: int = 64 * 1024,
+    ) -> Path:
+        """Finds files with identical content and plans quarantining the copies.
+
+        Files are compared in stages (size, then a hash of their first and
+        last blocks, then a memory-mapped hash of the whole file), so most
+        files are never read in full. Hashing runs on a thread pool.
+
+        In every group of identical files, the one with the smallest path is
+        kept; each other copy gets a plan entry moving it into
+        ``quarantine_folder``, mirroring its location relative to
+        ``folder_path``. The plan can be reviewed and then executed (or
+        undone) with :meth:`apply_move_plan`.
+
+        Args:
+            folder_path: Root directory to scan recursively.
+            quarantine_folder: Where duplicates are planned to go. Defaults
+                to ``sortium_duplicates`` inside ``folder_path``; it is never
+                scanned itself.
+            ignore_dir: Additional directory names to ignore alongside the
+                built-in defaults (``DEFAULT_IGNORE_ENTRIES``).
+            plan_output: Optional path of the plan. Defaults to a
+                timestamped JSON file in ``folder_path``; the suffix selects
+                the plan format as for ``Sorter`` plans.
+            max_workers: Number of hashing threads.
+            min_size: Files smaller than this many bytes are ignored.
+                Defaults to ``1``, skipping empty files.
+            block_size: Bytes hashed at each end of a file before deciding
+                whether it must be hashed in full.
+
+        Returns:
+            Path to the plan file. Entries carry ``duplicate_of`` (the kept
+            file), ``digest`` and ``size`` besides the usual keys.
+
+        Raises:
+            FileNotFoundError: If ``folder_path`` does not exist.
+            OperationCancelled: If the progress callback cancelled while the
+                tree was scanned; no plan is written then.
+        """
+        source_root = Path(folder_path)
+        if not source_root.is_dir():
+            raise FileNotFoundError(f"The path '{folder_path}' does not exist.")
+        quarantine_root = (
+            Path(quarantine_folder)
+            if quarantine_folder
+            else source_root / "sortium_duplicates"
+        )
+        if plan_output:
+            plan_path = Path(plan_output)
+        else:
+            timestamp = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
+            plan_path = source_root / f"sortium_plan_duplicates_{timestamp}.json"
+
+        files = self._iter_files(
+            str(source_root),
+            _build_ignore_set(ignore_dir),
+            True,
+            True,
+            skip_paths={os.path.abspath(quarantine_root)},
+        )
+        reporter = new_reporter(self.progress, "scan", None, self.progress_interval)
+        if reporter is not None:
+            files = iter_with_progress(files, reporter, _entry_size)
+        groups, stats = find_duplicate_groups(files, max_workers, block_size, min_size)
+
+        header = {
+            "plan_id": str(uuid4()),
+            "version": 1,
+            "strategy": "duplicates",
+            "generated_at": datetime.now(timezone.utc).isoformat(),
+            "source_root": str(source_root),
+            "destination_root": str(quarantine_root),
+            "metadata": {
+                "ignored": list(ignore_dir or []),
+                "min_size": min_size,
+                "groups": len(groups),
+                **stats,
+            },
+        }
+        index = DestinationIndex()
+        plan_format = plan_format_for_path(plan_path)
+        with open_plan_writer(plan_path, header, plan_format) as writer:
+            for digest, members in groups:
+                kept = members[0]
+                for item in members[1:]:
+                    relative_dir = os.path.relpath(os.path.dirname(item.path), source_root)
+                    planned_path = index.reserve(quarantine_root / relative_dir, item.name)
+                    writer.write(
+                        {
+                            "source_path": item.path,
+                            "destination_path": str(planned_path),
+                            "category": "duplicate",
+                            "duplicate_of": kept.path,
+                            "digest": digest,
+                            "size": item.stat().st_size,
+                        }
+                    )
+
+        logger.info(
+            "Found %d duplicate group(s); plan written to '%s'.", len(groups), plan_path
+        )
+        return plan_path
+
     def export_directory_structure(
         self,
         folder_path: str,
         output_file: str,
         ignore_dir: Sequence[str] | None = None,
+        rollups: bool = False,
+        min_dir_size: int | None = None,
     ) -> Path:
         """Writes the directory tree rooted at ``folder_path`` to a JSON file.
 
+        The tree is walked iteratively with ``os.scandir`` and the JSON is
+        written as it is walked, so memory use depends on the depth of the
+        tree rather than on the number of files, and very deep trees do not
+        hit the recursion limit. Directories are listed before files, each
+        group ordered by case-insensitive name. The output file itself is
+        left out when it lies inside ``folder_path``.
+
         Args:
             folder_path: Directory whose structure should be traced.
             output_file: Destination JSON file path.
             ignore_dir: Optional iterable of additional directory or file names
                 to skip alongside ``DEFAULT_IGNORE_ENTRIES``.
+            rollups: Adds ``total_size``, ``file_count`` and a per-extension
+                breakdown (``extensions``) of its whole subtree to every
+                directory node, computed in the same walk. Compound
+                extensions of ``DEFAULT_FILE_TYPES`` (``.tar.gz``) are
+                keyed as ``Sorter`` sees them.
+            min_dir_size: Writes a summary instead of the full tree: file
+                nodes are left out and only directories holding at least
+                this many bytes are kept (the root always is), each with its
+                rollups. Implies ``rollups``.
 
         Returns:
             Path to the generated JSON file.
@@ -243,6 +687,8 @@ class FileUtils:
         Raises:
             FileNotFoundError: If ``folder_path`` does not exist.
             NotADirectoryError: If ``folder_path`` is not a directory.
+            OperationCancelled: If the progress callback cancelled; the
+                partial output file is removed.
         """
 
         source_root = Path(folder_path)
@@ -255,85 +701,180 @@ class FileUtils:
                 f"The path '{folder_path}' is not a directory and cannot be exported."
             )
 
-        ignore_set = _build_ignore_set(ignore_dir)
-
-        def build_node(current_path: Path) -> dict:
-            if current_path.is_file():
-                try:
-                    size = current_path.stat().st_size
-                except (PermissionError, OSError):
-                    size = None
-                return {
-                    "name": current_path.name,
-                    "path": str(current_path),
-                    "type": "file",
-                    "size": size,
-                }
-
-            children = []
-            try:
-                for child in sorted(
-                    current_path.iterdir(), key=lambda p: (p.is_file(), p.name.lower())
-                ):
-                    if child.name in ignore_set:
-                        continue
-                    child_snapshot = build_node(child)
-                    if child_snapshot is not None:
-                        children.append(child_snapshot)
-            except PermissionError:
-                # Surface the permission error at this directory level.
-                return {
-                    "name": current_path.name,
-                    "path": str(current_path),
-                    "type": "directory",
-                    "children": [],
-                    "error": "permission-denied",
-                }
-
-            return {
-                "name": current_path.name,
-                "path": str(current_path),
-                "type": "directory",
-                "children": children,
-            }
-
-        snapshot = build_node(source_root)
-
         output_path = Path(output_file)
         output_path.parent.mkdir(parents=True, exist_ok=True)
-        with output_path.open("w", encoding="utf-8") as json_file:
-            json.dump(snapshot, json_file, indent=2)
+        reporter = new_reporter(self.progress, "scan", None, self.progress_interval)
+        try:
+            with output_path.open("w", encoding="utf-8") as json_file:
+                write_tree(
+                    json_file,
+                    source_root,
+                    _build_ignore_set(ignore_dir),
+                    exclude=os.path.abspath(output_path),
+                    reporter=reporter,
+                    rollups=rollups,
+                    min_dir_size=min_dir_size,
+                    suffix_trie=SuffixTrie(_extension_map(None)),
+                )
+        except OperationCancelled:
+            output_path.unlink(missing_ok=True)
+            raise
 
         return output_path
 
-    def plan_destination_path(self, source_path: str, dest_folder_path: str) -> Path:
+    def diff_snapshots(
+        self,
+        before_file: str,
+        after_file: str,
+        plan_output: str | None = None,
+    ) -> Path:
+        """Compares two snapshots and writes the differences as a repair plan.
+
+        Both files must have been written by
+        :meth:`export_directory_structure`. They are streamed rather than
+        loaded; see :mod:`sortium.snapshot` for how files and directories
+        are matched.
+
+        Every change becomes one plan entry whose ``category`` is the kind
+        of change (``moved``, ``resized``, ``added`` or ``removed``). Moved
+        files and directories are planned from where they are now back to
+        where they were, so :meth:`apply_move_plan` restores the earlier
+        layout and ``reverse=True`` redoes the moves. All other entries are
+        marked ``skip``: they document what changed but cannot be repaired
+        by moving files.
+
+        Args:
+            before_file: Snapshot taken first.
+            after_file: Snapshot taken later.
+            plan_output: Optional path of the plan. Defaults to a
+                timestamped JSON file next to ``after_file``; the suffix
+                selects the plan format as for ``Sorter`` plans.
+
+        Returns:
+            Path to the plan file. Entries carry ``type`` (``file`` or
+            ``directory``) and the sizes involved besides the usual keys.
+
+        Raises:
+            FileNotFoundError: If either snapshot does not exist.
+        """
+        for snapshot_file in (before_file, after_file):
+            if not Path(snapshot_file).is_file():
+                raise FileNotFoundError(f"The path '{snapshot_file}' does not exist.")
+        if plan_output:
+            plan_path = Path(plan_output)
+        else:
+            timestamp = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
+            plan_path = Path(after_file).parent / f"sortium_plan_snapshot_diff_{timestamp}.json"
+
+        header = {
+            "plan_id": str(uuid4()),
+            "version": 1,
+            "strategy": "snapshot_diff",
+            "generated_at": datetime.now(timezone.utc).isoformat(),
+            "source_root": snapshot_root(after_file),
+            "destination_root": snapshot_root(before_file),
+            "metadata": {
+                "before_snapshot": str(before_file),
+                "after_snapshot": str(after_file),
+            },
+        }
+        counts = dict.fromkeys(CHANGE_TYPES, 0)
+        with open_plan_writer(plan_path, header, plan_format_for_path(plan_path)) as writer:
+            for change in diff_snapshots(before_file, after_file):
+                kind = change.pop("change")
+                counts[kind] += 1
+                before_path = change.pop("before_path", None)
+                after_path = change.pop("after_path", None)
+                if kind == "moved":
+                    entry = {"source_path": after_path, "destination_path": before_path}
+                else:
+                    path = after_path or before_path
+                    entry = {"source_path": path, "destination_path": path, "skip": True}
+                writer.write({**entry, "category": kind, **change})
+
+        logger.info(
+            "Snapshot diff: %s; plan written to '%s'.",
+            ", ".join(f"{counts[kind]} {kind}" for kind in CHANGE_TYPES),
+            plan_path,
+        )
+        return plan_path
+
+    def plan_destination_path(
+        self,
+        source_path: str,
+        dest_folder_path: str,
+        index: DestinationIndex | None = None,
+    ) -> Path:
         """Predicts the collision-safe destination path for a file move.
 
         Args:
             source_path: Current location of the file.
             dest_folder_path: Folder where the file is planned to be moved.
+            index: Optional ``DestinationIndex`` shared across a whole plan.
+                When given, the name is reserved in the index so later files
+                in the same plan cannot receive the same destination, and no
+                per-candidate ``exists()`` calls are made.
 
         Returns:
             Path of the file at the destination, including any rename that
             would be required to avoid collisions.
         """
 
-        source = Path(source_path)
-        dest_folder = Path(dest_folder_path)
-        return _generate_unique_path(dest_folder / source.name)
+        source_name = os.path.basename(source_path)
+        if self.observer is not None:
+            return self._observed_destination_path(source_name, dest_folder_path, index)
+        if index is not None:
+            return index.reserve(dest_folder_path, source_name)
+        return _generate_unique_path(Path(dest_folder_path) / source_name)
+
+    def _observed_destination_path(
+        self,
+        source_name: str,
+        dest_folder_path: str,
+        index: DestinationIndex | None,
+    ) -> Path:
+        """``plan_destination_path`` reported as a ``probe`` slice."""
+        with observe_phase(self.observer, "probe"):
+            if index is None:
+                return _generate_unique_path(Path(dest_folder_path) / source_name)
+            listings, probes = index.listings, index.probes
+            planned = index.reserve(dest_folder_path, source_name)
+            if index.listings != listings:
+                self.observer.count("dirs_listed", index.listings - listings)
+            if index.probes != probes:
+                self.observer.count("collision_probes", index.probes - probes)
+            return planned
 
     def apply_move_plan(
         self,
         plan_file: str,
         reverse: bool = False,
         dry_run: bool = False,
+        max_workers: int = 1,
+        journal_file: str | None = None,
     ) -> Dict[str, int | List[str]]:
-        """Applies or reverses a JSON move plan produced by Sorter methods.
+        """Applies or reverses a move plan produced by Sorter methods.
+
+        Version 1 JSON, streaming JSON Lines and version 2 binary plans are
+        accepted. JSON Lines and binary plans are read lazily, one entry at a
+        time, so the first move starts immediately and memory use stays
+        constant.
 
         Args:
-            plan_file: Path to the JSON plan file to execute.
+            plan_file: Path to the plan file to execute.
             reverse: If ``True``, moves files back to their ``source_path``.
             dry_run: If ``True``, validates the plan without moving files.
+            max_workers: Number of worker threads. With more than one
+                worker, every destination directory is created once up front
+                and moves are executed concurrently in batches grouped by
+                destination directory. This keeps disks and network mounts
+                busy but holds the plan's paths in memory, and requires
+                entries that do not depend on each other's moves.
+            journal_file: Optional path of a write-ahead journal. The index
+                of every completed move is appended to it (with batched
+                ``fsync`` calls), so an interrupted run can be continued with
+                :meth:`resume_move_plan` or undone with
+                :meth:`rollback_move_plan`.
 
         Returns:
             A summary dictionary containing ``entries``, ``moved`` and
@@ -341,52 +882,174 @@ class FileUtils:
 
         Raises:
             FileNotFoundError: If ``plan_file`` does not exist.
+            FileExistsError: If ``journal_file`` already records moves.
+            OperationCancelled: If the progress callback cancelled. Its
+                ``summary`` describes the moves made so far; with a journal
+                the run can be resumed or rolled back.
         """
 
-        plan_path = Path(plan_file)
-        if not plan_path.is_file():
-            raise FileNotFoundError(f"Plan file '{plan_file}' does not exist.")
+        header, entries = load_plan(plan_file)
+        if dry_run:
+            return {"entries": sum(1 for _ in entries), "moved": 0, "errors": []}
+        reporter = new_reporter(
+            self.progress, "apply", header.get("entry_count"), self.progress_interval
+        )
+        if journal_file is None:
+            with observe_phase(self.observer, "apply"):
+                return execute_plan(
+                    entries,
+                    reverse=reverse,
+                    max_workers=max_workers,
+                    observer=self.observer,
+                    progress=reporter,
+                )
 
-        with plan_path.open("r", encoding="utf-8") as plan_stream:
-            plan_payload = json.load(plan_stream)
+        journal_path = Path(journal_file)
+        if journal_path.is_file() and journal_path.stat().st_size:
+            entries.close()
+            raise FileExistsError(
+                f"Journal '{journal_file}' already exists; resume or roll it back."
+            )
+        journal_header = {
+            "plan_id": header.get("plan_id"),
+            "plan_file": os.path.abspath(plan_file),
+            "reverse": reverse,
+        }
+        with MoveJournal(journal_path, journal_header) as journal, observe_phase(
+            self.observer, "apply"
+        ):
+            return execute_plan(
+                entries,
+                reverse=reverse,
+                max_workers=max_workers,
+                journal=journal,
+                observer=self.observer,
+                progress=reporter,
+            )
 
-        entries = plan_payload.get("entries", [])
-        if dry_run:
-            return {"entries": len(entries), "moved": 0, "errors": []}
+    def _open_journaled_plan(self, plan_file: str, journal_file: str) -> Tuple[dict, List[int]]:
+        """Reads a journal and checks that it belongs to ``plan_file``."""
+        journal_header, indices = read_journal(journal_file)
+        plan_header, entries = load_plan(plan_file)
+        entries.close()
+        if journal_header.get("plan_id") != plan_header.get("plan_id"):
+            raise ValueError(
+                f"Journal '{journal_file}' was not written for plan '{plan_file}'."
+            )
+        return journal_header, indices
 
-        errors: List[str] = []
-        moved = 0
+    def resume_move_plan(
+        self, plan_file: str, journal_file: str, max_workers: int = 1
+    ) -> Dict[str, int | List[str]]:
+        """Continues a journaled plan execution that was interrupted.
 
-        source_key = "destination_path" if reverse else "source_path"
-        dest_key = "source_path" if reverse else "destination_path"
+        Execution restarts at the first entry missing from the journal;
+        binary plans seek straight to it and JSON Lines plans skip earlier
+        lines without decoding them. Later entries that the journal records
+        as done are skipped without touching the filesystem. An entry whose
+        move completed after the journal's last sync (source gone,
+        destination present) is logged and counted as ``recovered`` rather
+        than reported as an error.
 
-        for idx, entry in enumerate(entries):
-            if entry.get("skip"):
-                continue
+        Args:
+            plan_file: Path to the plan that was being applied.
+            journal_file: Journal written by :meth:`apply_move_plan`.
+            max_workers: Number of worker threads, as in
+                :meth:`apply_move_plan`.
 
-            source_val = entry.get(source_key)
-            dest_val = entry.get(dest_key)
-            if not source_val or not dest_val:
-                errors.append(
-                    f"Entry #{idx} is missing required keys '{source_key}' or '{dest_key}'."
-                )
-                continue
-
-            source = Path(source_val)
-            dest = Path(dest_val)
-            if not source.exists():
-                errors.append(f"Source path does not exist: {source}")
-                continue
-            if dest.exists():
-                errors.append(
-                    f"Destination already exists (plan stale?): {dest}"
-                )
-                continue
+        Returns:
+            A summary dictionary containing ``entries``, ``moved``,
+            ``recovered`` and ``errors`` keys.
 
-            error_msg = _move_file_to_path(str(source), str(dest))
-            if error_msg:
-                errors.append(error_msg)
-            else:
-                moved += 1
+        Raises:
+            FileNotFoundError: If the plan or the journal does not exist.
+            ValueError: If the journal belongs to a different plan.
+            OperationCancelled: If the progress callback cancelled; the run
+                can be resumed again.
+        """
+
+        journal_header, indices = self._open_journaled_plan(plan_file, journal_file)
+        completed = set(indices)
+        start = 0
+        while start in completed:
+            start += 1
+        completed = {idx for idx in completed if idx > start}
+
+        plan_header, entries = load_plan(plan_file, start=start)
+        total = plan_header.get("entry_count")
+        reporter = new_reporter(
+            self.progress,
+            "apply",
+            total - start if total is not None else None,
+            self.progress_interval,
+        )
+        with MoveJournal(journal_file, journal_header) as journal, observe_phase(
+            self.observer, "apply"
+        ):
+            return execute_plan(
+                entries,
+                reverse=bool(journal_header.get("reverse")),
+                max_workers=max_workers,
+                journal=journal,
+                start=start,
+                completed=completed,
+                observer=self.observer,
+                progress=reporter,
+            )
+
+    def rollback_move_plan(
+        self, plan_file: str, journal_file: str
+    ) -> Dict[str, int | List[str]]:
+        """Undoes exactly the moves recorded in a journal, newest first.
+
+        Moves that were undone are removed from the journal; the journal is
+        deleted once it is empty, so a partly failed rollback can simply be
+        retried.
 
-        return {"entries": len(entries), "moved": moved, "errors": errors}
+        Args:
+            plan_file: Path to the plan that was being applied.
+            journal_file: Journal written by :meth:`apply_move_plan`.
+
+        Returns:
+            A summary dictionary containing ``entries`` (moves in the
+            journal), ``moved`` (moves undone) and ``errors`` keys.
+
+        Raises:
+            FileNotFoundError: If the plan or the journal does not exist.
+            ValueError: If the journal belongs to a different plan.
+            OperationCancelled: If the progress callback cancelled. The
+                journal keeps the moves not undone yet, so the rollback can
+                be retried.
+        """
+
+        journal_header, indices = self._open_journaled_plan(plan_file, journal_file)
+        wanted = set(indices)
+        by_index: Dict[int, dict] = {}
+        if wanted:
+            start = min(wanted)
+            _, entries = load_plan(plan_file, start=start)
+            try:
+                for idx, entry in enumerate(entries, start):
+                    if idx in wanted:
+                        by_index[idx] = entry
+                        if len(by_index) == len(wanted):
+                            break
+            finally:
+                entries.close()
+
+        reporter = new_reporter(self.progress, "apply", len(indices), self.progress_interval)
+        with observe_phase(self.observer, "apply"):
+            summary, remaining = rollback_moves(
+                by_index,
+                indices,
+                reverse=bool(journal_header.get("reverse")),
+                observer=self.observer,
+                progress=reporter,
+            )
+        if remaining:
+            rewrite_journal(journal_file, journal_header, remaining)
+        else:
+            Path(journal_file).unlink()
+        if summary.get("cancelled"):
+            raise reporter.cancel(summary)
+        return summary
@@ -0,0 +1,315 @@
+"""Per-extension file counts and size distributions.
+
+:class:`ExtensionHistogram` records, for every lower-cased extension, the
+number of files, their total size, the smallest and largest size and a
+log-scale size histogram from which percentiles are estimated. Each power
+of two is split into eight buckets, so an estimated percentile is within
+about 12.5% of the true one. Histograms of different subtrees combine with
+:meth:`ExtensionHistogram.merge`, giving the same result as profiling the
+whole tree at once.
+
+:func:`profile_tree` builds a histogram in one pass. The top of the tree is
+listed breadth-first until there are enough subtrees to keep ``max_workers``
+threads busy, then each subtree is profiled on a thread pool and the
+results are merged.
+
+With ``sample`` set, every subdirectory is entered with that probability
+only, and the files of a directory reached with probability ``p`` count
+``1 / p`` times (a Horvitz-Thompson estimate). Counts and sizes are then
+unbiased estimates; their variance grows with the depth of the tree.
+"""
+
+import os
+import random
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Set, Tuple
+
+from .suffix_trie import SuffixTrie
+from .walker import _list_for_walk, _subdirs_to_visit
+
+PERCENTILES = (50, 90, 99)
+"""Percentiles reported by :meth:`ExtensionHistogram.to_dict` by default."""
+
+_SUB_BITS = 3
+_SUB_BUCKETS = 1 << _SUB_BITS
+
+
+def _bucket(size: int) -> int:
+    """Index of the log-scale bucket holding ``size``."""
+    if size < _SUB_BUCKETS:
+        return size
+    shift = size.bit_length() - _SUB_BITS - 1
+    return ((shift + 1) << _SUB_BITS) + (size >> shift) - _SUB_BUCKETS
+
+
+def _bucket_bounds(index: int) -> Tuple[int, int]:
+    """Smallest and largest size falling into bucket ``index``."""
+    if index < _SUB_BUCKETS:
+        return index, index
+    shift = (index >> _SUB_BITS) - 1
+    mantissa = (index & (_SUB_BUCKETS - 1)) + _SUB_BUCKETS
+    return mantissa << shift, ((mantissa + 1) << shift) - 1
+
+
+@dataclass
+class ExtensionStats:
+    """Counts and size distribution of the files of one extension.
+
+    Attributes:
+        file_count: Number of files (an estimate when sampling).
+        total_size: Total size in bytes (an estimate when sampling).
+        min_size: Smallest size seen, or ``None`` before the first file.
+        max_size: Largest size seen, or ``None`` before the first file.
+        buckets: Log-scale histogram, ``{bucket index: file count}``.
+    """
+
+    file_count: float = 0
+    total_size: float = 0
+    min_size: int | None = None
+    max_size: int | None = None
+    buckets: Dict[int, float] = field(default_factory=dict)
+
+    def add(self, size: int, weight: float = 1) -> None:
+        """Records one file of ``size`` bytes counting ``weight`` times."""
+        self.file_count += weight
+        self.total_size += size * weight
+        if self.min_size is None or size < self.min_size:
+            self.min_size = size
+        if self.max_size is None or size > self.max_size:
+            self.max_size = size
+        index = _bucket(size)
+        self.buckets[index] = self.buckets.get(index, 0) + weight
+
+    def merge(self, other: "ExtensionStats") -> None:
+        """Adds the files recorded in ``other``."""
+        self.file_count += other.file_count
+        self.total_size += other.total_size
+        if other.min_size is not None and (
+            self.min_size is None or other.min_size < self.min_size
+        ):
+            self.min_size = other.min_size
+        if other.max_size is not None and (
+            self.max_size is None or other.max_size > self.max_size
+        ):
+            self.max_size = other.max_size
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+
+    def percentile(self, q: float) -> int | None:
+        """Estimates the ``q``-th percentile (0-100) of the file sizes."""
+        if not self.file_count:
+            return None
+        rank = self.file_count * q / 100
+        seen = 0.0
+        for index in sorted(self.buckets):
+            count = self.buckets[index]
+            if seen + count >= rank:
+                low, high = _bucket_bounds(index)
+                estimate = low + (high - low) * (rank - seen) / count
+                return int(min(max(round(estimate), self.min_size), self.max_size))
+            seen += count
+        return self.max_size
+
+
+class ExtensionHistogram:
+    """Per-extension statistics of a tree or of a part of it.
+
+    Attributes:
+        extensions (Dict[str, ExtensionStats]): Statistics per lower-cased
+            extension; files without one are under ``""``.
+        categories (Dict[str, str]): Category of each extension under the
+            mapping the histogram was profiled with (empty if none was).
+        directories (int): Number of directories listed.
+        sampled (bool): Whether counts and sizes are estimates.
+    """
+
+    def __init__(self):
+        self.extensions: Dict[str, ExtensionStats] = {}
+        self.categories: Dict[str, str] = {}
+        self.directories = 0
+        self.sampled = False
+
+    def add(self, suffix: str, size: int, weight: float = 1) -> None:
+        """Records one file with extension ``suffix``."""
+        stats = self.extensions.get(suffix)
+        if stats is None:
+            stats = self.extensions[suffix] = ExtensionStats()
+        stats.add(size, weight)
+
+    def merge(self, other: "ExtensionHistogram") -> "ExtensionHistogram":
+        """Adds the statistics of ``other`` (e.g. another subtree) in place.
+
+        Returns:
+            This histogram.
+        """
+        for suffix, stats in other.extensions.items():
+            mine = self.extensions.get(suffix)
+            if mine is None:
+                mine = self.extensions[suffix] = ExtensionStats()
+            mine.merge(stats)
+        self.categories.update(other.categories)
+        self.directories += other.directories
+        self.sampled = self.sampled or other.sampled
+        return self
+
+    def categorize(self, category_of: Callable[[str], str]) -> None:
+        """Fills :attr:`categories` using ``category_of(extension)``."""
+        self.categories = {suffix: category_of(suffix) for suffix in self.extensions}
+
+    @property
+    def file_count(self) -> float:
+        """Number of files across all extensions."""
+        return sum(stats.file_count for stats in self.extensions.values())
+
+    @property
+    def total_size(self) -> float:
+        """Total size in bytes across all extensions."""
+        return sum(stats.total_size for stats in self.extensions.values())
+
+    def to_dict(self, percentiles: Iterable[float] = PERCENTILES) -> Dict[str, Any]:
+        """Summarizes the histogram as JSON-serializable data.
+
+        Extensions are ordered by decreasing total size. Sampled counts and
+        sizes are rounded to integers.
+
+        Args:
+            percentiles: Percentiles to report, as ``p<q>`` keys.
+        """
+        def number(value: float) -> int:
+            return int(round(value))
+
+        extensions = {}
+        for suffix, stats in sorted(
+            self.extensions.items(), key=lambda item: (-item[1].total_size, item[0])
+        ):
+            extensions[suffix] = {
+                "category": self.categories.get(suffix),
+                "file_count": number(stats.file_count),
+                "total_size": number(stats.total_size),
+                "min_size": stats.min_size,
+                "max_size": stats.max_size,
+                **{f"p{q:g}": stats.percentile(q) for q in percentiles},
+            }
+        return {
+            "file_count": number(self.file_count),
+            "total_size": number(self.total_size),
+            "directories": self.directories,
+            "sampled": self.sampled,
+            "extensions": extensions,
+        }
+
+
+def _profile_dirs(
+    frontier: List[Tuple[str, float]],
+    ignore_set: Set[str],
+    histogram: ExtensionHistogram,
+    rng: random.Random | None,
+    sample: float | None,
+    extension_of: Callable[[str], str],
+    limit: int | None = None,
+) -> None:
+    """Profiles the directories of ``frontier`` (``(path, weight)`` pairs).
+
+    Subdirectories are appended to ``frontier`` (subject to sampling) and
+    walked as well. With ``limit``, directories are taken breadth-first and
+    the walk stops once ``frontier`` holds ``limit`` directories; the rest
+    is left in ``frontier``. ``extension_of`` maps file names to the
+    histogram's extension keys.
+    """
+    visited_links: Set[Tuple[int, int]] = set()
+    add = histogram.add
+    while frontier and (limit is None or len(frontier) < limit):
+        path, weight = frontier.pop(0 if limit is not None else -1)
+        listing = _list_for_walk(path, ignore_set, True, None, False)
+        if listing is None:
+            continue
+        histogram.directories += 1
+        files, dirs = listing
+        for entry in files:
+            try:
+                size = entry.stat().st_size
+            except OSError:
+                continue
+            add(extension_of(entry.name), size, weight)
+        for subdir in _subdirs_to_visit(dirs, visited_links):
+            if rng is None:
+                frontier.append((subdir, weight))
+            elif rng.random() < sample:
+                frontier.append((subdir, weight / sample))
+
+
+def _profile_shard(
+    shard: Tuple[str, float],
+    ignore_set: Set[str],
+    sample: float | None,
+    seed: Any,
+    extension_of: Callable[[str], str],
+) -> ExtensionHistogram:
+    histogram = ExtensionHistogram()
+    # Seeding per shard keeps sampled runs reproducible whatever the
+    # completion order of the threads.
+    rng = random.Random(f"{seed}:{shard[0]}") if sample is not None else None
+    _profile_dirs([shard], ignore_set, histogram, rng, sample, extension_of)
+    return histogram
+
+
+def profile_tree(
+    root: str,
+    ignore_set: Set[str],
+    max_workers: int = 4,
+    sample: float | None = None,
+    seed: Any = 0,
+    on_shard: Callable[[ExtensionHistogram], Any] | None = None,
+    suffix_trie: SuffixTrie | None = None,
+) -> ExtensionHistogram:
+    """Builds the extension histogram of the tree below ``root``.
+
+    Args:
+        root: Directory to profile.
+        ignore_set: File and directory names to skip at every level.
+        max_workers: Number of threads profiling subtrees.
+        sample: Probability of entering each subdirectory, in ``(0, 1]``.
+            ``None`` visits every directory.
+        seed: Seed of the sampling decisions.
+        on_shard: Called from the calling thread with each subtree's
+            histogram once it is done (e.g. to report progress).
+        suffix_trie: Matcher giving each file its extension, e.g. a
+            ``Sorter``'s ``suffix_trie`` so compound extensions such as
+            ``.tar.gz`` are keyed as the sorters see them. Defaults to the
+            last suffix only.
+
+    Raises:
+        ValueError: If ``sample`` is not in ``(0, 1]``.
+    """
+    if sample is not None and not 0 < sample <= 1:
+        raise ValueError(f"sample must be in (0, 1], got {sample}.")
+    histogram = ExtensionHistogram()
+    histogram.sampled = sample is not None and sample < 1
+    rng = random.Random(f"{seed}:{os.fspath(root)}") if sample is not None else None
+    extension_of = (suffix_trie or SuffixTrie(())).match
+    frontier: List[Tuple[str, float]] = [(os.fspath(root), 1.0)]
+    _profile_dirs(
+        frontier, ignore_set, histogram, rng, sample, extension_of, limit=4 * max_workers
+    )
+    if on_shard is not None:
+        on_shard(histogram)
+    if not frontier:
+        return histogram
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = [
+            pool.submit(_profile_shard, item, ignore_set, sample, seed, extension_of)
+            for item in frontier
+        ]
+        try:
+            for future in futures:
+                shard = future.result()
+                if on_shard is not None:
+                    on_shard(shard)
+                histogram.merge(shard)
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+    return histogram
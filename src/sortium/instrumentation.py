@@ -0,0 +1,193 @@
+"""Per-phase timing and counters for planning and applying moves.
+
+``FileUtils`` and ``Sorter`` accept an ``observer``. When none is given (the
+default), the instrumented code paths are not taken at all; with an
+observer, the work is reported as a sequence of phase slices plus counters:
+
+Phases
+    ``plan`` (a whole ``sort_*`` call, inclusive of the phases below),
+    ``scan`` (listing directories and producing files), ``probe``
+    (collision-safe destination naming), ``serialize`` (writing plan
+    entries) and ``apply`` (executing a plan).
+
+Counters
+    ``files_scanned``, ``dirs_listed``, ``stat_calls``,
+    ``collision_probes``, ``bytes_moved`` and ``errors``.
+
+Plans are built as a stream, so ``scan``, ``probe`` and ``serialize`` are
+interleaved: each phase is started and finished once per slice of work
+(for example once per file), and the time between them is the time spent in
+that slice. Anything inside ``plan`` that is not covered by those phases is
+classification.
+
+:class:`Observer` defines the hooks and does nothing; subclass it to
+forward timings elsewhere. :class:`PhaseRecorder` totals them and can
+capture a ``cProfile`` profile per phase.
+"""
+
+import cProfile
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List
+
+from .walker import FileEntry
+
+PHASES = ("plan", "scan", "probe", "serialize", "apply")
+"""Phases reported to observers."""
+
+COUNTERS = (
+    "files_scanned",
+    "dirs_listed",
+    "stat_calls",
+    "collision_probes",
+    "bytes_moved",
+    "errors",
+)
+"""Counters reported to observers."""
+
+
+class Observer:
+    """Receives phase timings and counters; every hook is a no-op.
+
+    Phase hooks are called from the thread driving the operation, and phases
+    nest only inside ``plan``. :meth:`count` may also be called from worker
+    threads (parallel scans, concurrent moves) and must be thread-safe.
+    """
+
+    def phase_started(self, phase: str) -> None:
+        """Called when a slice of ``phase`` begins."""
+
+    def phase_finished(self, phase: str, elapsed: float) -> None:
+        """Called when a slice of ``phase`` ends, ``elapsed`` seconds later."""
+
+    def count(self, counter: str, amount: int = 1) -> None:
+        """Adds ``amount`` to ``counter``."""
+
+
+class PhaseRecorder(Observer):
+    """Observer totalling phase time and counters, optionally profiling.
+
+    Attributes:
+        phases (Dict[str, Dict[str, float]]): Per phase, the number of
+            ``slices`` and the total ``seconds``.
+        counters (Dict[str, int]): Counter totals.
+        profile_dir (Path | None): Directory receiving one ``<phase>.prof``
+            file per phase from :meth:`write_profiles`.
+    """
+
+    def __init__(self, profile_dir: str | Path | None = None):
+        """Initializes an empty recorder.
+
+        Args:
+            profile_dir: When given, every phase slice runs under a
+                ``cProfile`` profiler of its own phase (the enclosing phase's
+                profiler is paused meanwhile), and :meth:`write_profiles`
+                saves them as ``<phase>.prof`` files loadable with
+                :mod:`pstats`. Only the thread driving the operation is
+                profiled. Profiling slows the run considerably.
+        """
+        self.phases: Dict[str, Dict[str, float]] = {}
+        self.counters: Dict[str, int] = dict.fromkeys(COUNTERS, 0)
+        self.profile_dir = Path(profile_dir) if profile_dir is not None else None
+        self._profiles: Dict[str, cProfile.Profile] = {}
+        self._active: List[cProfile.Profile] = []
+        self._lock = threading.Lock()
+
+    def phase_started(self, phase: str) -> None:
+        if self.profile_dir is None:
+            return
+        if self._active:
+            self._active[-1].disable()
+        profile = self._profiles.get(phase)
+        if profile is None:
+            profile = self._profiles[phase] = cProfile.Profile()
+        self._active.append(profile)
+        profile.enable()
+
+    def phase_finished(self, phase: str, elapsed: float) -> None:
+        if self.profile_dir is not None and self._active:
+            self._active.pop().disable()
+            if self._active:
+                self._active[-1].enable()
+        totals = self.phases.get(phase)
+        if totals is None:
+            totals = self.phases[phase] = {"slices": 0, "seconds": 0.0}
+        totals["slices"] += 1
+        totals["seconds"] += elapsed
+
+    def count(self, counter: str, amount: int = 1) -> None:
+        with self._lock:
+            self.counters[counter] = self.counters.get(counter, 0) + amount
+
+    def report(self) -> Dict[str, Dict]:
+        """Returns the totals as ``{"phases": ..., "counters": ...}``."""
+        return {
+            "phases": {phase: dict(totals) for phase, totals in self.phases.items()},
+            "counters": dict(self.counters),
+        }
+
+    def write_profiles(self) -> List[Path]:
+        """Saves the captured profiles.
+
+        Returns:
+            Paths of the written ``<phase>.prof`` files (empty when profiling
+            is disabled).
+        """
+        if self.profile_dir is None:
+            return []
+        self.profile_dir.mkdir(parents=True, exist_ok=True)
+        written = []
+        for phase, profile in self._profiles.items():
+            path = self.profile_dir / f"{phase}.prof"
+            profile.dump_stats(str(path))
+            written.append(path)
+        return written
+
+
+@contextmanager
+def observe_phase(observer: Observer | None, phase: str) -> Iterator[None]:
+    """Reports the enclosed block as one slice of ``phase``."""
+    if observer is None:
+        yield
+        return
+    observer.phase_started(phase)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observer.phase_finished(phase, time.perf_counter() - start)
+
+
+class _ObservedFileEntry(FileEntry):
+    """``FileEntry`` reporting the ``stat`` calls its cache cannot serve."""
+
+    __slots__ = ("_observer",)
+
+    def __init__(self, path: str, name: str, entry: os.DirEntry, observer: Observer):
+        super().__init__(path, name, entry)
+        self._observer = observer
+
+    def stat(self) -> os.stat_result:
+        if self._stat is None:
+            self._observer.count("stat_calls")
+        return super().stat()
+
+
+def observe_scan(files: Iterable[FileEntry], observer: Observer) -> Iterator[FileEntry]:
+    """Reports producing each file of ``files`` as a ``scan`` slice."""
+    iterator = iter(files)
+    clock = time.perf_counter
+    while True:
+        observer.phase_started("scan")
+        start = clock()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            observer.phase_finished("scan", clock() - start)
+            return
+        observer.phase_finished("scan", clock() - start)
+        observer.count("files_scanned")
+        yield item
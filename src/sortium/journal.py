@@ -0,0 +1,165 @@
+"""Write-ahead journal for crash-safe plan execution.
+
+A journal is a small text file next to (or anywhere away from) a plan. The
+first line is a JSON header identifying the plan and the direction it is
+being applied in; every following line is the index of a plan entry whose
+move has completed. Lines are appended as moves finish and flushed to disk
+with batched ``fsync`` calls, so after a crash the journal lists (almost)
+exactly the moves that happened. A torn final line is ignored on read.
+"""
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, IO, List, Tuple
+
+JOURNAL_VERSION = 1
+
+
+class MoveJournal:
+    """Append-only log of completed plan entry indices.
+
+    Thread-safe: the concurrent executor records completions from several
+    workers.
+
+    Attributes:
+        path (Path): Location of the journal file.
+        header (Dict[str, Any]): Journal header (plan id, direction, ...).
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        header: Dict[str, Any],
+        sync_every: int = 1000,
+        sync_interval: float = 1.0,
+    ):
+        """Opens a journal for appending, creating it if necessary.
+
+        Args:
+            path: Journal file location.
+            header: Header written when the journal is created. Ignored for
+                existing journals, whose own header is kept.
+            sync_every: ``fsync`` after this many recorded entries.
+            sync_interval: ``fsync`` when this many seconds have passed since
+                the last sync, even if ``sync_every`` was not reached.
+        """
+        self.path = Path(path)
+        self._sync_every = max(1, sync_every)
+        self._sync_interval = sync_interval
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._last_sync = time.monotonic()
+
+        if self.path.is_file() and self.path.stat().st_size:
+            self.header, _ = read_journal(self.path)
+            self._stream: IO[str] | None = self.path.open("a", encoding="utf-8")
+            self._truncate_torn_line()
+        else:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.header = {"journal_version": JOURNAL_VERSION, **header}
+            self._stream = self.path.open("w", encoding="utf-8")
+            self._stream.write(json.dumps(self.header) + "\n")
+            self._sync()
+
+    def _truncate_torn_line(self) -> None:
+        """Drops a partially written last line left behind by a crash."""
+        with self.path.open("rb") as stream:
+            data = stream.read()
+        keep = data.rfind(b"\n") + 1
+        if keep != len(data):
+            self._stream.close()
+            os.truncate(self.path, keep)
+            self._stream = self.path.open("a", encoding="utf-8")
+
+    def _sync(self) -> None:
+        self._stream.flush()
+        os.fsync(self._stream.fileno())
+        self._pending = 0
+        self._last_sync = time.monotonic()
+
+    def record(self, idx: int) -> None:
+        """Logs entry ``idx`` as completed.
+
+        Args:
+            idx: Index of the plan entry whose move finished.
+        """
+        with self._lock:
+            self._stream.write(f"{idx}\n")
+            self._pending += 1
+            if (
+                self._pending >= self._sync_every
+                or time.monotonic() - self._last_sync >= self._sync_interval
+            ):
+                self._sync()
+
+    def close(self) -> None:
+        """Flushes outstanding records to disk and closes the journal."""
+        with self._lock:
+            if self._stream is None:
+                return
+            self._sync()
+            self._stream.close()
+            self._stream = None
+
+    def __enter__(self) -> "MoveJournal":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+def read_journal(journal_file: str | Path) -> Tuple[Dict[str, Any], List[int]]:
+    """Reads a journal.
+
+    Args:
+        journal_file: Path to the journal.
+
+    Returns:
+        A ``(header, indices)`` tuple; ``indices`` lists completed entry
+        indices in the order they were logged.
+
+    Raises:
+        FileNotFoundError: If the journal does not exist.
+        ValueError: If the file is not a Sortium journal.
+    """
+    journal_path = Path(journal_file)
+    if not journal_path.is_file():
+        raise FileNotFoundError(f"Journal file '{journal_file}' does not exist.")
+
+    with journal_path.open("r", encoding="utf-8") as stream:
+        try:
+            header = json.loads(stream.readline())
+        except json.JSONDecodeError:
+            header = None
+        if not isinstance(header, dict) or "journal_version" not in header:
+            raise ValueError(f"'{journal_file}' is not a Sortium journal.")
+
+        indices: List[int] = []
+        for line in stream:
+            if not line.endswith("\n"):
+                break  # torn write at crash time
+            line = line.strip()
+            if line:
+                indices.append(int(line))
+    return header, indices
+
+
+def rewrite_journal(journal_file: str | Path, header: Dict[str, Any], indices: List[int]) -> None:
+    """Atomically replaces a journal's contents.
+
+    Args:
+        journal_file: Path to the journal.
+        header: Header to keep.
+        indices: Completed indices to keep, in log order.
+    """
+    journal_path = Path(journal_file)
+    temp_path = journal_path.with_name(journal_path.name + ".tmp")
+    with temp_path.open("w", encoding="utf-8") as stream:
+        stream.write(json.dumps(header) + "\n")
+        stream.writelines(f"{idx}\n" for idx in indices)
+        stream.flush()
+        os.fsync(stream.fileno())
+    os.replace(temp_path, journal_path)
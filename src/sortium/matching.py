@@ -0,0 +1,225 @@
+"""Rule-based file name routing for ``Sorter.sort_by_regex``.
+
+A :class:`RegexRouter` compiles an ordered ``{category: pattern}`` table once
+into a single alternation of named groups, so each file name is classified
+with one regex call instead of one call per rule. First-match-wins
+semantics are preserved for every match mode:
+
+* ``match`` and ``fullmatch`` alternatives are tried left to right at the
+  start of the name, exactly like calling the rules one after another.
+* ``search`` wraps each rule as ``^(?s:.*?)(?:pattern)``, so every offset
+  is tried for a rule before the next rule is considered.
+
+Rules that cannot be combined safely (numbered or named backreferences,
+conditionals, global inline flags, duplicate group names) make the router
+fall back to trying the individually compiled rules in order.
+
+Before any regex runs, a literal prefilter rejects names that cannot match
+any rule: when every rule starts with a literal prefix or ends with an
+anchored literal suffix, a name must ``startswith`` or ``endswith`` one of
+those literals.
+"""
+
+import re
+from typing import Callable, Dict, List, Tuple
+
+MATCH_MODES = ("match", "search", "fullmatch")
+"""Supported ways of applying a rule to a file name."""
+
+# Backreferences, conditionals and global inline flags such as ``(?i)``:
+# inside a combined alternation a global flag would apply to every rule
+# (Python 3.10 only warns; later versions reject it).
+_UNSAFE_TO_COMBINE = re.compile(r"\\[1-9]|\(\?P=|\(\?\(|\(\?[aiLmsux]+\)")
+_LITERAL_PUNCTUATION = frozenset(" _-,;:'\"!@#%&=~`<>/")
+
+
+def _has_top_level_alternation(pattern: str) -> bool:
+    """Tells whether ``pattern`` contains a ``|`` outside any group."""
+    depth = 0
+    in_class = False
+    idx = 0
+    while idx < len(pattern):
+        char = pattern[idx]
+        if char == "\\":
+            idx += 2
+            continue
+        if in_class:
+            in_class = char != "]"
+        elif char == "[":
+            in_class = True
+            if pattern[idx + 1 : idx + 2] == "]":
+                idx += 1  # a leading ']' is a literal member
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == "|" and depth == 0:
+            return True
+        idx += 1
+    return False
+
+
+def _literal_prefix(pattern: str) -> str:
+    """Returns a literal every match must start with ('' if unknown)."""
+    idx = 1 if pattern.startswith("^") else 0
+    chars: List[str] = []
+    while idx < len(pattern):
+        char = pattern[idx]
+        if char == "\\":
+            if idx + 1 >= len(pattern) or pattern[idx + 1].isalnum():
+                break
+            chars.append(pattern[idx + 1])
+            idx += 2
+        elif char.isalnum() or char in _LITERAL_PUNCTUATION:
+            chars.append(char)
+            idx += 1
+        else:
+            break
+    if idx < len(pattern) and pattern[idx] in "*?{" and chars:
+        chars.pop()  # the last literal may occur zero times
+    return "".join(chars)
+
+
+def _literal_suffix(pattern: str) -> str:
+    """Returns a literal every match must end with ('' if unknown).
+
+    ``pattern`` must already have its end anchor removed.
+    """
+    idx = len(pattern) - 1
+    chars: List[str] = []
+    while idx >= 0:
+        char = pattern[idx]
+        backslashes = 0
+        while idx - backslashes - 1 >= 0 and pattern[idx - backslashes - 1] == "\\":
+            backslashes += 1
+        escaped = backslashes % 2 == 1
+        if escaped:
+            if char.isalnum():
+                break  # a class escape such as \d
+            chars.append(char)
+            idx -= 2
+        elif char.isalnum() or char in _LITERAL_PUNCTUATION:
+            chars.append(char)
+            idx -= 1
+        else:
+            break
+    return "".join(reversed(chars))
+
+
+def _end_anchored(pattern: str) -> str | None:
+    """Strips an unescaped trailing ``$`` or ``\\Z``; ``None`` if absent."""
+    if pattern.endswith("\\Z"):
+        body = pattern[:-2]
+    elif pattern.endswith("$"):
+        body = pattern[:-1]
+    else:
+        return None
+    trailing = len(body) - len(body.rstrip("\\"))
+    return None if trailing % 2 else body
+
+
+class RegexRouter:
+    """Classifies file names against an ordered table of regex rules.
+
+    Attributes:
+        rules (List[Tuple[str, str]]): ``(category, pattern)`` pairs in
+            priority order.
+        match_mode (str): One of :data:`MATCH_MODES`.
+        combined (bool): Whether the rules were compiled into a single
+            alternation (``False`` when falling back to per-rule matching).
+    """
+
+    def __init__(self, rules: Dict[str, str], match_mode: str = "match"):
+        """Compiles the rule table.
+
+        Args:
+            rules: Mapping of category names to patterns; earlier entries
+                take priority.
+            match_mode: ``"match"`` (anchored at the start, the historical
+                behaviour), ``"search"`` (anywhere in the name) or
+                ``"fullmatch"`` (the whole name).
+
+        Raises:
+            ValueError: If ``match_mode`` is not supported.
+            re.error: If a pattern is invalid.
+        """
+        if match_mode not in MATCH_MODES:
+            raise ValueError(
+                f"Unsupported match mode '{match_mode}'. "
+                f"Expected one of: {', '.join(MATCH_MODES)}."
+            )
+        self.rules: List[Tuple[str, str]] = list(rules.items())
+        self.match_mode = match_mode
+        self._compiled = [re.compile(pattern) for _, pattern in self.rules]
+        self._group_rules: Dict[str, int] = {}
+        self._combined_call = self._compile_combined()
+        self.combined = self._combined_call is not None
+        self._prefixes, self._suffixes, self._prefilter = self._build_prefilter()
+
+    def _compile_combined(self) -> Callable | None:
+        if not self.rules:
+            return None
+        if any(_UNSAFE_TO_COMBINE.search(pattern) for _, pattern in self.rules):
+            return None
+        alternatives = []
+        for idx, (_, pattern) in enumerate(self.rules):
+            group = f"_sortium_rule_{idx}"
+            self._group_rules[group] = idx
+            if self.match_mode == "search":
+                alternatives.append(f"(?P<{group}>(?s:.*?)(?:{pattern}))")
+            else:
+                alternatives.append(f"(?P<{group}>{pattern})")
+        try:
+            combined = re.compile("|".join(alternatives))
+        except re.error:
+            self._group_rules.clear()
+            return None
+        return combined.fullmatch if self.match_mode == "fullmatch" else combined.match
+
+    def _build_prefilter(self) -> Tuple[Tuple[str, ...], Tuple[str, ...], bool]:
+        """Collects, per rule, a literal that every match must contain."""
+        prefixes: List[str] = []
+        suffixes: List[str] = []
+        for (_, pattern), compiled in zip(self.rules, self._compiled):
+            if compiled.flags & (re.IGNORECASE | re.VERBOSE) or _has_top_level_alternation(
+                pattern
+            ):
+                return (), (), False
+            anchored_start = self.match_mode != "search" or pattern.startswith("^")
+            prefix = _literal_prefix(pattern) if anchored_start else ""
+            if prefix:
+                prefixes.append(prefix)
+                continue
+            body = _end_anchored(pattern)
+            if body is None and self.match_mode == "fullmatch":
+                body = pattern
+            suffix = _literal_suffix(body) if body is not None else ""
+            if not suffix:
+                return (), (), False
+            suffixes.append(suffix)
+            if body is not pattern:
+                suffixes.append(suffix + "\n")  # '$' also matches before a newline
+        return tuple(prefixes), tuple(suffixes), bool(self.rules)
+
+    def route(self, name: str) -> Tuple[str, str] | None:
+        """Finds the first rule matching ``name``.
+
+        Args:
+            name: File name to classify.
+
+        Returns:
+            ``(category, pattern)`` of the winning rule, or ``None``.
+        """
+        if self._prefilter and not (
+            name.startswith(self._prefixes) or name.endswith(self._suffixes)
+        ):
+            return None
+        if self._combined_call is not None:
+            found = self._combined_call(name)
+            if found is None:
+                return None
+            return self.rules[self._group_rules[found.lastgroup]]
+        for rule, compiled in zip(self.rules, self._compiled):
+            if getattr(compiled, self.match_mode)(name):
+                return rule
+        return None
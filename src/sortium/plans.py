@@ -0,0 +1,712 @@
+"""Reading and writing of Sortium move plans.
+
+Three on-disk formats are supported:
+
+``json`` (version 1)
+    A single JSON document with the plan metadata and an ``entries`` list.
+    It is written incrementally, one entry at a time, and loaded in one go
+    when read back.
+
+``jsonl`` (version 1, JSON Lines)
+    A header line holding the plan metadata, one line per entry and a final
+    footer line with the entry count. Both writing and reading are streaming,
+    so planning and applying multi-million entry plans use constant memory.
+
+``binary`` (version 2)
+    A compact, memory-mappable file. Directory prefixes and category names
+    are interned in lookup tables, file names live in a string heap and each
+    entry is a fixed-width record, so any entry can be read in O(1) without
+    parsing the rest of the plan. Only ``source_path``, ``destination_path``,
+    ``category`` and ``skip`` are stored per entry; other per-entry
+    annotations are dropped.
+"""
+
+import json
+import mmap
+import os
+import struct
+import tempfile
+from collections import Counter
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, IO, Iterator, List, Tuple
+
+PLAN_FORMATS = ("json", "jsonl", "binary")
+"""Plan serialization formats understood by :func:`open_plan_writer`."""
+
+PLAN_SUFFIXES: Dict[str, str] = {"json": ".json", "jsonl": ".jsonl", "binary": ".splan"}
+"""Default file suffix for each plan format."""
+
+BINARY_PLAN_MAGIC = b"SRTMPLAN"
+"""Leading bytes identifying a version 2 binary plan."""
+
+# magic, version, flags, record size, then entry count and the offsets and
+# sizes of the metadata, record, heap, prefix-table and category-table blocks.
+_BIN_HEADER = struct.Struct("<8sHHI10Q")
+# Source prefix id, destination prefix id, source name heap offset and length,
+# destination name heap offset and length, category id and flags.
+_BIN_RECORD = struct.Struct("<IIQIQIIH")
+# Heap offset and length of an interned string.
+_BIN_TABLE_ITEM = struct.Struct("<QI")
+_BIN_NO_CATEGORY = 0xFFFFFFFF
+_BIN_FLAG_SKIP = 0x1
+
+_JSONL_FORMAT_TAG = "jsonl"
+_JSONL_FOOTER_KEY = "end_of_plan"
+
+
+def plan_format_for_path(plan_path: str | Path, default: str = "json") -> str:
+    """Infers the plan format from a file suffix.
+
+    Args:
+        plan_path: Path of the plan file.
+        default: Format used when the suffix is not recognized.
+
+    Returns:
+        One of :data:`PLAN_FORMATS`.
+    """
+    suffix = Path(plan_path).suffix.lower()
+    for plan_format, plan_suffix in PLAN_SUFFIXES.items():
+        if suffix == plan_suffix:
+            return plan_format
+    return default
+
+
+def _indent_block(text: str, indent: str) -> str:
+    """Indents every line after the first of a pretty-printed JSON value."""
+    return text.replace("\n", "\n" + indent)
+
+
+class PlanWriter:
+    """Writes a text (``json`` or ``jsonl``) move plan entry by entry.
+
+    The header (everything except the entries and their count) is written
+    when the writer is opened; each call to :meth:`write` appends a single
+    entry, and :meth:`close` finalizes the file. The writer can be used as a
+    context manager.
+
+    Attributes:
+        path (Path): Location of the plan file.
+        plan_format (str): Either ``"json"`` or ``"jsonl"``.
+        entry_count (int): Number of entries written so far.
+    """
+
+    def __init__(self, path: str | Path, header: Dict[str, Any], plan_format: str):
+        """Opens ``path`` and writes the plan header.
+
+        Args:
+            path: Destination file. Parent directories are created.
+            header: Plan metadata (``plan_id``, ``strategy``, ...). Must not
+                contain ``entries`` or ``entry_count``.
+            plan_format: Either ``"json"`` or ``"jsonl"``.
+
+        Raises:
+            ValueError: If ``plan_format`` is not a text format.
+        """
+        if plan_format not in ("json", "jsonl"):
+            raise ValueError(
+                f"Unsupported text plan format '{plan_format}'. "
+                "Expected 'json' or 'jsonl'."
+            )
+        self.path = Path(path)
+        self.plan_format = plan_format
+        self.entry_count = 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._stream: IO[str] | None = self.path.open("w", encoding="utf-8")
+        self._write_header(header)
+
+    def _write_header(self, header: Dict[str, Any]) -> None:
+        if self.plan_format == "jsonl":
+            line = {"format": _JSONL_FORMAT_TAG, **header}
+            self._stream.write(json.dumps(line) + "\n")
+            return
+
+        self._stream.write("{\n")
+        for key, value in header.items():
+            rendered = _indent_block(json.dumps(value, indent=2), "  ")
+            self._stream.write(f"  {json.dumps(key)}: {rendered},\n")
+        self._stream.write('  "entries": [')
+
+    def write(self, entry: Dict[str, Any]) -> None:
+        """Appends one entry to the plan.
+
+        Args:
+            entry: The plan entry (``source_path``, ``destination_path``, ...).
+        """
+        if self.plan_format == "jsonl":
+            self._stream.write(json.dumps(entry) + "\n")
+        else:
+            separator = "\n" if self.entry_count == 0 else ",\n"
+            rendered = _indent_block(json.dumps(entry, indent=2), "    ")
+            self._stream.write(f"{separator}    {rendered}")
+        self.entry_count += 1
+
+    def close(self) -> None:
+        """Writes the trailing entry count and closes the file."""
+        if self._stream is None:
+            return
+        if self.plan_format == "jsonl":
+            footer = {_JSONL_FOOTER_KEY: True, "entry_count": self.entry_count}
+            self._stream.write(json.dumps(footer) + "\n")
+        else:
+            closing = "\n  ]" if self.entry_count else "]"
+            self._stream.write(f'{closing},\n  "entry_count": {self.entry_count}\n}}\n')
+        self._stream.close()
+        self._stream = None
+
+    def __enter__(self) -> "PlanWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is not None and self._stream is not None:
+            # Leave the plan visibly incomplete rather than finalizing it.
+            self._stream.close()
+            self._stream = None
+            return
+        self.close()
+
+
+class PlanLog:
+    """Append-only JSON Lines plan for long-running producers.
+
+    Unlike :class:`PlanWriter`, no footer is ever written: the log stays a
+    valid ``jsonl`` plan after every :meth:`append`, can be reopened and
+    extended across runs, and can be applied or reversed at any time with
+    ``FileUtils.apply_move_plan``.
+
+    Attributes:
+        path (Path): Location of the log.
+        header (Dict[str, Any]): Header of the log (from disk when reopened).
+    """
+
+    def __init__(self, path: str | Path, header: Dict[str, Any]):
+        """Opens ``path`` for appending, writing ``header`` if it is new.
+
+        Args:
+            path: Log location. Parent directories are created.
+            header: Plan metadata used when the log is created.
+
+        Raises:
+            ValueError: If ``path`` exists but is not a JSON Lines plan log.
+        """
+        self.path = Path(path)
+        if self.path.is_file() and self.path.stat().st_size:
+            with self.path.open("r", encoding="utf-8") as stream:
+                try:
+                    existing = json.loads(stream.readline())
+                except json.JSONDecodeError:
+                    existing = None
+            if not isinstance(existing, dict) or existing.get("format") != _JSONL_FORMAT_TAG:
+                raise ValueError(f"'{path}' is not a JSON Lines plan log.")
+            self.header = existing
+            self._stream: IO[str] | None = self.path.open("a", encoding="utf-8")
+        else:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.header = {"format": _JSONL_FORMAT_TAG, **header}
+            self._stream = self.path.open("w", encoding="utf-8")
+            self._stream.write(json.dumps(self.header) + "\n")
+            self._stream.flush()
+
+    def append(self, entries: List[Dict[str, Any]]) -> None:
+        """Appends a batch of entries and flushes them to the file.
+
+        Args:
+            entries: Plan entries to record.
+        """
+        self._stream.writelines(json.dumps(entry) + "\n" for entry in entries)
+        self._stream.flush()
+
+    def close(self) -> None:
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+
+    def __enter__(self) -> "PlanLog":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+def _split_path(path: str) -> Tuple[str, str]:
+    """Splits ``path`` into a prefix ending in a separator and a file name."""
+    cut = path.rfind(os.sep)
+    if os.altsep:
+        cut = max(cut, path.rfind(os.altsep))
+    return path[: cut + 1], path[cut + 1 :]
+
+
+class BinaryPlanWriter:
+    """Writes a version 2 binary move plan entry by entry.
+
+    Records are streamed straight into the plan file and file names into a
+    temporary heap file next to it; the interned prefix and category tables
+    are appended and the header is patched in when the writer is closed.
+    Memory use is proportional to the number of distinct directories, not to
+    the number of entries. The writer exposes the same interface as
+    :class:`PlanWriter`.
+
+    Attributes:
+        path (Path): Location of the plan file.
+        plan_format (str): Always ``"binary"``.
+        entry_count (int): Number of entries written so far.
+    """
+
+    plan_format = "binary"
+
+    def __init__(self, path: str | Path, header: Dict[str, Any]):
+        """Opens ``path`` and writes the plan metadata.
+
+        Args:
+            path: Destination file. Parent directories are created.
+            header: Plan metadata (``plan_id``, ``strategy``, ...). Stored as
+                JSON; its ``version`` is set to ``2``.
+        """
+        self.path = Path(path)
+        self.entry_count = 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._stream: BinaryIO | None = self.path.open("wb")
+        self._heap: BinaryIO = tempfile.TemporaryFile(dir=self.path.parent)
+        self._heap_size = 0
+        self._prefixes: Dict[str, int] = {}
+        self._categories: Dict[str, int] = {}
+
+        meta = json.dumps({**header, "version": 2}).encode("utf-8")
+        self._meta_offset = _BIN_HEADER.size
+        self._meta_length = len(meta)
+        self._stream.write(b"\0" * _BIN_HEADER.size)
+        self._stream.write(meta)
+        self._records_offset = self._meta_offset + self._meta_length
+
+    def _add_string(self, value: str) -> Tuple[int, int]:
+        data = value.encode("utf-8", "surrogateescape")
+        offset = self._heap_size
+        self._heap.write(data)
+        self._heap_size += len(data)
+        return offset, len(data)
+
+    @staticmethod
+    def _intern(table: Dict[str, int], value: str) -> int:
+        key = table.get(value)
+        if key is None:
+            key = table[value] = len(table)
+        return key
+
+    def write(self, entry: Dict[str, Any]) -> None:
+        """Appends one entry to the plan.
+
+        Args:
+            entry: The plan entry (``source_path``, ``destination_path``, ...).
+        """
+        src_prefix, src_name = _split_path(entry.get("source_path") or "")
+        dst_prefix, dst_name = _split_path(entry.get("destination_path") or "")
+
+        src_offset, src_length = self._add_string(src_name)
+        if dst_name == src_name:
+            dst_offset, dst_length = src_offset, src_length
+        else:
+            dst_offset, dst_length = self._add_string(dst_name)
+
+        category = entry.get("category")
+        category_id = (
+            _BIN_NO_CATEGORY
+            if category is None
+            else self._intern(self._categories, str(category))
+        )
+        flags = _BIN_FLAG_SKIP if entry.get("skip") else 0
+
+        self._stream.write(
+            _BIN_RECORD.pack(
+                self._intern(self._prefixes, src_prefix),
+                self._intern(self._prefixes, dst_prefix),
+                src_offset,
+                src_length,
+                dst_offset,
+                dst_length,
+                category_id,
+                flags,
+            )
+        )
+        self.entry_count += 1
+
+    def _write_table(self, table: Dict[str, int]) -> bytes:
+        items = bytearray()
+        for value in table:  # dicts keep insertion (= id) order
+            items += _BIN_TABLE_ITEM.pack(*self._add_string(value))
+        return bytes(items)
+
+    def close(self) -> None:
+        """Appends the heap and lookup tables and finalizes the header."""
+        if self._stream is None:
+            return
+        prefix_table = self._write_table(self._prefixes)
+        category_table = self._write_table(self._categories)
+
+        heap_offset = self._records_offset + self.entry_count * _BIN_RECORD.size
+        self._heap.seek(0)
+        while True:
+            chunk = self._heap.read(1 << 20)
+            if not chunk:
+                break
+            self._stream.write(chunk)
+        self._heap.close()
+
+        prefix_offset = heap_offset + self._heap_size
+        category_offset = prefix_offset + len(prefix_table)
+        self._stream.write(prefix_table)
+        self._stream.write(category_table)
+
+        self._stream.seek(0)
+        self._stream.write(
+            _BIN_HEADER.pack(
+                BINARY_PLAN_MAGIC,
+                2,
+                0,
+                _BIN_RECORD.size,
+                self.entry_count,
+                self._meta_offset,
+                self._meta_length,
+                self._records_offset,
+                heap_offset,
+                self._heap_size,
+                prefix_offset,
+                len(self._prefixes),
+                category_offset,
+                len(self._categories),
+            )
+        )
+        self._stream.close()
+        self._stream = None
+
+    def __enter__(self) -> "BinaryPlanWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is not None and self._stream is not None:
+            # The header is never patched in, so the file stays unreadable.
+            self._heap.close()
+            self._stream.close()
+            self._stream = None
+            return
+        self.close()
+
+
+class BinaryPlan:
+    """Memory-mapped, random-access reader for version 2 binary plans.
+
+    Entries are decoded on demand, so opening a plan is instant regardless of
+    its size and any entry can be read by index. Use as a context manager or
+    call :meth:`close` when done.
+
+    Attributes:
+        path (Path): Location of the plan file.
+        header (Dict[str, Any]): Plan metadata.
+    """
+
+    def __init__(self, path: str | Path):
+        """Maps the plan file into memory.
+
+        Args:
+            path: Path to a binary plan.
+
+        Raises:
+            ValueError: If the file is not a version 2 binary plan.
+        """
+        self.path = Path(path)
+        with self.path.open("rb") as stream:
+            size = os.fstat(stream.fileno()).st_size
+            if size < _BIN_HEADER.size:
+                raise ValueError(f"Plan file '{path}' is not a binary plan.")
+            self._mm = mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+
+        (
+            magic,
+            version,
+            _flags,
+            record_size,
+            self._count,
+            meta_offset,
+            meta_length,
+            self._records_offset,
+            self._heap_offset,
+            _heap_length,
+            prefix_offset,
+            prefix_count,
+            category_offset,
+            category_count,
+        ) = _BIN_HEADER.unpack_from(self._mm, 0)
+        if magic != BINARY_PLAN_MAGIC or version != 2 or record_size != _BIN_RECORD.size:
+            self._mm.close()
+            raise ValueError(f"Plan file '{path}' is not a version 2 binary plan.")
+
+        self.header: Dict[str, Any] = json.loads(
+            self._mm[meta_offset : meta_offset + meta_length].decode("utf-8")
+        )
+        self._prefixes = self._read_table(prefix_offset, prefix_count)
+        self._categories = self._read_table(category_offset, category_count)
+
+    def _string(self, offset: int, length: int) -> str:
+        start = self._heap_offset + offset
+        return self._mm[start : start + length].decode("utf-8", "surrogateescape")
+
+    def _read_table(self, offset: int, count: int) -> List[str]:
+        return [
+            self._string(*_BIN_TABLE_ITEM.unpack_from(self._mm, offset + i * _BIN_TABLE_ITEM.size))
+            for i in range(count)
+        ]
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, idx: int) -> Dict[str, Any]:
+        """Decodes the entry at position ``idx`` (negative indices allowed)."""
+        if idx < 0:
+            idx += self._count
+        if not 0 <= idx < self._count:
+            raise IndexError("plan entry index out of range")
+        (
+            src_prefix,
+            dst_prefix,
+            src_offset,
+            src_length,
+            dst_offset,
+            dst_length,
+            category_id,
+            flags,
+        ) = _BIN_RECORD.unpack_from(self._mm, self._records_offset + idx * _BIN_RECORD.size)
+
+        entry: Dict[str, Any] = {
+            "source_path": self._prefixes[src_prefix] + self._string(src_offset, src_length),
+            "destination_path": self._prefixes[dst_prefix]
+            + self._string(dst_offset, dst_length),
+        }
+        if category_id != _BIN_NO_CATEGORY:
+            entry["category"] = self._categories[category_id]
+        if flags & _BIN_FLAG_SKIP:
+            entry["skip"] = True
+        return entry
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for idx in range(self._count):
+            yield self[idx]
+
+    def iter_reversed(self) -> Iterator[Dict[str, Any]]:
+        """Yields entries from last to first."""
+        for idx in range(self._count - 1, -1, -1):
+            yield self[idx]
+
+    def category_counts(self) -> Dict[str | None, int]:
+        """Counts entries per category by reading only the record table.
+
+        Returns:
+            Mapping of category name (``None`` for uncategorized entries) to
+            the number of entries.
+        """
+        end = self._records_offset + self._count * _BIN_RECORD.size
+        records = memoryview(self._mm)[self._records_offset : end]
+        try:
+            ids = Counter(record[6] for record in _BIN_RECORD.iter_unpack(records))
+        finally:
+            records.release()
+        return {
+            (None if cid == _BIN_NO_CATEGORY else self._categories[cid]): count
+            for cid, count in ids.items()
+        }
+
+    def close(self) -> None:
+        """Unmaps the plan file."""
+        self._mm.close()
+
+    def __enter__(self) -> "BinaryPlan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+def open_plan_writer(
+    path: str | Path, header: Dict[str, Any], plan_format: str
+) -> PlanWriter | BinaryPlanWriter:
+    """Creates a writer for ``plan_format``.
+
+    Args:
+        path: Destination file.
+        header: Plan metadata.
+        plan_format: One of :data:`PLAN_FORMATS`.
+
+    Returns:
+        A :class:`PlanWriter` or :class:`BinaryPlanWriter`.
+
+    Raises:
+        ValueError: If ``plan_format`` is not supported.
+    """
+    if plan_format == "binary":
+        return BinaryPlanWriter(path, header)
+    if plan_format not in PLAN_FORMATS:
+        raise ValueError(
+            f"Unsupported plan format '{plan_format}'. "
+            f"Expected one of: {', '.join(PLAN_FORMATS)}."
+        )
+    return PlanWriter(path, header, plan_format)
+
+
+def _iter_binary_entries(plan: BinaryPlan, start: int = 0) -> Iterator[Dict[str, Any]]:
+    try:
+        for idx in range(start, len(plan)):
+            yield plan[idx]
+    finally:
+        plan.close()
+
+
+def _iter_jsonl_entries(stream: IO[str], start: int = 0) -> Iterator[Dict[str, Any]]:
+    """Lazily yields the entries of an already opened JSON Lines plan.
+
+    The first ``start`` entries are skipped without being decoded.
+    """
+    try:
+        while start:
+            line = stream.readline()
+            if not line:
+                break
+            if line.strip():
+                start -= 1
+        for line in stream:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if record.get(_JSONL_FOOTER_KEY):
+                break
+            yield record
+    finally:
+        stream.close()
+
+
+def load_plan(
+    plan_file: str | Path, start: int = 0
+) -> Tuple[Dict[str, Any], Iterator[Dict[str, Any]]]:
+    """Opens a plan file in any supported format.
+
+    JSON Lines and binary plans are read lazily: only the header is parsed
+    up front and entries are decoded one at a time as the iterator advances.
+    Version 1 JSON plans are loaded in full.
+
+    Args:
+        plan_file: Path to the plan.
+        start: Index of the first entry to yield. Binary plans seek directly
+            to it; JSON Lines plans skip earlier lines without decoding them.
+
+    Returns:
+        A ``(header, entries)`` tuple. ``header`` holds the plan metadata
+        without the entries, plus ``entry_count`` for ``json`` and binary
+        plans; ``entries`` is an iterator of entry dictionaries.
+
+    Raises:
+        FileNotFoundError: If ``plan_file`` does not exist.
+        ValueError: If the file is not a valid plan.
+    """
+    plan_path = Path(plan_file)
+    if not plan_path.is_file():
+        raise FileNotFoundError(f"Plan file '{plan_file}' does not exist.")
+
+    with plan_path.open("rb") as probe:
+        is_binary = probe.read(len(BINARY_PLAN_MAGIC)) == BINARY_PLAN_MAGIC
+    if is_binary:
+        plan = BinaryPlan(plan_path)
+        return {**plan.header, "entry_count": len(plan)}, _iter_binary_entries(plan, start)
+
+    stream = plan_path.open("r", encoding="utf-8")
+    first_line = stream.readline()
+    try:
+        first_record = json.loads(first_line)
+    except json.JSONDecodeError:
+        first_record = None
+
+    if isinstance(first_record, dict) and first_record.get("format") == _JSONL_FORMAT_TAG:
+        return first_record, _iter_jsonl_entries(stream, start)
+
+    try:
+        if isinstance(first_record, dict):
+            payload = first_record
+        else:
+            stream.seek(0)
+            payload = json.load(stream)
+    except json.JSONDecodeError as exc:
+        raise ValueError(f"Plan file '{plan_file}' is not valid JSON: {exc}") from exc
+    finally:
+        stream.close()
+
+    if not isinstance(payload, dict):
+        raise ValueError(f"Plan file '{plan_file}' does not contain a plan object.")
+    entries = payload.pop("entries", [])
+    return payload, (entry for entry in entries[start:])
+
+
+def convert_plan(
+    plan_file: str | Path,
+    output_file: str | Path,
+    plan_format: str | None = None,
+    invert: bool = False,
+) -> Path:
+    """Re-encodes a plan in another format, optionally inverting it.
+
+    Entries are streamed from the input to the output, so conversion runs in
+    constant memory for JSON Lines and binary inputs.
+
+    Args:
+        plan_file: Existing plan in any supported format.
+        output_file: Path of the plan to write.
+        plan_format: Output format. Inferred from ``output_file``'s suffix
+            when ``None``.
+        invert: When ``True``, swaps ``source_path`` and ``destination_path``
+            and reverses the entry order, so applying the new plan undoes the
+            original one. Binary inputs are inverted back to front through
+            the memory map; text inputs are buffered in memory.
+
+    Returns:
+        Path to the written plan.
+
+    Raises:
+        FileNotFoundError: If ``plan_file`` does not exist.
+    """
+    header, entries = load_plan(plan_file)
+    header.pop("format", None)
+    header.pop("entry_count", None)
+    header.pop(_JSONL_FOOTER_KEY, None)
+    if invert:
+        header["source_root"], header["destination_root"] = (
+            header.get("destination_root"),
+            header.get("source_root"),
+        )
+        header["inverted_from"] = header.get("plan_id")
+
+    if invert:
+        close_entries = getattr(entries, "close", None)
+        if close_entries is not None:
+            close_entries()
+        entries = _inverted_entries(plan_file)
+
+    output_format = plan_format or plan_format_for_path(output_file)
+    with open_plan_writer(output_file, header, output_format) as writer:
+        for entry in entries:
+            writer.write(entry)
+    return Path(output_file)
+
+
+def _inverted_entries(plan_file: str | Path) -> Iterator[Dict[str, Any]]:
+    """Yields a plan's entries last-to-first with source and destination swapped."""
+    with open(plan_file, "rb") as probe:
+        is_binary = probe.read(len(BINARY_PLAN_MAGIC)) == BINARY_PLAN_MAGIC
+    if is_binary:
+        with BinaryPlan(plan_file) as plan:
+            for entry in plan.iter_reversed():
+                yield _swap(entry)
+        return
+    _, entries = load_plan(plan_file)
+    for entry in reversed(list(entries)):
+        yield _swap(entry)
+
+
+def _swap(entry: Dict[str, Any]) -> Dict[str, Any]:
+    swapped = dict(entry)
+    swapped["source_path"] = entry.get("destination_path")
+    swapped["destination_path"] = entry.get("source_path")
+    return swapped
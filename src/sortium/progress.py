@@ -0,0 +1,167 @@
+"""Rate-limited progress reporting with cooperative cancellation.
+
+``FileUtils`` and ``Sorter`` accept a ``progress`` callback. It is called
+with a :class:`Progress` snapshot at most once per ``progress_interval``
+seconds while files are scanned, planned, moved or hashed, and once more
+when the operation finishes (``done=True``).
+
+Returning ``False`` from the callback cancels the operation at the next
+file boundary: :class:`OperationCancelled` is raised, carrying the partial
+summary when files were already moved. Any other return value (including
+``None``) lets the operation continue.
+"""
+
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, Iterator, TypeVar
+
+T = TypeVar("T")
+
+PROGRESS_PHASES = ("scan", "plan", "apply", "flatten")
+"""Phases reported in :attr:`Progress.phase`."""
+
+
+class OperationCancelled(Exception):
+    """Raised when a progress callback asks an operation to stop.
+
+    Attributes:
+        phase (str): Phase that was interrupted.
+        summary (Dict[str, Any] | None): Partial result, e.g. the move
+            summary of an interrupted ``apply_move_plan``; ``None`` when the
+            interrupted work produced nothing usable (a partial plan file is
+            deleted).
+    """
+
+    def __init__(self, phase: str, summary: Dict[str, Any] | None = None):
+        super().__init__(f"Operation cancelled during '{phase}'.")
+        self.phase = phase
+        self.summary = summary
+
+
+@dataclass(frozen=True)
+class Progress:
+    """Snapshot of a running operation.
+
+    Attributes:
+        phase: One of :data:`PROGRESS_PHASES`.
+        files: Files (or plan entries) processed so far.
+        bytes: Bytes processed so far, where the operation knows them
+            (moving, flattening and hashing); ``0`` otherwise.
+        total_files: Total number of files when known in advance (applying
+            ``json`` and binary plans), else ``None``.
+        elapsed: Seconds since the operation started.
+        done: Whether this is the final report.
+    """
+
+    phase: str
+    files: int
+    bytes: int
+    total_files: int | None
+    elapsed: float
+    done: bool = False
+
+    @property
+    def files_per_second(self) -> float:
+        """Average throughput in files per second."""
+        return self.files / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def bytes_per_second(self) -> float:
+        """Average throughput in bytes per second."""
+        return self.bytes / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def eta(self) -> float | None:
+        """Estimated seconds remaining, or ``None`` if the total is unknown."""
+        if self.total_files is None or not self.files:
+            return None
+        remaining = max(self.total_files - self.files, 0)
+        return remaining * self.elapsed / self.files
+
+
+ProgressCallback = Callable[[Progress], Any]
+"""Signature of progress callbacks; returning ``False`` cancels."""
+
+
+class ProgressReporter:
+    """Accumulates counts and calls a progress callback at a limited rate.
+
+    Not thread-safe; it is driven by the thread coordinating an operation.
+    """
+
+    def __init__(
+        self,
+        callback: ProgressCallback,
+        phase: str,
+        total_files: int | None = None,
+        interval: float = 0.5,
+    ):
+        self.callback = callback
+        self.phase = phase
+        self.total_files = total_files
+        self.interval = interval
+        self.files = 0
+        self.bytes = 0
+        self._start = time.monotonic()
+        self._last = self._start
+
+    def _snapshot(self, now: float, done: bool) -> Progress:
+        return Progress(
+            self.phase, self.files, self.bytes, self.total_files, now - self._start, done
+        )
+
+    def advance(self, files: int = 1, nbytes: int = 0) -> bool:
+        """Adds to the counts and reports if the interval has elapsed.
+
+        Returns:
+            ``False`` if the callback asked to cancel, else ``True``.
+        """
+        self.files += files
+        self.bytes += nbytes
+        now = time.monotonic()
+        if now - self._last < self.interval:
+            return True
+        self._last = now
+        return self.callback(self._snapshot(now, False)) is not False
+
+    def finish(self) -> None:
+        """Sends the final report; its return value is ignored."""
+        self.callback(self._snapshot(time.monotonic(), True))
+
+    def cancel(self, summary: Dict[str, Any] | None = None) -> OperationCancelled:
+        """Builds the exception to raise after the callback cancelled."""
+        return OperationCancelled(self.phase, summary)
+
+
+def new_reporter(
+    callback: ProgressCallback | None,
+    phase: str,
+    total_files: int | None = None,
+    interval: float = 0.5,
+) -> ProgressReporter | None:
+    """Returns a reporter for ``callback``, or ``None`` when there is none."""
+    if callback is None:
+        return None
+    return ProgressReporter(callback, phase, total_files, interval)
+
+
+def iter_with_progress(
+    items: Iterable[T],
+    reporter: ProgressReporter,
+    measure: Callable[[T], int] | None = None,
+) -> Iterator[T]:
+    """Reports every item of ``items`` once the consumer has handled it.
+
+    Args:
+        items: Items to pass through.
+        reporter: Reporter to advance by one file per item.
+        measure: Optional function giving an item's size in bytes.
+
+    Raises:
+        OperationCancelled: If the callback cancelled.
+    """
+    for item in items:
+        yield item
+        if not reporter.advance(1, measure(item) if measure is not None else 0):
+            raise reporter.cancel()
+    reporter.finish()
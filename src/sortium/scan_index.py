@@ -0,0 +1,387 @@
+"""Persistent scan index for incremental re-sorting.
+
+A :class:`ScanIndex` is a SQLite database (standard library ``sqlite3``)
+remembering, per source root, every directory's modification time and every
+planned file's inode, size, modification time and assigned category. Later
+scans of the same root use it to:
+
+* skip listing directories whose mtime has not changed (their children are
+  taken from the index, so only one ``stat`` per directory is issued), and
+* yield only files that are new or whose inode, size or mtime changed.
+
+The index is purely a cache: deleting the database file, or pointing a
+sorter at a fresh one, simply makes the next scan a full one.
+
+An index may be used from any thread, e.g. by a sorter running on an
+:class:`~sortium.aio.AsyncSorter` worker, but only by one plan at a time,
+since a scan and its records form one transaction.
+
+A directory's mtime changes when entries are added, removed or renamed in
+it, but not when an existing file is rewritten in place. Files edited in
+place inside otherwise unchanged directories are therefore only noticed when
+``verify_files`` is enabled.
+"""
+
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, Generator, Iterator, List, Set, Tuple
+
+from .walker import FileEntry, scan_directory
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS roots (
+    id INTEGER PRIMARY KEY,
+    root TEXT NOT NULL,
+    scope TEXT NOT NULL,
+    UNIQUE (root, scope)
+);
+CREATE TABLE IF NOT EXISTS dirs (
+    root_id INTEGER NOT NULL,
+    path TEXT NOT NULL,
+    parent TEXT,
+    mtime_ns INTEGER NOT NULL,
+    PRIMARY KEY (root_id, path)
+);
+CREATE INDEX IF NOT EXISTS dirs_by_parent ON dirs (root_id, parent);
+CREATE TABLE IF NOT EXISTS files (
+    root_id INTEGER NOT NULL,
+    dir TEXT NOT NULL,
+    name TEXT NOT NULL,
+    inode INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    category TEXT,
+    PRIMARY KEY (root_id, dir, name)
+);
+"""
+
+# Directory mtimes this close to the scan are not trusted: a change made in
+# the same timestamp tick would leave the mtime unchanged.
+_RACY_WINDOW_NS = 2_000_000_000
+_UNTRUSTED_MTIME = -1
+
+
+def _new_stats() -> Dict[str, int]:
+    return {
+        "dirs_scanned": 0,
+        "dirs_skipped": 0,
+        "files_changed": 0,
+        "files_skipped": 0,
+    }
+
+
+class ScanIndex:
+    """On-disk index of previously planned files, keyed per source root.
+
+    Attributes:
+        db_path (Path): Location of the SQLite database.
+        stats (Dict[str, int]): Counters for the most recent scan:
+            ``dirs_scanned`` (directories listed), ``dirs_skipped``
+            (directories whose listing was reused from the index),
+            ``files_changed`` (new or modified files yielded) and
+            ``files_skipped`` (unchanged files left out of the plan).
+    """
+
+    def __init__(self, db_path: str | Path):
+        """Opens (or creates) the index database.
+
+        A database that cannot be read as a scan index is discarded and
+        recreated, since it only holds cached state.
+
+        Args:
+            db_path: Path to the SQLite file.
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.stats = _new_stats()
+        self._active_root_id: int | None = None
+        self._active_scan: Generator[FileEntry, None, None] | None = None
+        try:
+            self._conn = self._connect()
+        except sqlite3.DatabaseError:
+            self.db_path.unlink(missing_ok=True)
+            self._conn = self._connect()
+
+    def _connect(self) -> sqlite3.Connection:
+        # Sorters may run on worker threads (see sortium.aio).
+        conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        try:
+            conn.executescript(_SCHEMA)
+        except sqlite3.DatabaseError:
+            conn.close()
+            raise
+        return conn
+
+    def _root_id(self, root: str, scope: str) -> int:
+        self._conn.execute(
+            "INSERT OR IGNORE INTO roots (root, scope) VALUES (?, ?)", (root, scope)
+        )
+        row = self._conn.execute(
+            "SELECT id FROM roots WHERE root = ? AND scope = ?", (root, scope)
+        ).fetchone()
+        return row[0]
+
+    def iter_changed_files(
+        self,
+        root: str | Path,
+        ignore_set: Set[str],
+        recursive: bool = True,
+        scope: str = "",
+        skip_paths: Set[str] | None = None,
+        verify_files: bool = False,
+    ) -> Iterator[FileEntry]:
+        """Yields files below ``root`` that are not recorded as planned.
+
+        Files yielded here only stay out of later scans once they are passed
+        to :meth:`record`, and a directory is only marked as scanned once
+        every file yielded from it has been handed back. The index is
+        committed when the iterator is exhausted; if it is closed early or
+        fails, the scan's changes (and the records made during it) are
+        rolled back, so an abandoned plan leaves nothing marked as planned.
+
+        Args:
+            root: Source root being scanned.
+            ignore_set: File and directory names to skip at every level.
+            recursive: When ``False``, only files directly inside ``root``
+                are considered.
+            scope: Distinguishes independent indexes of the same root, e.g.
+                different sorting strategies or ignore lists.
+            skip_paths: Optional absolute directory paths that must not be
+                descended into.
+            verify_files: When ``True``, files in unchanged directories are
+                still ``stat``-ed so in-place modifications are detected.
+
+        Yields:
+            ``FileEntry`` objects for new or modified files.
+        """
+        self._end_scan()
+        scan = self._iter_changed(
+            root, ignore_set, recursive, scope, skip_paths, verify_files
+        )
+        self._active_scan = scan
+        return scan
+
+    def _iter_changed(
+        self,
+        root: str | Path,
+        ignore_set: Set[str],
+        recursive: bool,
+        scope: str,
+        skip_paths: Set[str] | None,
+        verify_files: bool,
+    ) -> Generator[FileEntry, None, None]:
+        root_path = os.path.abspath(root)
+        root_id = self._root_id(root_path, f"{scope}|recursive={recursive}")
+        trust_before = time.time_ns() - _RACY_WINDOW_NS
+        self.stats = _new_stats()
+        self._active_root_id = root_id
+        stats = self.stats
+        visited: Set[Tuple[int, int]] = set()
+        stack: List[Tuple[str, str | None]] = [(root_path, None)]
+
+        try:
+            while stack:
+                dir_path, parent = stack.pop()
+                try:
+                    dir_stat = os.stat(dir_path)
+                except OSError:
+                    self._forget_tree(root_id, dir_path)
+                    continue
+                dir_key = (dir_stat.st_dev, dir_stat.st_ino)
+                if dir_key in visited:
+                    continue
+                visited.add(dir_key)
+
+                row = self._conn.execute(
+                    "SELECT mtime_ns FROM dirs WHERE root_id = ? AND path = ?",
+                    (root_id, dir_path),
+                ).fetchone()
+                if row is not None and row[0] == dir_stat.st_mtime_ns:
+                    stats["dirs_skipped"] += 1
+                    subdirs = self._known_subdirs(root_id, dir_path) if recursive else []
+                    yield from self._unchanged_dir_files(root_id, dir_path, verify_files)
+                else:
+                    stats["dirs_scanned"] += 1
+                    listing = self._rescan_dir(
+                        root_id, dir_path, ignore_set, recursive, skip_paths
+                    )
+                    if listing is None:
+                        continue
+                    files, subdirs = listing
+                    yield from files
+                    # Only now have all of the directory's files been
+                    # recorded by the consumer.
+                    mtime = dir_stat.st_mtime_ns
+                    if mtime >= trust_before:
+                        mtime = _UNTRUSTED_MTIME
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO dirs (root_id, path, parent, mtime_ns)"
+                        " VALUES (?, ?, ?, ?)",
+                        (root_id, dir_path, parent, mtime),
+                    )
+                for sub_path in reversed(subdirs):
+                    stack.append((sub_path, dir_path))
+        except BaseException:
+            self._conn.rollback()
+            raise
+        self._conn.commit()
+
+    def _end_scan(self) -> None:
+        """Closes an unfinished scan, rolling its changes back."""
+        scan, self._active_scan = self._active_scan, None
+        if scan is not None:
+            scan.close()
+
+    def _known_subdirs(self, root_id: int, dir_path: str) -> List[str]:
+        rows = self._conn.execute(
+            "SELECT path FROM dirs WHERE root_id = ? AND parent = ? ORDER BY path",
+            (root_id, dir_path),
+        )
+        return [path for (path,) in rows]
+
+    def _unchanged_dir_files(
+        self, root_id: int, dir_path: str, verify_files: bool
+    ) -> Iterator[FileEntry]:
+        """Counts (and optionally re-checks) the files of an unchanged directory."""
+        rows = self._conn.execute(
+            "SELECT name, inode, size, mtime_ns FROM files"
+            " WHERE root_id = ? AND dir = ?",
+            (root_id, dir_path),
+        ).fetchall()
+        if not verify_files:
+            self.stats["files_skipped"] += len(rows)
+            return
+        for name, inode, size, mtime_ns in rows:
+            path = os.path.join(dir_path, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            if (st.st_ino, st.st_size, st.st_mtime_ns) == (inode, size, mtime_ns):
+                self.stats["files_skipped"] += 1
+            else:
+                self.stats["files_changed"] += 1
+                yield FileEntry(path, name, stat_result=st)
+
+    def _rescan_dir(
+        self,
+        root_id: int,
+        dir_path: str,
+        ignore_set: Set[str],
+        recursive: bool,
+        skip_paths: Set[str] | None,
+    ) -> Tuple[List[FileEntry], List[str]] | None:
+        """Lists a changed directory and diffs it against the index."""
+        try:
+            file_entries, dir_entries = scan_directory(
+                dir_path, ignore_set, recursive, skip_paths
+            )
+        except OSError:
+            self._forget_tree(root_id, dir_path)
+            return None
+
+        known = {
+            name: (inode, size, mtime_ns)
+            for name, inode, size, mtime_ns in self._conn.execute(
+                "SELECT name, inode, size, mtime_ns FROM files"
+                " WHERE root_id = ? AND dir = ?",
+                (root_id, dir_path),
+            )
+        }
+        changed: List[FileEntry] = []
+        for entry in file_entries:
+            item = FileEntry(entry.path, entry.name, entry)
+            recorded = known.pop(entry.name, None)
+            if recorded is not None:
+                try:
+                    st = item.stat()
+                except OSError:
+                    continue
+                if (st.st_ino, st.st_size, st.st_mtime_ns) == recorded:
+                    self.stats["files_skipped"] += 1
+                    continue
+            self.stats["files_changed"] += 1
+            changed.append(item)
+        if known:
+            self._conn.executemany(
+                "DELETE FROM files WHERE root_id = ? AND dir = ? AND name = ?",
+                [(root_id, dir_path, name) for name in known],
+            )
+
+        subdirs = sorted(entry.path for entry in dir_entries)
+        present = set(subdirs)
+        for old_sub in self._known_subdirs(root_id, dir_path):
+            if old_sub not in present:
+                self._forget_tree(root_id, old_sub)
+        return changed, subdirs
+
+    def _forget_tree(self, root_id: int, dir_path: str) -> None:
+        """Drops a vanished directory and everything recorded below it."""
+        low = dir_path + os.sep
+        high = dir_path + chr(ord(os.sep) + 1)
+        for table, column in (("dirs", "path"), ("files", "dir")):
+            self._conn.execute(
+                f"DELETE FROM {table} WHERE root_id = ? AND "
+                f"({column} = ? OR ({column} >= ? AND {column} < ?))",
+                (root_id, dir_path, low, high),
+            )
+
+    def record(self, item: FileEntry, category: str | None = None) -> None:
+        """Marks a file yielded by :meth:`iter_changed_files` as planned.
+
+        Args:
+            item: The file entry.
+            category: Category or folder the file was assigned to.
+
+        Raises:
+            RuntimeError: If no scan has been started on this index.
+        """
+        try:
+            st = item.stat()
+        except OSError:
+            return
+        if self._active_root_id is None:
+            raise RuntimeError("record() must follow iter_changed_files().")
+        dir_path, name = os.path.split(item.path)
+        self._conn.execute(
+            "INSERT OR REPLACE INTO files"
+            " (root_id, dir, name, inode, size, mtime_ns, category)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                self._active_root_id,
+                dir_path,
+                name,
+                st.st_ino,
+                st.st_size,
+                st.st_mtime_ns,
+                category,
+            ),
+        )
+
+    def commit(self) -> None:
+        """Writes pending changes to disk."""
+        self._conn.commit()
+
+    def rollback(self) -> None:
+        """Discards pending changes, ending an unfinished scan first."""
+        self._end_scan()
+        self._conn.rollback()
+
+    def close(self) -> None:
+        """Commits pending changes and closes the database.
+
+        An unfinished scan is rolled back first.
+        """
+        self._end_scan()
+        self._conn.commit()
+        self._conn.close()
+
+    def __enter__(self) -> "ScanIndex":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is not None:
+            self.rollback()
+        self.close()
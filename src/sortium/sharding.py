@@ -0,0 +1,230 @@
+"""Process-pool planning for ``sort_by_type`` and ``sort_by_extension``.
+
+Classifying a file and building its plan entry is pure Python work, so on
+trees with millions of files planning is bound by a single core. With
+``processes`` set, :class:`~sortium.sorter.Sorter` splits the work into
+shards instead:
+
+* the files directly inside the source folder, in chunks of
+  :data:`ROOT_CHUNK_SIZE` names, and
+* (when recursive) one shard per top-level subdirectory.
+
+Shards are planned on a process pool. Each worker walks its shard,
+classifies every file and writes a partial plan shard: pickled batches of
+compact row tuples holding the source path, file name, normalized
+destination folder and the entry's category or extension. Pickle memoizes
+the folder and category strings repeated within a batch, and loading a
+batch is a single C-level call, so handing rows to the parent costs little.
+The parent process merges the shards in a fixed order (root files, then
+subdirectories by name) and resolves the final destination names against a
+single :class:`~sortium.file_utils.DestinationIndex`, so names are
+collision-safe across shards and the same tree always yields the same plan.
+
+That merge, like writing the plan itself, runs on one thread. Workers take
+the walk and classification off it, but the speedup is capped by the
+per-entry merge and serialization in the parent: beyond a few processes,
+adding more does not make planning faster.
+"""
+
+import os
+import pickle
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Set, Tuple
+
+from .file_utils import DestinationIndex
+from .suffix_trie import SuffixTrie
+from .walker import scan_directory, walk_files
+
+SHARDED_STRATEGIES = ("type", "extension")
+"""Strategies that can be planned on a process pool."""
+
+ROOT_CHUNK_SIZE = 5000
+"""Files of the source folder itself planned per shard."""
+
+_BATCH_SIZE = 1024
+
+
+@dataclass(frozen=True)
+class ShardConfig:
+    """Settings shared by every shard of one plan.
+
+    Attributes:
+        strategy: ``"type"`` or ``"extension"``.
+        extension_to_category: Category per lower-cased extension (``type``).
+        suffix_trie: Matcher giving each file name its extension.
+        dest_root: Base destination folder.
+        ignore_set: Names skipped at every level.
+        plan_path: Absolute path of the plan being written; never planned.
+        shard_dir: Directory receiving the shard files.
+    """
+
+    strategy: str
+    extension_to_category: Dict[str, str]
+    suffix_trie: SuffixTrie
+    dest_root: str
+    ignore_set: Set[str]
+    plan_path: str
+    shard_dir: str
+
+
+_config: ShardConfig | None = None
+
+
+def _init_worker(config: ShardConfig) -> None:
+    global _config
+    _config = config
+
+
+def _plan_shard(task: Tuple[int, str, Any]) -> str:
+    """Plans one shard and returns the path of its shard file.
+
+    Rows are tuples ``(source path, file name, destination folder,
+    category, extension)``, with ``category`` ``None`` for the extension
+    strategy, pickled in batches of up to ``_BATCH_SIZE`` rows.
+    """
+    number, kind, payload = task
+    config = _config
+    if kind == "dir":
+        files = ((entry.path, entry.name) for entry in walk_files(
+            payload, config.ignore_set, ordered=True
+        ))
+    else:
+        files = iter(payload)
+
+    type_strategy = config.strategy == "type"
+    mapping = config.extension_to_category
+    match = config.suffix_trie.match
+    dest_root = config.dest_root
+    plan_name = os.path.basename(config.plan_path)
+    folders: Dict[str, str] = {}
+    shard_path = os.path.join(config.shard_dir, f"shard-{number:06d}.pickle")
+    batch: List[tuple] = []
+    append = batch.append
+    with open(shard_path, "wb") as shard:
+        for source, name in files:
+            if name == plan_name and os.path.abspath(source) == config.plan_path:
+                continue
+            extension = match(name)
+            if type_strategy:
+                label = mapping.get(extension, "Others")
+            else:
+                label = extension.lstrip(".")
+            folder = folders.get(label)
+            if folder is None:
+                folder = folders[label] = os.path.normpath(
+                    os.path.join(dest_root, label) if label else dest_root
+                )
+            if type_strategy:
+                append((source, name, folder, label, extension))
+            else:
+                append((source, name, folder, None, label))
+            if len(batch) == _BATCH_SIZE:
+                pickle.dump(batch, shard, pickle.HIGHEST_PROTOCOL)
+                batch.clear()
+        if batch:
+            pickle.dump(batch, shard, pickle.HIGHEST_PROTOCOL)
+    return shard_path
+
+
+def _iter_rows(shard_path: str) -> Iterator[tuple]:
+    """Yields the rows of a shard file, one pickled batch in memory at a time."""
+    with open(shard_path, "rb") as shard:
+        load = pickle.Unpickler(shard).load
+        while True:
+            try:
+                batch = load()
+            except EOFError:
+                return
+            yield from batch
+
+
+def _shard_tasks(
+    source_root: str, ignore_set: Set[str], recursive: bool
+) -> List[Tuple[int, str, Any]]:
+    files, dirs = scan_directory(source_root, ignore_set, recursive)
+    names = sorted((entry.path, entry.name) for entry in files)
+    tasks: List[Tuple[int, str, Any]] = []
+    for start in range(0, len(names), ROOT_CHUNK_SIZE):
+        tasks.append((len(tasks), "files", names[start : start + ROOT_CHUNK_SIZE]))
+    for path in sorted(entry.path for entry in dirs):
+        tasks.append((len(tasks), "dir", path))
+    return tasks
+
+
+def iter_sharded_entries(
+    strategy: str,
+    source_root: str,
+    dest_root: str,
+    ignore_set: Set[str],
+    recursive: bool,
+    plan_path: str,
+    extension_to_category: Dict[str, str],
+    suffix_trie: SuffixTrie,
+    processes: int,
+) -> Iterator[Dict[str, Any]]:
+    """Plans ``source_root`` on a process pool and yields the merged entries.
+
+    Entries have exactly the keys the single-process strategies produce.
+    Closing the generator early stops the pool and removes the shards.
+
+    Args:
+        strategy: One of :data:`SHARDED_STRATEGIES`.
+        source_root: Folder to plan.
+        dest_root: Base destination folder.
+        ignore_set: Names skipped at every level.
+        recursive: Whether subdirectories are planned too.
+        plan_path: Path of the plan being written; it is never planned.
+        extension_to_category: Category per lower-cased extension.
+        suffix_trie: Matcher giving each file name its extension.
+        processes: Number of worker processes.
+
+    Raises:
+        ValueError: If ``strategy`` cannot be sharded.
+    """
+    if strategy not in SHARDED_STRATEGIES:
+        raise ValueError(
+            f"Strategy '{strategy}' cannot be sharded. "
+            f"Expected one of: {', '.join(SHARDED_STRATEGIES)}."
+        )
+    tasks = _shard_tasks(source_root, ignore_set, recursive)
+    index = DestinationIndex()
+    reserve_name = index.reserve_name
+    sep = os.sep
+    with tempfile.TemporaryDirectory(prefix="sortium-shards-") as shard_dir:
+        config = ShardConfig(
+            strategy,
+            extension_to_category,
+            suffix_trie,
+            str(dest_root),
+            ignore_set,
+            os.path.abspath(plan_path),
+            shard_dir,
+        )
+        pool = ProcessPoolExecutor(
+            max_workers=processes, initializer=_init_worker, initargs=(config,)
+        )
+        try:
+            for shard_path in pool.map(_plan_shard, tasks):
+                for source, name, folder, category, extension in _iter_rows(shard_path):
+                    name = reserve_name(folder, name)
+                    destination = (
+                        folder + name if folder.endswith(sep) else folder + sep + name
+                    )
+                    if category is None:
+                        yield {
+                            "source_path": source,
+                            "destination_path": destination,
+                            "extension": extension,
+                        }
+                    else:
+                        yield {
+                            "source_path": source,
+                            "destination_path": destination,
+                            "category": category,
+                            "extension": extension,
+                        }
+                os.unlink(shard_path)
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
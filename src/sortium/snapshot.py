@@ -0,0 +1,336 @@
+"""Comparison of ``export_directory_structure`` snapshots.
+
+:func:`diff_snapshots` compares a *before* and an *after* snapshot and
+yields the changes between them:
+
+``moved``
+    A file (or a whole directory) now lives at another path. Files are
+    matched by name and size; directories by a digest of their subtree
+    (names, types and sizes of everything below them), so a moved directory
+    is reported once instead of once per file.
+``resized``
+    A file kept its path but changed size.
+``added`` / ``removed``
+    Anything else that exists on one side only.
+
+Snapshots are streamed, never loaded whole. Each snapshot is read twice:
+the first pass computes the subtree digest of every directory, and the
+second pass walks both file lists side by side. Both lists are in the
+exporter's order (directories before files, case-insensitive names), so
+files are paired like a merge join and memory use depends on the number of
+directories and of changed files, not on the number of files. Snapshots in
+the exporter's ``indent=2`` layout are parsed line by line; any other
+layout is loaded with :func:`json.load`.
+"""
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Tuple
+
+CHANGE_TYPES = ("moved", "resized", "added", "removed")
+"""Kinds of changes reported by :func:`diff_snapshots`."""
+
+# ("file", path, name, size), ("dir", path, name, None) or ("end", path, name, None)
+_Event = Tuple[str, str, str, Any]
+
+
+def _value(line: str) -> Any:
+    return json.loads(line.split(": ", 1)[1].rstrip(","))
+
+
+def _iter_lines(stream) -> Iterator[_Event]:
+    """Parses the exporter's indent=2 layout one line at a time."""
+    name = path = node_type = None
+    open_dirs: List[Tuple[str, str]] = []
+    for raw in stream:
+        line = raw.strip()
+        if line.startswith('"name": '):
+            name = _value(line)
+        elif line.startswith('"path": '):
+            path = _value(line)
+        elif line.startswith('"type": '):
+            node_type = _value(line)
+        elif line.startswith('"size": ') and node_type == "file":
+            yield "file", path, name, _value(line)
+        elif line.startswith('"children": ['):
+            yield "dir", path, name, None
+            if line.startswith('"children": []'):
+                yield "end", path, name, None
+            else:
+                open_dirs.append((path, name))
+        elif line in ("]", "],") and open_dirs:
+            dir_path, dir_name = open_dirs.pop()
+            yield "end", dir_path, dir_name, None
+
+
+def _iter_loaded(root: Dict[str, Any]) -> Iterator[_Event]:
+    """Walks a fully loaded snapshot without recursion."""
+    stack: List[Tuple[Dict[str, Any], int]] = [(root, -1)]
+    while stack:
+        node, position = stack.pop()
+        if node.get("type") != "directory":
+            yield "file", node.get("path"), node.get("name"), node.get("size")
+            continue
+        if position == -1:
+            yield "dir", node.get("path"), node.get("name"), None
+        children = node.get("children") or []
+        if position + 1 < len(children):
+            stack.append((node, position + 1))
+            stack.append((children[position + 1], -1))
+        else:
+            yield "end", node.get("path"), node.get("name"), None
+
+
+def iter_snapshot(snapshot_file: str | Path) -> Iterator[_Event]:
+    """Yields the nodes of a snapshot in document order.
+
+    Args:
+        snapshot_file: File written by ``export_directory_structure``.
+
+    Yields:
+        ``(kind, path, name, size)`` tuples: ``"file"`` for files,
+        ``"dir"`` when a directory starts and ``"end"`` after its last
+        descendant.
+    """
+    with open(snapshot_file, "r", encoding="utf-8") as stream:
+        streaming = stream.readline().rstrip("\r\n") == "{"
+        stream.seek(0)
+        if streaming:
+            yield from _iter_lines(stream)
+            return
+        root = json.load(stream)
+    yield from _iter_loaded(root)
+
+
+def snapshot_root(snapshot_file: str | Path) -> str:
+    """Returns the path of the directory a snapshot was taken of."""
+    for _, path, _, _ in iter_snapshot(snapshot_file):
+        return path
+    return ""
+
+
+def _digest_directories(snapshot_file: str | Path) -> Tuple[str, Dict[str, str]]:
+    """First pass: computes the subtree digest of every directory.
+
+    Returns:
+        The snapshot's root path and a ``{relative path: digest}`` map. The
+        digest covers the names, types and sizes below the directory but
+        not the directory's own name, so renamed directories match.
+    """
+    digests: Dict[str, str] = {}
+    hashers: List[Any] = []
+    names: List[str] = []
+    root = None
+    for kind, path, name, size in iter_snapshot(snapshot_file):
+        if kind == "file":
+            hashers[-1].update(f"f\0{name}\0{size}\n".encode("utf-8", "surrogatepass"))
+        elif kind == "dir":
+            if root is None:
+                root = path
+            else:
+                names.append(name)
+            hashers.append(hashlib.blake2b(digest_size=16))
+        else:
+            digest = hashers.pop().hexdigest()
+            digests["/".join(names)] = digest
+            if names:
+                names.pop()
+            if hashers:
+                hashers[-1].update(f"d\0{name}\0{digest}\n".encode("utf-8", "surrogatepass"))
+    return root or "", digests
+
+
+def _iter_files(snapshot_file: str | Path) -> Iterator[Tuple[tuple, str, str, Any]]:
+    """Second pass: yields ``(order key, relative path, path, size)``.
+
+    The order key sorts files exactly like the exporter writes them.
+    """
+    keys: List[tuple] = []
+    names: List[str] = []
+    depth = 0
+    for kind, path, name, size in iter_snapshot(snapshot_file):
+        if kind == "dir":
+            if depth:
+                keys.append((0, name.lower(), name))
+                names.append(name)
+            depth += 1
+        elif kind == "end":
+            depth -= 1
+            if depth:
+                keys.pop()
+                names.pop()
+        else:
+            key = tuple(keys) + ((1, name.lower(), name),)
+            yield key, "/".join(names + [name]), path, size
+
+
+def _top_level(paths: List[str]) -> List[str]:
+    """Drops paths nested inside another path of the list."""
+    chosen: List[str] = []
+    for path in sorted(paths):
+        if not chosen or not path.startswith(chosen[-1] + "/"):
+            chosen.append(path)
+    return chosen
+
+
+def _inside(rel_path: str, dirs: Dict[str, Any]) -> bool:
+    """Whether ``rel_path`` lies below one of ``dirs``."""
+    parent = rel_path.rpartition("/")[0]
+    while parent:
+        if parent in dirs:
+            return True
+        parent = parent.rpartition("/")[0]
+    return False
+
+
+def _absolute(root: str, rel_path: str) -> str:
+    return str(Path(root, *rel_path.split("/")))
+
+
+def diff_snapshots(
+    before_file: str | Path, after_file: str | Path
+) -> Iterator[Dict[str, Any]]:
+    """Compares two snapshots of the same tree.
+
+    Paths are compared relative to each snapshot's root, so snapshots of a
+    tree that was itself relocated can be compared too.
+
+    Args:
+        before_file: Snapshot taken first.
+        after_file: Snapshot taken later.
+
+    Yields:
+        One dictionary per change, with ``change`` (one of
+        :data:`CHANGE_TYPES`), ``type`` (``"file"`` or ``"directory"``),
+        ``before_path`` and/or ``after_path``, and ``size`` /
+        ``before_size`` / ``after_size`` where they apply. Moves come
+        first (files, then directories), then resized, added and removed
+        files and directories, each in snapshot order.
+    """
+    before_root, before_dirs = _digest_directories(before_file)
+    after_root, after_dirs = _digest_directories(after_file)
+
+    # A directory is moved when a directory present only before has the same
+    # digest as one present only after (which may sit inside a new directory).
+    removed_dirs = _top_level([p for p in before_dirs if p and p not in after_dirs])
+    new_dirs = sorted(p for p in after_dirs if p and p not in before_dirs)
+    by_digest: Dict[str, List[str]] = {}
+    for rel_path in new_dirs:
+        by_digest.setdefault(after_dirs[rel_path], []).append(rel_path)
+    moved_dirs: Dict[str, str] = {}  # before -> after
+    moved_dirs_after: Dict[str, str] = {}
+    for rel_path in removed_dirs:
+        name = rel_path.rpartition("/")[2]
+        candidates = [
+            candidate
+            for candidate in by_digest.get(before_dirs[rel_path], ())
+            if candidate not in moved_dirs_after and not _inside(candidate, moved_dirs_after)
+        ]
+        if candidates:
+            # Prefer a directory that kept its name.
+            candidates.sort(key=lambda candidate: candidate.rpartition("/")[2] != name)
+            moved_dirs[rel_path] = candidates[0]
+            moved_dirs_after[candidates[0]] = rel_path
+    added_dirs = _top_level(
+        [
+            p
+            for p in new_dirs
+            if p not in moved_dirs_after and not _inside(p, moved_dirs_after)
+        ]
+    )
+
+    resized: List[Dict[str, Any]] = []
+    removed: List[Tuple[str, Any]] = []
+    added: List[Tuple[str, Any]] = []
+    before_iter = _iter_files(before_file)
+    after_iter = _iter_files(after_file)
+    old = next(before_iter, None)
+    new = next(after_iter, None)
+    while old is not None or new is not None:
+        if new is None or (old is not None and old[0] < new[0]):
+            if not _inside(old[1], moved_dirs):
+                removed.append((old[1], old[3]))
+            old = next(before_iter, None)
+        elif old is None or new[0] < old[0]:
+            if not _inside(new[1], moved_dirs_after):
+                added.append((new[1], new[3]))
+            new = next(after_iter, None)
+        else:
+            if old[3] != new[3]:
+                resized.append(
+                    {
+                        "change": "resized",
+                        "type": "file",
+                        "before_path": old[2],
+                        "after_path": new[2],
+                        "before_size": old[3],
+                        "after_size": new[3],
+                    }
+                )
+            old = next(before_iter, None)
+            new = next(after_iter, None)
+
+    # Pair the remaining files by (name, size); identical paths whose order
+    # differed (names equal up to case) pair up here as well.
+    added_by_key: Dict[Tuple[str, Any], List[str]] = {}
+    for rel_path, size in added:
+        added_by_key.setdefault((rel_path.rpartition("/")[2], size), []).append(rel_path)
+    unmatched_removed: List[Tuple[str, Any]] = []
+    moved_files: List[Tuple[str, str, Any]] = []
+    for rel_path, size in removed:
+        candidates = added_by_key.get((rel_path.rpartition("/")[2], size))
+        if not candidates:
+            unmatched_removed.append((rel_path, size))
+            continue
+        target = rel_path if rel_path in candidates else candidates[0]
+        candidates.remove(target)
+        if target != rel_path:
+            moved_files.append((rel_path, target, size))
+    remaining = {rel_path for paths in added_by_key.values() for rel_path in paths}
+    unmatched_added = [(rel_path, size) for rel_path, size in added if rel_path in remaining]
+
+    for before, after, size in moved_files:
+        yield {
+            "change": "moved",
+            "type": "file",
+            "before_path": _absolute(before_root, before),
+            "after_path": _absolute(after_root, after),
+            "size": size,
+        }
+    for before, after in moved_dirs.items():
+        yield {
+            "change": "moved",
+            "type": "directory",
+            "before_path": _absolute(before_root, before),
+            "after_path": _absolute(after_root, after),
+        }
+    yield from resized
+    for rel_path, size in unmatched_added:
+        yield {
+            "change": "added",
+            "type": "file",
+            "after_path": _absolute(after_root, rel_path),
+            "size": size,
+        }
+    for rel_path in added_dirs:
+        if rel_path not in moved_dirs_after:
+            yield {
+                "change": "added",
+                "type": "directory",
+                "after_path": _absolute(after_root, rel_path),
+            }
+    for rel_path, size in unmatched_removed:
+        yield {
+            "change": "removed",
+            "type": "file",
+            "before_path": _absolute(before_root, rel_path),
+            "size": size,
+        }
+    for rel_path in removed_dirs:
+        if rel_path not in moved_dirs:
+            yield {
+                "change": "removed",
+                "type": "directory",
+                "before_path": _absolute(before_root, rel_path),
+            }
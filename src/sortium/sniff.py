@@ -0,0 +1,351 @@
+"""Content sniffing for files with missing or misleading extensions.
+
+:class:`ContentSniffer` reads only the first few hundred bytes of a file and
+matches them against a built-in table of magic-byte signatures, returning
+the extension the content corresponds to (``".jpg"``, ``".pdf"``, ...).
+``Sorter`` maps that extension to a category with its usual mapping.
+
+Reads run on a thread pool, and results are cached by
+``(st_dev, st_ino, st_mtime_ns, st_size)``: in memory for the lifetime of
+the sniffer and, when ``cache_path`` is given, in a SQLite database so later
+runs do not read unchanged files again. A sniffer may be shared between
+threads (e.g. by concurrent :class:`~sortium.aio.AsyncSorter` jobs); access
+to its cache is serialized.
+"""
+
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple
+
+from .walker import FileEntry
+
+SNIFF_MODES = ("unknown", "always")
+"""``unknown`` sniffs only files whose extension is not recognized;
+``always`` also lets content override a recognized but wrong extension."""
+
+# (offset, magic bytes, extension); the first matching signature wins, so
+# more specific signatures come first.
+SIGNATURES: List[Tuple[int, bytes, str]] = [
+    (0, b"\xff\xd8\xff", ".jpg"),
+    (0, b"\x89PNG\r\n\x1a\n", ".png"),
+    (0, b"GIF87a", ".gif"),
+    (0, b"GIF89a", ".gif"),
+    (0, b"II*\x00", ".tiff"),
+    (0, b"MM\x00*", ".tiff"),
+    (0, b"8BPS", ".psd"),
+    (0, b"%PDF-", ".pdf"),
+    (0, b"{\\rtf", ".rtf"),
+    (0, b"Rar!\x1a\x07", ".rar"),
+    (0, b"7z\xbc\xaf\x27\x1c", ".7z"),
+    (0, b"\x1f\x8b", ".gz"),
+    (0, b"BZh", ".bz2"),
+    (257, b"ustar", ".tar"),
+    (0, b"ID3", ".mp3"),
+    (0, b"OggS", ".ogg"),
+    (0, b"fLaC", ".flac"),
+    (0, b"FLV\x01", ".flv"),
+    (0, b"\x30\x26\xb2\x75\x8e\x66\xcf\x11", ".wmv"),
+    (0, b"\x7fELF", ".bin"),
+    (0, b"\xcf\xfa\xed\xfe", ".bin"),
+    (0, b"\xca\xfe\xba\xbe", ".bin"),
+    (0, b"wOFF", ".woff"),
+    (0, b"wOF2", ".woff2"),
+    (0, b"OTTO", ".otf"),
+    (0, b"\x00\x01\x00\x00\x00", ".ttf"),
+]
+
+_FTYP_BRANDS = {b"qt  ": ".mov", b"heic": ".heic", b"heix": ".heic", b"mif1": ".heic"}
+_RIFF_FORMATS = {b"WAVE": ".wav", b"AVI ": ".avi", b"WEBP": ".webp"}
+_ODF_TYPES = {
+    b"application/vnd.oasis.opendocument.text": ".odt",
+    b"application/vnd.oasis.opendocument.spreadsheet": ".ods",
+    b"application/vnd.oasis.opendocument.presentation": ".odp",
+}
+_ZIP_MARKERS = [
+    (b"word/", ".docx"),
+    (b"xl/", ".xlsx"),
+    (b"ppt/", ".pptx"),
+    (b"AndroidManifest.xml", ".apk"),
+]
+ZIP_CONTAINERS = frozenset(
+    {".docx", ".xlsx", ".pptx", ".odt", ".ods", ".odp", ".epub", ".jar", ".apk"}
+)
+"""ZIP-based formats. Their inner markers may lie past the bytes read, so a
+generic ``.zip`` sniff never overrides one of these extensions."""
+
+# Sizes of the BMP info headers (BITMAPCOREHEADER to BITMAPV5HEADER).
+_BMP_DIB_SIZES = {12, 40, 52, 56, 64, 108, 124}
+
+_MP3_FRAME_SYNC = (b"\xff\xfb", b"\xff\xf3", b"\xff\xf2")
+_AAC_FRAME_SYNC = (b"\xff\xf1", b"\xff\xf9")
+
+_CACHE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sniff_cache (
+    dev INTEGER NOT NULL,
+    ino INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    extension TEXT NOT NULL,
+    PRIMARY KEY (dev, ino)
+);
+"""
+
+_CacheKey = Tuple[int, int, int, int]
+
+
+def _is_bmp(head: bytes) -> bool:
+    """Whether ``head`` starts a BMP file, not just text beginning with "BM".
+
+    Checks the zero reserved field, the info header size and that the
+    pixel data starts after the headers.
+    """
+    if len(head) < 18 or not head.startswith(b"BM") or head[6:10] != b"\0\0\0\0":
+        return False
+    dib_size = int.from_bytes(head[14:18], "little")
+    pixel_offset = int.from_bytes(head[10:14], "little")
+    return dib_size in _BMP_DIB_SIZES and pixel_offset >= 14 + dib_size
+
+
+def _is_pe(head: bytes) -> bool:
+    """Whether ``head`` is a PE executable, not just text beginning with "MZ".
+
+    The DOS header's ``e_lfanew`` must point at a ``PE\\0\\0`` signature
+    within the bytes read.
+    """
+    if len(head) < 64 or not head.startswith(b"MZ"):
+        return False
+    pe_offset = int.from_bytes(head[60:64], "little")
+    return 64 <= pe_offset and head[pe_offset : pe_offset + 4] == b"PE\0\0"
+
+
+def sniff_bytes(head: bytes) -> str | None:
+    """Identifies content from its leading bytes.
+
+    Args:
+        head: The first bytes of a file (512 are enough for every
+            signature in the table).
+
+    Returns:
+        The extension matching the content, or ``None`` if unknown.
+    """
+    if head.startswith(b"PK\x03\x04"):
+        if head[30:38] == b"mimetype":
+            for mime, extension in _ODF_TYPES.items():
+                if head[38 : 38 + len(mime)] == mime:
+                    return extension
+            if head[38:58] == b"application/epub+zip":
+                return ".epub"
+        for marker, extension in _ZIP_MARKERS:
+            if marker in head:
+                return extension
+        return ".zip"
+    if head[4:8] == b"ftyp":
+        brand = head[8:12]
+        if brand.startswith(b"M4A"):
+            return ".m4a"
+        return _FTYP_BRANDS.get(brand, ".mp4")
+    if head.startswith(b"RIFF"):
+        return _RIFF_FORMATS.get(head[8:12])
+    if head.startswith(b"\x1a\x45\xdf\xa3"):
+        return ".webm" if b"webm" in head[:64] else ".mkv"
+    for offset, magic, extension in SIGNATURES:
+        if head[offset : offset + len(magic)] == magic:
+            return extension
+    # Two-byte magics also start ordinary text; validate their headers.
+    if _is_pe(head):
+        return ".exe"
+    if _is_bmp(head):
+        return ".bmp"
+    if head.startswith(_MP3_FRAME_SYNC):
+        return ".mp3"
+    if head.startswith(_AAC_FRAME_SYNC):
+        return ".aac"
+    return None
+
+
+class ContentSniffer:
+    """Classifies files by their leading bytes, with caching.
+
+    Attributes:
+        mode (str): One of :data:`SNIFF_MODES`.
+        head_size (int): Number of bytes read from each file.
+        max_workers (int): Number of reader threads.
+    """
+
+    def __init__(
+        self,
+        mode: str = "unknown",
+        cache_path: str | Path | None = None,
+        max_workers: int = 8,
+        head_size: int = 512,
+        chunk_size: int = 256,
+    ):
+        """Configures the sniffer.
+
+        Args:
+            mode: ``"unknown"`` (default) sniffs only files whose extension
+                is missing or not in the category mapping; ``"always"``
+                sniffs every file and lets a recognized signature override
+                the extension.
+            cache_path: Optional SQLite file persisting results across runs.
+                Like the scan index, it is only a cache and safe to delete.
+            max_workers: Number of threads reading file heads.
+            head_size: Bytes read from the start of each file.
+            chunk_size: Files handed to the thread pool per batch.
+
+        Raises:
+            ValueError: If ``mode`` is not supported.
+        """
+        if mode not in SNIFF_MODES:
+            raise ValueError(
+                f"Unsupported sniff mode '{mode}'. "
+                f"Expected one of: {', '.join(SNIFF_MODES)}."
+            )
+        self.mode = mode
+        self.head_size = head_size
+        self.max_workers = max(1, max_workers)
+        self._chunk_size = max(1, chunk_size)
+        self._memory: Dict[_CacheKey, str] = {}
+        self._lock = threading.Lock()
+        self._db: sqlite3.Connection | None = None
+        if cache_path is not None:
+            cache_file = Path(cache_path)
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                self._db = self._open_cache(cache_file)
+            except sqlite3.DatabaseError:
+                cache_file.unlink(missing_ok=True)
+                self._db = self._open_cache(cache_file)
+
+    @staticmethod
+    def _open_cache(cache_file: Path) -> sqlite3.Connection:
+        # Sorters may run on worker threads (see sortium.aio); the
+        # connection is shared and guarded by ``_lock``.
+        conn = sqlite3.connect(str(cache_file), check_same_thread=False)
+        try:
+            conn.executescript(_CACHE_SCHEMA)
+        except sqlite3.DatabaseError:
+            conn.close()
+            raise
+        return conn
+
+    def _read_head(self, path: str) -> str:
+        try:
+            with open(path, "rb") as stream:
+                return sniff_bytes(stream.read(self.head_size)) or ""
+        except OSError:
+            return ""
+
+    @staticmethod
+    def _key(item: FileEntry) -> _CacheKey | None:
+        try:
+            st = item.stat()
+        except OSError:
+            return None
+        return st.st_dev, st.st_ino, st.st_mtime_ns, st.st_size
+
+    def _cached(self, key: _CacheKey) -> str | None:
+        hit = self._memory.get(key)
+        if hit is not None or self._db is None:
+            return hit
+        with self._lock:
+            row = self._db.execute(
+                "SELECT extension FROM sniff_cache"
+                " WHERE dev = ? AND ino = ? AND mtime_ns = ? AND size = ?",
+                key,
+            ).fetchone()
+        if row is not None:
+            self._memory[key] = row[0]
+            return row[0]
+        return None
+
+    def _store(self, results: List[Tuple[_CacheKey, str]]) -> None:
+        for key, extension in results:
+            self._memory[key] = extension
+        if self._db is not None and results:
+            with self._lock:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO sniff_cache VALUES (?, ?, ?, ?, ?)",
+                    [(*key, extension) for key, extension in results],
+                )
+                self._db.commit()
+
+    def sniff(self, item: FileEntry) -> str | None:
+        """Sniffs a single file on the calling thread.
+
+        Args:
+            item: The file to inspect.
+
+        Returns:
+            The extension matching the content, or ``None`` if unknown.
+        """
+        key = self._key(item)
+        if key is None:
+            return None
+        extension = self._cached(key)
+        if extension is None:
+            extension = self._read_head(item.path)
+            self._store([(key, extension)])
+        return extension or None
+
+    def iter_sniffed(
+        self,
+        items: Iterable[FileEntry],
+        wanted: Callable[[FileEntry], bool],
+    ) -> Iterator[Tuple[FileEntry, str | None]]:
+        """Sniffs a stream of files concurrently, preserving order.
+
+        Args:
+            items: Files to classify.
+            wanted: Predicate selecting the files that need sniffing; the
+                others are passed through with ``None``.
+
+        Yields:
+            ``(item, extension)`` pairs in input order. ``extension`` is
+            ``None`` for files that were not sniffed or not recognized.
+        """
+        iterator = iter(items)
+        with ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="sortium-sniff"
+        ) as pool:
+            while True:
+                chunk = list(islice(iterator, self._chunk_size))
+                if not chunk:
+                    return
+                results: List[str | None] = [None] * len(chunk)
+                to_read: List[Tuple[int, _CacheKey]] = []
+                for pos, item in enumerate(chunk):
+                    if not wanted(item):
+                        continue
+                    key = self._key(item)
+                    if key is None:
+                        continue
+                    cached = self._cached(key)
+                    if cached is None:
+                        to_read.append((pos, key))
+                    else:
+                        results[pos] = cached or None
+                if to_read:
+                    heads = list(
+                        pool.map(self._read_head, (chunk[pos].path for pos, _ in to_read))
+                    )
+                    self._store([(key, ext) for (_, key), ext in zip(to_read, heads)])
+                    for (pos, _), extension in zip(to_read, heads):
+                        results[pos] = extension or None
+                yield from zip(chunk, results)
+
+    def close(self) -> None:
+        """Closes the persistent cache, if any."""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def __enter__(self) -> "ContentSniffer":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
@@ -1,12 +1,67 @@
-import json
-import re
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Tuple
 from uuid import uuid4
 
 from .config import DEFAULT_FILE_TYPES
-from .file_utils import FileUtils
+from .dates import DateBucketer
+from .file_utils import DestinationIndex, FileUtils, _build_ignore_set
+from .instrumentation import Observer, observe_phase, observe_scan
+from .matching import MATCH_MODES, RegexRouter
+from .progress import OperationCancelled, ProgressCallback, ProgressReporter, new_reporter
+from .plans import PLAN_FORMATS, PLAN_SUFFIXES, open_plan_writer, plan_format_for_path
+from .scan_index import ScanIndex
+from .sharding import iter_sharded_entries
+from .sniff import ZIP_CONTAINERS, ContentSniffer
+from .suffix_trie import SuffixTrie
+from .watch import SortWatcher
+from .walker import FileEntry
+
+logger = logging.getLogger(__name__)
+
+COMPOSITE_KEYS = ("type", "extension", "date", "regex")
+"""Built-in sort keys accepted by :meth:`Sorter.sort_by_composite`."""
+
+# sort_by_date workers hand rows over in chunks of this size, with at most
+# this many chunks waiting per category.
+_DATE_CHUNK_SIZE = 256
+_DATE_QUEUE_CHUNKS = 4
+
+
+def _scan_scope(strategy: str, ignore_dir: List[str] | None, dest_root: Path) -> str:
+    """Key separating scan index state of differently configured runs."""
+    ignored = ",".join(sorted(ignore_dir or []))
+    return f"{strategy}|{os.path.abspath(dest_root)}|{ignored}"
+
+
+@contextmanager
+def _scan_index_scope(scan_index: ScanIndex | str | None) -> Iterator[ScanIndex | None]:
+    """Opens a scan index given by path, or passes an open one through.
+
+    The index is committed once the plan is written and rolled back if
+    planning fails or is cancelled, so files of a discarded plan are not
+    recorded as planned.
+    """
+    if scan_index is None:
+        yield None
+        return
+    if isinstance(scan_index, ScanIndex):
+        try:
+            yield scan_index
+        except BaseException:
+            scan_index.rollback()
+            raise
+        scan_index.commit()
+        return
+    with ScanIndex(scan_index) as index:
+        yield index
 
 
 class Sorter:
@@ -21,12 +76,28 @@ class Sorter:
         file_types_dict (Dict[str, List[str]]): A mapping of file category
             names to lists of associated file extensions.
         file_utils (FileUtils): An instance of a file utility class.
+        plan_format (str): Default serialization format for emitted plans.
+        sniffer (ContentSniffer | None): Optional content sniffer used to
+            classify files by their leading bytes.
+        observer (Observer | None): Optional observer receiving phase
+            timings and counters (see :mod:`sortium.instrumentation`).
+        progress (ProgressCallback | None): Optional progress callback (see
+            :mod:`sortium.progress`).
+        progress_interval (float): Minimum seconds between progress reports.
+        suffix_trie (SuffixTrie): Matcher for the extensions of
+            ``file_types_dict``. Compound extensions such as ``.tar.gz`` are
+            recognized by every strategy that looks at extensions.
     """
 
     def __init__(
         self,
         file_types_dict: Dict[str, List[str]] = None,
         file_utils: FileUtils = None,
+        plan_format: str = "json",
+        sniffer: ContentSniffer | None = None,
+        observer: Observer | None = None,
+        progress: ProgressCallback | None = None,
+        progress_interval: float = 0.5,
     ):
         """Initializes the Sorter instance.
 
@@ -36,14 +107,58 @@ class Sorter:
                 ``DEFAULT_FILE_TYPES``.
             file_utils (FileUtils, optional): An instance of FileUtils.
                 Defaults to a new ``FileUtils()`` instance.
+            plan_format (str, optional): Format used for plans whose
+                ``plan_output`` suffix does not name one. ``"json"`` writes
+                the version 1 JSON document, ``"jsonl"`` writes streaming
+                JSON Lines and ``"binary"`` writes the compact,
+                memory-mappable version 2 format. Defaults to ``"json"``.
+            sniffer (ContentSniffer, optional): Content sniffer used by type
+                classification (``sort_by_type`` and the composite
+                ``"type"`` key) for files whose extension is missing or
+                unknown, or for every file in ``"always"`` mode. Defaults to
+                ``None`` (extension only).
+            observer (Observer, optional): Observer notified of the
+                ``plan``, ``scan``, ``probe`` and ``serialize`` phases of
+                every plan and of their counters. It is also handed to the
+                default ``FileUtils``; a ``file_utils`` passed in keeps its
+                own observer. Defaults to ``None`` (no instrumentation).
+            progress (ProgressCallback, optional): Callback receiving a
+                :class:`~sortium.progress.Progress` snapshot as plan entries
+                are produced (phase ``"plan"``). Returning ``False`` cancels
+                planning: the partial plan is deleted and
+                :class:`~sortium.progress.OperationCancelled` is raised. Like
+                ``observer``, it is handed to the default ``FileUtils`` so
+                ``auto_apply`` reports too.
+            progress_interval (float, optional): Minimum seconds between two
+                progress reports. Defaults to ``0.5``.
+
+        Raises:
+            ValueError: If ``plan_format`` is not supported.
         """
+        if plan_format not in PLAN_FORMATS:
+            raise ValueError(
+                f"Unsupported plan format '{plan_format}'. "
+                f"Expected one of: {', '.join(PLAN_FORMATS)}."
+            )
         self.file_types_dict = file_types_dict or DEFAULT_FILE_TYPES
-        self.file_utils = file_utils or FileUtils()
+        self.file_utils = file_utils or FileUtils(
+            observer=observer, progress=progress, progress_interval=progress_interval
+        )
+        self.observer = observer
+        self.progress = progress
+        self.progress_interval = progress_interval
+        self.plan_format = plan_format
+        self.sniffer = sniffer
         self.extension_to_category = {
             ext.lower(): category
             for category, extensions in self.file_types_dict.items()
             for ext in extensions
         }
+        self.suffix_trie = SuffixTrie(self.extension_to_category)
+
+    def _extension_of(self, item: FileEntry) -> str:
+        """Lower-cased extension of ``item``, compound ones (``.tar.gz``) included."""
+        return self.suffix_trie.match(item.name)
 
     def _get_category(self, extension: str) -> str:
         """Determines the category for a file extension.
@@ -56,10 +171,50 @@ class Sorter:
         """
         return self.extension_to_category.get(extension.lower(), "Others")
 
+    def _needs_sniff(self, item: FileEntry) -> bool:
+        """Whether the sniffer should look at ``item``'s content."""
+        return (
+            self.sniffer.mode == "always"
+            or self._extension_of(item) not in self.extension_to_category
+        )
+
+    def _trusted_sniff(self, item: FileEntry, sniffed: str | None) -> str | None:
+        """``sniffed`` if it may classify ``item``, else ``None``.
+
+        The sniffed extension must be mapped, and a generic ``.zip`` does
+        not override a ZIP-based extension such as ``.docx``.
+        """
+        if sniffed is None or sniffed not in self.extension_to_category:
+            return None
+        if sniffed == ".zip" and self._extension_of(item) in ZIP_CONTAINERS:
+            return None
+        return sniffed
+
+    def _classify(self, item: FileEntry, sniffed: str | None) -> str:
+        """Category of ``item``, preferring a trusted sniffed extension."""
+        sniffed = self._trusted_sniff(item, sniffed)
+        if sniffed is not None:
+            return self.extension_to_category[sniffed]
+        return self._get_category(self._extension_of(item))
+
+    def _iter_classified(
+        self, items: Iterable[FileEntry]
+    ) -> Iterator[Tuple[FileEntry, str, str | None]]:
+        """Yields ``(item, category, sniffed_extension)`` for type sorting."""
+        if self.sniffer is None:
+            mapping = self.extension_to_category
+            match = self.suffix_trie.match
+            for item in items:
+                yield item, mapping.get(match(item.name), "Others"), None
+            return
+        for item, sniffed in self.sniffer.iter_sniffed(items, self._needs_sniff):
+            sniffed = self._trusted_sniff(item, sniffed)
+            yield item, self._classify(item, sniffed), sniffed
+
     def _resolve_plan_path(
         self, base_folder: Path, strategy: str, plan_output: str | None
     ) -> Path:
-        """Determines where a plan JSON should be written.
+        """Determines where a plan should be written.
 
         Args:
             base_folder: Folder whose name seeds the default plan location.
@@ -67,60 +222,488 @@ class Sorter:
             plan_output: Optional explicit path supplied by the caller.
 
         Returns:
-            Absolute path where the JSON plan will be saved.
+            Absolute path where the plan will be saved.
         """
 
         if plan_output:
             return Path(plan_output)
-        timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
-        return base_folder / f"sortium_plan_{strategy}_{timestamp}.json"
+        timestamp = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
+        suffix = PLAN_SUFFIXES[self.plan_format]
+        return base_folder / f"sortium_plan_{strategy}_{timestamp}{suffix}"
 
     def _write_plan(
         self,
         strategy: str,
         source_root: Path,
         destination_root: Path,
-        entries: List[Dict[str, Any]],
+        entries: Iterable[Dict[str, Any]],
         plan_output: str | None,
         extra_metadata: Dict[str, Any] | None = None,
     ) -> Path:
         """Persists a move plan to disk and returns the resulting path.
 
+        Entries are written as they are produced, so ``entries`` may be a
+        lazy generator and the plan is never held in memory as a whole.
+
         Args:
             strategy: Sorting strategy identifier (type/date/regex/extension).
             source_root: Root directory scanned when generating the plan.
             destination_root: Base directory files will ultimately move into.
-            entries: List of per-file plan entries.
-            plan_output: Optional custom path for the output JSON file.
+            entries: Iterable of per-file plan entries.
+            plan_output: Optional custom path for the output plan file. A
+                ``.json``, ``.jsonl`` or ``.splan`` suffix selects the plan
+                format.
             extra_metadata: Optional dictionary merged into the plan payload.
 
         Returns:
-            Path to the serialized JSON plan on disk.
+            Path to the serialized plan on disk.
+
+        Raises:
+            OperationCancelled: If the progress callback cancelled; the
+                partial plan file is removed.
         """
 
-        plan_payload: Dict[str, Any] = {
+        header: Dict[str, Any] = {
             "plan_id": str(uuid4()),
             "version": 1,
             "strategy": strategy,
             "generated_at": datetime.now(timezone.utc).isoformat(),
             "source_root": str(source_root),
             "destination_root": str(destination_root),
-            "entry_count": len(entries),
-            "entries": entries,
         }
         if extra_metadata:
-            plan_payload["metadata"] = extra_metadata
+            header["metadata"] = extra_metadata
 
         plan_path = self._resolve_plan_path(source_root, strategy, plan_output)
-        plan_path.parent.mkdir(parents=True, exist_ok=True)
-        with plan_path.open("w", encoding="utf-8") as plan_file:
-            json.dump(plan_payload, plan_file, indent=2)
+        plan_format = plan_format_for_path(plan_path, self.plan_format)
+        observer = self.observer
+        reporter = new_reporter(self.progress, "plan", None, self.progress_interval)
+        if reporter is not None:
+            entries = self._iter_reported(entries, reporter)
+        try:
+            with observe_phase(observer, "plan"), open_plan_writer(
+                plan_path, header, plan_format
+            ) as writer:
+                if observer is None:
+                    for entry in entries:
+                        writer.write(entry)
+                else:
+                    clock = time.perf_counter
+                    for entry in entries:
+                        observer.phase_started("serialize")
+                        start = clock()
+                        writer.write(entry)
+                        observer.phase_finished("serialize", clock() - start)
+        except OperationCancelled:
+            plan_path.unlink(missing_ok=True)
+            raise
 
-        print(
-            f"Sort plan for strategy '{strategy}' written to '{plan_path}'."
-        )
+        logger.info("Sort plan for strategy '%s' written to '%s'.", strategy, plan_path)
         return plan_path
 
+    @staticmethod
+    def _iter_reported(
+        entries: Iterable[Dict[str, Any]], reporter: ProgressReporter
+    ) -> Iterator[Dict[str, Any]]:
+        """Reports planning progress, one file per entry."""
+        for entry in entries:
+            if not reporter.advance():
+                reporter.finish()
+                raise reporter.cancel()
+            yield entry
+        reporter.finish()
+
+    def _iter_source_files(
+        self,
+        folder_path: Path,
+        ignore_dir: List[str] | None,
+        recursive: bool,
+        plan_path: Path,
+        scan_index: ScanIndex | None = None,
+        scope: str = "",
+        observe: bool = True,
+    ) -> Iterator[FileEntry]:
+        """Yields the files to plan, leaving out the plan file itself.
+
+        Plans are streamed to disk while the tree is still being scanned, so
+        a plan written inside the scanned folder must not plan its own move.
+        With a ``scan_index``, only files that are new or changed since they
+        were last recorded in the index are yielded. Pass ``observe=False``
+        when iterating off the driving thread, which must not report phases.
+        """
+        if scan_index is not None:
+            file_iterator = scan_index.iter_changed_files(
+                folder_path, _build_ignore_set(ignore_dir), recursive, scope
+            )
+        elif recursive:
+            file_iterator = self.file_utils.iter_all_files_recursive(
+                str(folder_path), ignore_dir, as_entries=True
+            )
+        else:
+            file_iterator = self.file_utils.iter_shallow_files(
+                str(folder_path), ignore_dir, as_entries=True
+            )
+        if observe and self.observer is not None:
+            file_iterator = observe_scan(file_iterator, self.observer)
+        plan_name = plan_path.name
+        plan_abs = os.path.abspath(plan_path)
+        for item in file_iterator:
+            if item.name == plan_name and os.path.abspath(item.path) == plan_abs:
+                continue
+            yield item
+
+    def _iter_type_entries(
+        self,
+        source_folder: Path,
+        dest_base_folder: Path,
+        ignore_dir: List[str] | None,
+        recursive: bool,
+        plan_path: Path,
+        scan_index: ScanIndex | None = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """Yields ``sort_by_type`` plan entries."""
+        index = DestinationIndex()
+        scope = _scan_scope("type", ignore_dir, dest_base_folder)
+        files = self._iter_source_files(
+            source_folder, ignore_dir, recursive, plan_path, scan_index, scope
+        )
+        for item, category, sniffed in self._iter_classified(files):
+            dest_folder = dest_base_folder / category
+            planned_path = self.file_utils.plan_destination_path(
+                item.path, str(dest_folder), index
+            )
+            if scan_index is not None:
+                scan_index.record(item, category)
+            entry = {
+                "source_path": item.path,
+                "destination_path": str(planned_path),
+                "category": category,
+                "extension": self._extension_of(item),
+            }
+            if sniffed is not None:
+                entry["sniffed_extension"] = sniffed
+            yield entry
+
+    def _bucket_files(
+        self,
+        category_folder: Path,
+        recursive: bool,
+        plan_path: Path,
+        bucketer: DateBucketer,
+        rows: queue.Queue,
+        stop: threading.Event,
+    ) -> None:
+        """Streams ``(path, date folder, timestamp)`` chunks into ``rows``.
+
+        Runs on a worker thread: files are stat-ed once, through the
+        walker's entry, and counted rather than reported as scan phases.
+        ``None`` marks the end of the category; once ``stop`` is set the
+        worker gives up instead of waiting for room in ``rows``.
+        """
+        observer = self.observer
+        bucket = bucketer.bucket
+        scanned = 0
+
+        def put(value: Any) -> bool:
+            while not stop.is_set():
+                try:
+                    rows.put(value, timeout=0.05)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        chunk: List[Tuple[str, str, datetime]] = []
+        try:
+            for item in self._iter_source_files(
+                category_folder, None, recursive, plan_path, observe=False
+            ):
+                scanned += 1
+                try:
+                    label, moment = bucket(item.stat())
+                except (OSError, OverflowError, ValueError) as exc:
+                    logger.warning("Could not evaluate file '%s': %s", item.name, exc)
+                    if observer is not None:
+                        observer.count("errors")
+                    continue
+                chunk.append((item.path, label, moment))
+                if len(chunk) == _DATE_CHUNK_SIZE:
+                    if not put(chunk):
+                        return
+                    chunk = []
+            if chunk:
+                put(chunk)
+        finally:
+            if observer is not None:
+                observer.count("files_scanned", scanned)
+            put(None)
+
+    def _iter_bucketed_rows(
+        self, rows: queue.Queue, future: Future
+    ) -> Iterator[Tuple[str, str, datetime]]:
+        """Yields a category's rows as its worker produces them.
+
+        Waiting for a chunk is reported as a ``scan`` slice when observed.
+        """
+        observer = self.observer
+        while True:
+            if observer is None:
+                chunk = rows.get()
+            else:
+                observer.phase_started("scan")
+                start = time.perf_counter()
+                chunk = rows.get()
+                observer.phase_finished("scan", time.perf_counter() - start)
+            if chunk is None:
+                # Re-raises an error that ended the worker early.
+                future.result()
+                return
+            yield from chunk
+
+    def _iter_date_entries(
+        self,
+        source_root: Path,
+        folder_types: List[str],
+        dest_root: Path,
+        recursive: bool,
+        plan_path: Path,
+        bucketer: DateBucketer,
+        max_workers: int = 4,
+    ) -> Iterator[Dict[str, Any]]:
+        """Yields ``sort_by_date`` plan entries.
+
+        Categories are scanned and bucketed concurrently; entries follow the
+        order of ``folder_types`` so the plan does not depend on timing.
+        Each worker hands its rows over through a bounded queue, so memory
+        stays constant however many files a category holds.
+        """
+        categories = []
+        for folder_type in folder_types:
+            category_folder = source_root / folder_type
+            if not category_folder.is_dir():
+                logger.warning("Category folder '%s' not found, skipping.", category_folder)
+                continue
+            categories.append((folder_type, category_folder))
+        if not categories:
+            return
+
+        index = DestinationIndex()
+        field = bucketer.field
+        stop = threading.Event()
+        with ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="sortium-date"
+        ) as pool:
+            streams = []
+            for folder_type, category_folder in categories:
+                rows: queue.Queue = queue.Queue(maxsize=_DATE_QUEUE_CHUNKS)
+                future = pool.submit(
+                    self._bucket_files,
+                    category_folder,
+                    recursive,
+                    plan_path,
+                    bucketer,
+                    rows,
+                    stop,
+                )
+                streams.append((folder_type, rows, future))
+            try:
+                for folder_type, rows, future in streams:
+                    dest_folders: Dict[str, str] = {}
+                    for path, label, moment in self._iter_bucketed_rows(rows, future):
+                        dest_folder = dest_folders.get(label)
+                        if dest_folder is None:
+                            dest_folder = dest_folders[label] = str(
+                                dest_root / folder_type / label
+                            )
+                        planned_path = self.file_utils.plan_destination_path(
+                            path, dest_folder, index
+                        )
+                        yield {
+                            "source_path": path,
+                            "destination_path": str(planned_path),
+                            "category": folder_type,
+                            "date_folder": label,
+                            field: moment.isoformat(),
+                        }
+            finally:
+                stop.set()
+                for _, _, future in streams:
+                    future.cancel()
+
+    def _iter_regex_entries(
+        self,
+        source_path: Path,
+        regex: Dict[str, str],
+        dest_base_path: Path,
+        recursive: bool,
+        plan_path: Path,
+        match_mode: str = "match",
+    ) -> Iterator[Dict[str, Any]]:
+        """Yields ``sort_by_regex`` plan entries."""
+        index = DestinationIndex()
+        router = RegexRouter(regex, match_mode)
+        for file_path in self._iter_source_files(
+            source_path, None, recursive, plan_path
+        ):
+            routed = router.route(file_path.name)
+            if routed is None:
+                continue
+            category, pattern = routed
+            dest_folder = dest_base_path / category
+            planned_path = self.file_utils.plan_destination_path(
+                file_path.path, str(dest_folder), index
+            )
+            yield {
+                "source_path": file_path.path,
+                "destination_path": str(planned_path),
+                "category": category,
+                "pattern": pattern,
+            }
+
+    def _iter_extension_entries(
+        self,
+        source_folder: Path,
+        dest_base_folder: Path,
+        ignore_dir: List[str] | None,
+        recursive: bool,
+        plan_path: Path,
+        scan_index: ScanIndex | None = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """Yields ``sort_by_extension`` plan entries."""
+        index = DestinationIndex()
+        scope = _scan_scope("extension", ignore_dir, dest_base_folder)
+        for item in self._iter_source_files(
+            source_folder, ignore_dir, recursive, plan_path, scan_index, scope
+        ):
+            extension = self._extension_of(item).lstrip(".")
+            dest_folder = dest_base_folder / extension if extension else dest_base_folder
+            planned_path = self.file_utils.plan_destination_path(
+                item.path, str(dest_folder), index
+            )
+            if scan_index is not None:
+                scan_index.record(item, extension)
+            yield {
+                "source_path": item.path,
+                "destination_path": str(planned_path),
+                "extension": extension,
+            }
+
+    def _check_sharding(
+        self,
+        processes: int | None,
+        scan_index: ScanIndex | str | None,
+        sniffs: bool = True,
+    ) -> None:
+        """Rejects options that sharded planning does not support."""
+        if not processes:
+            return
+        if scan_index is not None:
+            raise ValueError("Sharded planning cannot be combined with a scan index.")
+        if sniffs and self.sniffer is not None:
+            raise ValueError("Sharded planning cannot be combined with a content sniffer.")
+
+    def _iter_sharded_entries(
+        self,
+        strategy: str,
+        source_folder: Path,
+        dest_base_folder: Path,
+        ignore_dir: List[str] | None,
+        recursive: bool,
+        plan_path: Path,
+        processes: int,
+    ) -> Iterator[Dict[str, Any]]:
+        """Yields plan entries produced on a process pool."""
+        return iter_sharded_entries(
+            strategy,
+            str(source_folder),
+            str(dest_base_folder),
+            _build_ignore_set(ignore_dir),
+            recursive,
+            str(plan_path),
+            self.extension_to_category,
+            self.suffix_trie,
+            processes,
+        )
+
+    def _composite_key(
+        self,
+        key: str | Callable[[FileEntry], str | None],
+        regex: Dict[str, str] | None,
+        match_mode: str,
+        date_format: str,
+    ) -> Callable[[FileEntry], str | None]:
+        """Resolves one level of a composite sort into a key function."""
+        if callable(key):
+            return key
+        if key == "type":
+            if self.sniffer is None:
+                return lambda item: self._get_category(self._extension_of(item))
+            return lambda item: self._classify(
+                item, self.sniffer.sniff(item) if self._needs_sniff(item) else None
+            )
+        if key == "extension":
+            return lambda item: self._extension_of(item).lstrip(".")
+        if key == "date":
+            return lambda item: datetime.fromtimestamp(item.stat().st_mtime).strftime(
+                date_format
+            )
+        if key == "regex":
+            if not regex:
+                raise ValueError("The 'regex' composite key requires a regex table.")
+            router = RegexRouter(regex, match_mode)
+
+            def regex_key(item: FileEntry) -> str | None:
+                routed = router.route(item.name)
+                return routed[0] if routed else None
+
+            return regex_key
+        raise ValueError(
+            f"Unsupported composite key '{key}'. "
+            f"Expected one of: {', '.join(COMPOSITE_KEYS)} or a callable."
+        )
+
+    def _iter_composite_entries(
+        self,
+        source_folder: Path,
+        dest_base_folder: Path,
+        key_funcs: List[Callable[[FileEntry], str | None]],
+        ignore_dir: List[str] | None,
+        recursive: bool,
+        plan_path: Path,
+    ) -> Iterator[Dict[str, Any]]:
+        """Yields ``sort_by_composite`` plan entries."""
+        index = DestinationIndex()
+        for item in self._iter_source_files(
+            source_folder, ignore_dir, recursive, plan_path
+        ):
+            levels: List[str] | None = []
+            try:
+                for key_func in key_funcs:
+                    level = key_func(item)
+                    if level is None:
+                        levels = None
+                        break
+                    if level:
+                        levels.append(level)
+            except OSError as exc:
+                logger.warning("Could not evaluate file '%s': %s", item.name, exc)
+                if self.observer is not None:
+                    self.observer.count("errors")
+                continue
+            if levels is None:
+                continue
+
+            dest_folder = dest_base_folder.joinpath(*levels)
+            planned_path = self.file_utils.plan_destination_path(
+                item.path, str(dest_folder), index
+            )
+            yield {
+                "source_path": item.path,
+                "destination_path": str(planned_path),
+                "category": levels[0] if levels else None,
+                "levels": levels,
+            }
+
     def sort_by_type(
         self,
         folder_path: str,
@@ -129,6 +712,8 @@ class Sorter:
         plan_output: str | None = None,
         auto_apply: bool = False,
         recursive: bool = False,
+        scan_index: ScanIndex | str | None = None,
+        processes: int | None = None,
     ) -> Path:
         """Generates a plan to sort files into subdirectories by file type.
 
@@ -145,56 +730,64 @@ class Sorter:
             dest_folder_path: Base directory for the sorted category folders.
                 Falls back to ``folder_path`` when ``None``.
             ignore_dir: Optional directory names to skip when scanning.
-            plan_output: Optional JSON path override for the emitted plan.
+            plan_output: Optional path override for the emitted plan. A
+                ``.jsonl`` suffix writes a streaming JSON Lines plan and
+                ``.splan`` a binary plan.
             auto_apply: If ``True``, immediately executes the generated plan.
             recursive: When ``True``, recursively scans nested folders.
+            scan_index: Optional :class:`~sortium.scan_index.ScanIndex`, or
+                the path of its database, enabling incremental planning. Only
+                files that are new or changed since an earlier run recorded
+                them are planned, and directories whose mtime is unchanged
+                are not listed again. See ``ScanIndex.stats`` for what the
+                index saved.
+            processes: When given, plans on a pool of this many processes,
+                sharding the tree by top-level subdirectory (see
+                :mod:`sortium.sharding`). Cannot be combined with
+                ``scan_index`` or a sniffer. Destination names are still
+                resolved and the plan written on one thread, so a few
+                processes give most of the speedup.
 
         Returns:
-            Path to the JSON plan file.
+            Path to the plan file.
 
         Raises:
             FileNotFoundError: If ``folder_path`` does not exist.
+            ValueError: If ``processes`` is combined with ``scan_index`` or
+                a sniffer.
         """
         source_folder = Path(folder_path)
         if not source_folder.exists():
             raise FileNotFoundError(f"The path '{source_folder}' does not exist.")
         dest_base_folder = Path(dest_folder_path) if dest_folder_path else source_folder
+        self._check_sharding(processes, scan_index)
 
-        entries: List[Dict[str, Any]] = []
-        file_iterator = (
-            self.file_utils.iter_all_files_recursive(str(source_folder), ignore_dir)
-            if recursive
-            else self.file_utils.iter_shallow_files(str(source_folder), ignore_dir)
-        )
+        plan_path = self._resolve_plan_path(source_folder, "type", plan_output)
+        with _scan_index_scope(scan_index) as index:
+            if processes:
+                entries = self._iter_sharded_entries(
+                    "type", source_folder, dest_base_folder, ignore_dir, recursive,
+                    plan_path, processes,
+                )
+            else:
+                entries = self._iter_type_entries(
+                    source_folder, dest_base_folder, ignore_dir, recursive, plan_path, index
+                )
 
-        for item in file_iterator:
-            category = self._get_category(item.suffix)
-            dest_folder = dest_base_folder / category
-            planned_path = self.file_utils.plan_destination_path(
-                str(item), str(dest_folder)
-            )
-            entries.append(
-                {
-                    "source_path": str(item),
-                    "destination_path": str(planned_path),
-                    "category": category,
-                    "extension": item.suffix.lower(),
-                }
+            plan_path = self._write_plan(
+                strategy="type",
+                source_root=source_folder,
+                destination_root=dest_base_folder,
+                entries=entries,
+                plan_output=str(plan_path),
+                extra_metadata={
+                    "ignored": list(ignore_dir or []),
+                    "file_types": self.file_types_dict,
+                    "recursive": recursive,
+                    "incremental": index is not None,
+                },
             )
 
-        plan_path = self._write_plan(
-            strategy="type",
-            source_root=source_folder,
-            destination_root=dest_base_folder,
-            entries=entries,
-            plan_output=plan_output,
-            extra_metadata={
-                "ignored": list(ignore_dir or []),
-                "file_types": self.file_types_dict,
-                "recursive": recursive,
-            },
-        )
-
         if auto_apply:
             self.file_utils.apply_move_plan(str(plan_path))
 
@@ -208,82 +801,69 @@ class Sorter:
         plan_output: str | None = None,
         auto_apply: bool = False,
         recursive: bool = False,
+        granularity: str = "day",
+        date_source: str = "mtime",
+        date_format: str | None = None,
+        max_workers: int = 4,
     ) -> Path:
-        """Generates a plan to sort files within categories by modification date.
+        """Generates a plan to sort files within categories by date.
 
         Files are moved into date-stamped subfolders (e.g., "01-Jan-2023"). Set
         ``recursive`` to pull in files from nested directories within each
-        category.
+        category. Each file is stat-ed once and categories are scanned
+        concurrently; see :mod:`sortium.dates` for the buckets.
 
         Args:
             folder_path: Root directory containing the category folders to process.
             folder_types: List of category folder names (e.g., ['Images']).
             dest_folder_path: Base directory for the sorted folders. Defaults
                 to ``folder_path`` when ``None``.
-            plan_output: Optional JSON path override for the emitted plan.
+            plan_output: Optional path override for the emitted plan. A
+                ``.jsonl`` suffix writes a streaming JSON Lines plan and
+                ``.splan`` a binary plan.
             auto_apply: If ``True``, immediately executes the generated plan.
             recursive: When ``True``, scans inside nested directories under
                 each category.
+            granularity: Bucket size: ``"year"``, ``"month"``, ``"week"``
+                (ISO week) or ``"day"``.
+            date_source: Timestamp to bucket on: ``"mtime"``, ``"ctime"``
+                or ``"birthtime"``.
+            date_format: ``strftime`` format of the folder names, applied
+                to the first day of each bucket. Defaults to a format
+                suited to ``granularity``.
+            max_workers: Number of categories scanned at once.
 
         Returns:
-            Path to the JSON plan file.
+            Path to the plan file.
 
         Raises:
             FileNotFoundError: If ``folder_path`` does not exist.
+            ValueError: If ``granularity`` or ``date_source`` is unsupported.
         """
         source_root = Path(folder_path)
         if not source_root.exists():
             raise FileNotFoundError(f"The path '{source_root}' does not exist.")
         dest_root = Path(dest_folder_path) if dest_folder_path else source_root
+        bucketer = DateBucketer(granularity, date_source, date_format)
 
-        entries: List[Dict[str, Any]] = []
-        for folder_type in folder_types:
-            category_folder = source_root / folder_type
-            if not category_folder.is_dir():
-                print(f"Category folder '{category_folder}' not found, skipping.")
-                continue
-
-            if recursive:
-                file_iter = self.file_utils.iter_all_files_recursive(
-                    str(category_folder)
-                )
-            else:
-                file_iter = category_folder.iterdir()
-
-            for file_path in file_iter:
-                if not file_path.is_file():
-                    continue
-
-                try:
-                    modified = self.file_utils.get_file_modified_date(str(file_path))
-                except Exception as exc:
-                    print(f"Could not evaluate file '{file_path.name}': {exc}")
-                    continue
-
-                date_str = modified.strftime("%d-%b-%Y")
-                final_dest_folder = dest_root / folder_type / date_str
-                planned_path = self.file_utils.plan_destination_path(
-                    str(file_path), str(final_dest_folder)
-                )
-                entries.append(
-                    {
-                        "source_path": str(file_path),
-                        "destination_path": str(planned_path),
-                        "category": folder_type,
-                        "date_folder": date_str,
-                        "modified_at": modified.isoformat(),
-                    }
-                )
+        plan_path = self._resolve_plan_path(source_root, "date", plan_output)
+        entries = self._iter_date_entries(
+            source_root, folder_types, dest_root, recursive, plan_path, bucketer,
+            max_workers,
+        )
 
         plan_path = self._write_plan(
             strategy="date",
             source_root=source_root,
             destination_root=dest_root,
             entries=entries,
-            plan_output=plan_output,
+            plan_output=str(plan_path),
             extra_metadata={
                 "folder_types": folder_types,
                 "recursive": recursive,
+                "granularity": granularity,
+                "date_source": date_source,
+                "date_format": bucketer.date_format,
             },
         )
 
@@ -300,63 +880,63 @@ class Sorter:
         plan_output: str | None = None,
         auto_apply: bool = False,
         recursive: bool = True,
+        match_mode: str = "match",
     ) -> Path:
         """Generates a plan to sort files recursively based on regex patterns.
 
         Scans ``folder_path`` (optionally including subdirectories) for files
         whose names match the provided regex patterns, then moves them to
-        categorized folders within ``dest_folder_path``.
+        categorized folders within ``dest_folder_path``. Patterns are tried
+        in order and the first match wins; the whole rule table is compiled
+        once into a single matcher (see :class:`~sortium.matching.RegexRouter`).
 
         Args:
             folder_path: Path to the directory to scan recursively.
             regex: Dictionary mapping category names to regex patterns.
             dest_folder_path: Base directory where sorted files will be moved.
-            plan_output: Optional JSON path override for the emitted plan.
+            plan_output: Optional path override for the emitted plan. A
+                ``.jsonl`` suffix writes a streaming JSON Lines plan and
+                ``.splan`` a binary plan.
             auto_apply: If ``True``, immediately executes the generated plan.
             recursive: When ``True`` (default), recursively scans the folder.
+            match_mode: How patterns are applied to file names: ``"match"``
+                (default, anchored at the start), ``"search"`` (anywhere) or
+                ``"fullmatch"`` (the whole name).
 
         Returns:
-            Path to the JSON plan file.
+            Path to the plan file.
 
         Raises:
             FileNotFoundError: If ``folder_path`` does not exist.
+            ValueError: If ``match_mode`` is not supported.
             RuntimeError: If a critical error occurs while preparing the plan.
         """
         source_path = Path(folder_path)
         if not source_path.exists():
             raise FileNotFoundError(f"The path '{source_path}' does not exist.")
         dest_base_path = Path(dest_folder_path)
+        if match_mode not in MATCH_MODES:
+            raise ValueError(
+                f"Unsupported match mode '{match_mode}'. "
+                f"Expected one of: {', '.join(MATCH_MODES)}."
+            )
 
-        entries: List[Dict[str, Any]] = []
-        file_generator = (
-            self.file_utils.iter_all_files_recursive(str(source_path))
-            if recursive
-            else self.file_utils.iter_shallow_files(str(source_path))
+        plan_path = self._resolve_plan_path(source_path, "regex", plan_output)
+        entries = self._iter_regex_entries(
+            source_path, regex, dest_base_path, recursive, plan_path, match_mode
         )
-        for file_path in file_generator:
-            for category, pattern in regex.items():
-                if re.match(pattern, file_path.name):
-                    dest_folder = dest_base_path / category
-                    planned_path = self.file_utils.plan_destination_path(
-                        str(file_path), str(dest_folder)
-                    )
-                    entries.append(
-                        {
-                            "source_path": str(file_path),
-                            "destination_path": str(planned_path),
-                            "category": category,
-                            "pattern": pattern,
-                        }
-                    )
-                    break
 
         plan_path = self._write_plan(
             strategy="regex",
             source_root=source_path,
             destination_root=dest_base_path,
             entries=entries,
-            plan_output=plan_output,
-            extra_metadata={"regex": regex, "recursive": recursive},
+            plan_output=str(plan_path),
+            extra_metadata={
+                "regex": regex,
+                "recursive": recursive,
+                "match_mode": match_mode,
+            },
         )
 
         if auto_apply:
@@ -372,6 +952,8 @@ class Sorter:
         plan_output: str | None = None,
         auto_apply: bool = False,
         recursive: bool = True,
+        scan_index: ScanIndex | str | None = None,
+        processes: int | None = None,
     ) -> Path:
         """Generates a plan to sort files by extension into subdirectories.
 
@@ -380,55 +962,217 @@ class Sorter:
             dest_folder_path: Base directory for the sorted category folders.
                 Falls back to ``folder_path`` when ``None``.
             ignore_dir: Optional directory names to skip when scanning.
-            plan_output: Optional JSON path override for the emitted plan.
+            plan_output: Optional path override for the emitted plan. A
+                ``.jsonl`` suffix writes a streaming JSON Lines plan and
+                ``.splan`` a binary plan.
             auto_apply: If ``True``, immediately executes the generated plan.
             recursive: When ``True`` (default), recursively scans the tree.
+            scan_index: Optional :class:`~sortium.scan_index.ScanIndex`, or
+                the path of its database, enabling incremental planning. Only
+                files that are new or changed since an earlier run recorded
+                them are planned, and directories whose mtime is unchanged
+                are not listed again. See ``ScanIndex.stats`` for what the
+                index saved.
+            processes: When given, plans on a pool of this many processes,
+                sharding the tree by top-level subdirectory (see
+                :mod:`sortium.sharding`). Cannot be combined with
+                ``scan_index``. Destination names are still
+                resolved and the plan written on one thread, so a few
+                processes give most of the speedup.
 
         Returns:
-            Path to the JSON plan file.
+            Path to the plan file.
 
         Raises:
             FileNotFoundError: If ``folder_path`` does not exist.
+            ValueError: If ``processes`` is combined with ``scan_index``.
         """
         source_folder = Path(folder_path)
         if not source_folder.exists():
             raise FileNotFoundError(f"The path '{source_folder}' does not exist.")
         dest_base_folder = Path(dest_folder_path) if dest_folder_path else source_folder
+        self._check_sharding(processes, scan_index, sniffs=False)
 
-        entries: List[Dict[str, Any]] = []
-        file_iterator = (
-            self.file_utils.iter_all_files_recursive(str(source_folder), ignore_dir)
-            if recursive
-            else self.file_utils.iter_shallow_files(str(source_folder), ignore_dir)
-        )
+        plan_path = self._resolve_plan_path(source_folder, "extension", plan_output)
+        with _scan_index_scope(scan_index) as index:
+            if processes:
+                entries = self._iter_sharded_entries(
+                    "extension", source_folder, dest_base_folder, ignore_dir, recursive,
+                    plan_path, processes,
+                )
+            else:
+                entries = self._iter_extension_entries(
+                    source_folder, dest_base_folder, ignore_dir, recursive, plan_path, index
+                )
 
-        for item in file_iterator:
-            extension = item.suffix.lower().lstrip(".")
-            dest_folder = dest_base_folder / extension if extension else dest_base_folder
-            planned_path = self.file_utils.plan_destination_path(
-                str(item), str(dest_folder)
-            )
-            entries.append(
-                {
-                    "source_path": str(item),
-                    "destination_path": str(planned_path),
-                    "extension": extension,
-                }
+            plan_path = self._write_plan(
+                strategy="extension",
+                source_root=source_folder,
+                destination_root=dest_base_folder,
+                entries=entries,
+                plan_output=str(plan_path),
+                extra_metadata={
+                    "ignored": list(ignore_dir or []),
+                    "recursive": recursive,
+                    "incremental": index is not None,
+                },
             )
 
+        if auto_apply:
+            self.file_utils.apply_move_plan(str(plan_path))
+
+        return plan_path
+
+    def sort_by_composite(
+        self,
+        folder_path: str,
+        keys: List[str | Callable[[FileEntry], str | None]],
+        dest_folder_path: str | None = None,
+        ignore_dir: List[str] | None = None,
+        plan_output: str | None = None,
+        auto_apply: bool = False,
+        recursive: bool = True,
+        regex: Dict[str, str] | None = None,
+        match_mode: str = "match",
+        date_format: str = "%d-%b-%Y",
+    ) -> Path:
+        """Generates a plan nesting several sort criteria in one pass.
+
+        Each key contributes one folder level, so ``["type", "date"]`` yields
+        layouts such as ``Images/03-Jan-2024/photo.jpg``. The tree is
+        scanned once, each file is ``stat``-ed at most once, and every file
+        is moved exactly once, straight to its final folder.
+
+        Built-in keys are ``"type"`` (category from the file type mapping),
+        ``"extension"``, ``"date"`` (modification date formatted with
+        ``date_format``) and ``"regex"`` (category of the first matching
+        rule in ``regex``). A key may also be a callable receiving a
+        :class:`~sortium.walker.FileEntry` and returning a folder name. A key
+        returning an empty string adds no level; returning ``None`` leaves
+        the file out of the plan (as ``"regex"`` does for unmatched files).
+
+        Args:
+            folder_path: Path to the directory containing unsorted files.
+            keys: Ordered sort keys, outermost folder level first.
+            dest_folder_path: Base directory for the nested folders. Falls
+                back to ``folder_path`` when ``None``.
+            ignore_dir: Optional directory names to skip when scanning.
+            plan_output: Optional path override for the emitted plan. A
+                ``.jsonl`` suffix writes a streaming JSON Lines plan and
+                ``.splan`` a binary plan.
+            auto_apply: If ``True``, immediately executes the generated plan.
+            recursive: When ``True`` (default), recursively scans the tree.
+            regex: Category-to-pattern table used by the ``"regex"`` key.
+            match_mode: How ``regex`` patterns are applied, as in
+                :meth:`sort_by_regex`.
+            date_format: ``strftime`` format of ``"date"`` folder names.
+
+        Returns:
+            Path to the plan file.
+
+        Raises:
+            FileNotFoundError: If ``folder_path`` does not exist.
+            ValueError: If ``keys`` is empty or contains an unsupported key,
+                or ``"regex"`` is used without a ``regex`` table.
+        """
+        source_folder = Path(folder_path)
+        if not source_folder.exists():
+            raise FileNotFoundError(f"The path '{source_folder}' does not exist.")
+        if not keys:
+            raise ValueError("sort_by_composite requires at least one key.")
+        dest_base_folder = Path(dest_folder_path) if dest_folder_path else source_folder
+        key_funcs = [
+            self._composite_key(key, regex, match_mode, date_format) for key in keys
+        ]
+
+        plan_path = self._resolve_plan_path(source_folder, "composite", plan_output)
+        entries = self._iter_composite_entries(
+            source_folder, dest_base_folder, key_funcs, ignore_dir, recursive, plan_path
+        )
+
+        metadata: Dict[str, Any] = {
+            "keys": [key if isinstance(key, str) else key.__name__ for key in keys],
+            "ignored": list(ignore_dir or []),
+            "recursive": recursive,
+        }
+        if "type" in keys:
+            metadata["file_types"] = self.file_types_dict
+        if "regex" in keys:
+            metadata["regex"] = regex
+            metadata["match_mode"] = match_mode
+        if "date" in keys:
+            metadata["date_format"] = date_format
+
         plan_path = self._write_plan(
-            strategy="extension",
+            strategy="composite",
             source_root=source_folder,
             destination_root=dest_base_folder,
             entries=entries,
-            plan_output=plan_output,
-            extra_metadata={
-                "ignored": list(ignore_dir or []),
-                "recursive": recursive,
-            },
+            plan_output=str(plan_path),
+            extra_metadata=metadata,
         )
 
         if auto_apply:
             self.file_utils.apply_move_plan(str(plan_path))
 
         return plan_path
+
+    def watch(
+        self,
+        folder_path: str,
+        dest_folder_path: str | None = None,
+        plan_log: str | None = None,
+        ignore_dir: List[str] | None = None,
+        duration: float | None = None,
+        stop_event: threading.Event | None = None,
+        debounce: float = 0.5,
+        settle_time: float = 1.0,
+        batch_size: int = 256,
+        use_inotify: bool | None = None,
+        retry_backoff: float = 1.0,
+    ) -> Dict[str, int]:
+        """Continuously sorts files arriving in ``folder_path`` by type.
+
+        Uses inotify on Linux and polling elsewhere. Each new file is
+        classified with this sorter's category mapping once it has stopped
+        changing, then moved in micro-batches to a collision-safe path under
+        ``dest_folder_path``. Every move is appended to a JSON Lines plan log
+        that ``FileUtils.apply_move_plan(log, reverse=True)`` can undo. See
+        :class:`~sortium.watch.SortWatcher` for the tuning parameters.
+
+        Args:
+            folder_path: Directory to watch (top level only).
+            dest_folder_path: Base directory for category folders. Defaults
+                to ``folder_path``.
+            plan_log: Path of the plan log. Defaults to
+                ``sortium_watch_log.jsonl`` in the destination base.
+            ignore_dir: Optional file names to leave alone.
+            duration: Optional number of seconds after which to stop.
+            stop_event: Optional event that stops the watch when set.
+            debounce: Quiet period after a file's last event, in seconds.
+            settle_time: Minimum age of a file's mtime before it is moved.
+            batch_size: Maximum number of files moved per micro-batch.
+            use_inotify: ``True`` to require inotify, ``False`` to poll,
+                ``None`` to pick automatically.
+            retry_backoff: Seconds before a failed move is retried,
+                doubling per further failure.
+
+        Returns:
+            Session counters: ``moved``, ``failed`` and ``batches``.
+
+        Raises:
+            NotADirectoryError: If ``folder_path`` is not a directory.
+        """
+        with SortWatcher(
+            self,
+            folder_path,
+            dest_folder_path,
+            plan_log=plan_log,
+            ignore_dir=ignore_dir,
+            debounce=debounce,
+            settle_time=settle_time,
+            batch_size=batch_size,
+            use_inotify=use_inotify,
+            retry_backoff=retry_backoff,
+        ) as watcher:
+            return watcher.run(duration=duration, stop_event=stop_event)
@@ -0,0 +1,78 @@
+"""Longest-match lookup of multi-part file extensions.
+
+``Path.suffix`` only sees the last extension, so ``backup.tar.gz`` looks
+like a ``.gz`` file. :class:`SuffixTrie` knows the registered extensions,
+including compound ones such as ``.tar.gz``, and returns the longest one a
+file name ends with.
+
+Registered extensions are stored as a trie keyed by their parts from right
+to left (``.gz`` then ``.tar``). A lookup finds the last dot of the name
+and, only when that suffix starts a compound extension, keeps walking left
+one part at a time, so it costs O(length of the name) and a name whose last
+suffix starts no compound extension costs a single dictionary probe, like
+``Path.suffix`` itself.
+"""
+
+from typing import Dict, Iterable, Tuple
+
+# Trie node: (whether the parts so far form a registered extension,
+# children keyed by the next part to the left).
+_Node = Tuple[bool, Dict[str, "_Node"]]
+
+
+class SuffixTrie:
+    """Matches file names against a set of (possibly compound) extensions.
+
+    Matching is case-insensitive and follows ``Path.suffix``: a leading
+    dot belongs to the name (``.bashrc`` has no extension) and a trailing
+    dot is no extension.
+    """
+
+    def __init__(self, extensions: Iterable[str]):
+        """Builds the trie.
+
+        Args:
+            extensions: Extensions with their leading dot, e.g. ``".jpg"``
+                or ``".tar.gz"``.
+        """
+        # Children of the root, for the last part of compound extensions.
+        self._compound: Dict[str, _Node] = {}
+        for extension in extensions:
+            parts = ["." + part for part in extension.lower().split(".")[1:] if part]
+            if len(parts) < 2:
+                continue
+            children = self._compound
+            for depth, part in enumerate(reversed(parts)):
+                terminal = depth == len(parts) - 1
+                node = children.get(part)
+                if node is None:
+                    node = children[part] = (terminal, {})
+                elif terminal and not node[0]:
+                    node = children[part] = (True, node[1])
+                children = node[1]
+
+    def match(self, name: str) -> str:
+        """Returns the lower-cased extension of ``name``.
+
+        This is the longest registered compound extension ``name`` ends
+        with, else its last suffix (as ``Path.suffix``), else ``""``.
+        """
+        end = name.rfind(".")
+        if end <= 0 or end == len(name) - 1:
+            return ""
+        last = name[end:].lower()
+        node = self._compound.get(last)
+        if node is None:
+            return last
+        best = end
+        while node[1]:
+            start = name.rfind(".", 0, end)
+            if start <= 0:
+                break
+            node = node[1].get(name[start:end].lower())
+            if node is None:
+                break
+            end = start
+            if node[0]:
+                best = start
+        return name[best:].lower()
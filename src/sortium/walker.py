@@ -0,0 +1,399 @@
+"""Directory traversal engine shared by ``FileUtils`` and ``Sorter``.
+
+The walker is built on :func:`os.scandir` and an explicit stack, so the
+file-type information returned by the directory listing is reused instead of
+being re-queried with extra ``stat`` calls, and arbitrarily deep trees can be
+scanned without hitting the interpreter recursion limit.
+"""
+
+import heapq
+import logging
+import os
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import TYPE_CHECKING, Dict, Iterator, List, Set, Tuple
+
+if TYPE_CHECKING:
+    from .instrumentation import Observer
+
+logger = logging.getLogger(__name__)
+
+
+class FileEntry:
+    """Lightweight handle for a file found during a scan.
+
+    Holds the path as a plain string together with the ``os.DirEntry`` it was
+    produced from, so the ``stat`` result cached by ``scandir`` is reused
+    instead of issuing another system call. Instances are cheaper to create
+    than ``Path`` objects and can be passed anywhere a path-like is accepted.
+
+    Attributes:
+        path: Path of the file as a string.
+        name: Final component of ``path``.
+    """
+
+    __slots__ = ("path", "name", "_entry", "_stat")
+
+    def __init__(
+        self,
+        path: str,
+        name: str,
+        entry: os.DirEntry | None = None,
+        stat_result: os.stat_result | None = None,
+    ):
+        self.path = path
+        self.name = name
+        self._entry = entry
+        self._stat = stat_result
+
+    def stat(self) -> os.stat_result:
+        """Returns the (cached) ``stat`` result for the file.
+
+        Returns:
+            The ``os.stat_result`` for the file. The first call may hit the
+            filesystem; subsequent calls are served from the cache.
+        """
+        if self._stat is None:
+            if self._entry is not None:
+                self._stat = self._entry.stat()
+            else:
+                self._stat = os.stat(self.path)
+        return self._stat
+
+    @property
+    def suffix(self) -> str:
+        """The final extension of the file name, matching ``Path.suffix``."""
+        name = self.name
+        idx = name.rfind(".")
+        if 0 < idx < len(name) - 1:
+            return name[idx:]
+        return ""
+
+    def __fspath__(self) -> str:
+        return self.path
+
+    def __repr__(self) -> str:
+        return f"FileEntry({self.path!r})"
+
+
+def scan_directory(
+    dir_path: str,
+    ignore_set: Set[str],
+    collect_dirs: bool = True,
+    skip_paths: Set[str] | None = None,
+) -> Tuple[List[os.DirEntry], List[os.DirEntry]]:
+    """Lists a single directory and splits it into files and subdirectories.
+
+    Entries whose names are in ``ignore_set`` are dropped. The listing is
+    fully materialized before returning so the directory handle is released
+    before callers start acting on the files.
+
+    Args:
+        dir_path: Directory to list.
+        ignore_set: Names to skip.
+        collect_dirs: When ``False``, subdirectories are not returned.
+        skip_paths: Optional set of absolute directory paths that must not be
+            returned as subdirectories (e.g. a destination folder nested in
+            the tree being scanned).
+
+    Returns:
+        A ``(files, dirs)`` tuple of ``os.DirEntry`` lists.
+
+    Raises:
+        OSError: If the directory cannot be listed.
+    """
+    files: List[os.DirEntry] = []
+    dirs: List[os.DirEntry] = []
+    with os.scandir(dir_path) as listing:
+        for entry in listing:
+            if entry.name in ignore_set:
+                continue
+            try:
+                if entry.is_dir():
+                    if not collect_dirs:
+                        continue
+                    if skip_paths and os.path.abspath(entry.path) in skip_paths:
+                        continue
+                    dirs.append(entry)
+                elif entry.is_file():
+                    files.append(entry)
+            except OSError:
+                # The entry vanished or cannot be inspected; skip it.
+                continue
+    return files, dirs
+
+
+def _symlink_target_key(entry: os.DirEntry) -> Tuple[int, int] | None:
+    """Returns the ``(st_dev, st_ino)`` of a symlinked directory's target."""
+    try:
+        if not entry.is_symlink():
+            return None
+        target = entry.stat()
+    except OSError:
+        return None
+    return target.st_dev, target.st_ino
+
+
+def _entry_name(entry: os.DirEntry) -> str:
+    return entry.name
+
+
+def _list_for_walk(
+    dir_path: str,
+    ignore_set: Set[str],
+    recursive: bool,
+    skip_paths: Set[str] | None,
+    ordered: bool,
+    observer: "Observer | None" = None,
+) -> Tuple[List[os.DirEntry], List[os.DirEntry]] | None:
+    """Lists one directory for a walk, reporting unreadable directories.
+
+    Returns ``None`` when the directory cannot be listed.
+    """
+    if observer is not None:
+        observer.count("dirs_listed")
+    try:
+        files, dirs = scan_directory(dir_path, ignore_set, recursive, skip_paths)
+    except FileNotFoundError:
+        logger.warning("Directory not found: %s", dir_path)
+        if observer is not None:
+            observer.count("errors")
+        return None
+    except PermissionError:
+        logger.warning("Permission denied for directory: %s", dir_path)
+        if observer is not None:
+            observer.count("errors")
+        return None
+    if ordered:
+        files.sort(key=_entry_name)
+        dirs.sort(key=_entry_name)
+    return files, dirs
+
+
+def _subdirs_to_visit(
+    dirs: List[os.DirEntry], visited_links: Set[Tuple[int, int]]
+) -> List[str]:
+    """Filters subdirectories, entering each symlink target only once."""
+    paths: List[str] = []
+    for entry in dirs:
+        link_key = _symlink_target_key(entry)
+        if link_key is not None:
+            if link_key in visited_links:
+                continue
+            visited_links.add(link_key)
+        paths.append(entry.path)
+    return paths
+
+
+def walk_files(
+    root: str,
+    ignore_set: Set[str],
+    recursive: bool = True,
+    skip_paths: Set[str] | None = None,
+    ordered: bool = False,
+    observer: "Observer | None" = None,
+) -> Iterator[os.DirEntry]:
+    """Yields ``os.DirEntry`` objects for every file below ``root``.
+
+    Traversal is depth-first and driven by an explicit stack. Symlinked
+    directories are followed (matching ``Path.is_dir``), but each symlink
+    target is entered at most once so link cycles terminate.
+
+    Args:
+        root: Directory to scan.
+        ignore_set: File and directory names to skip at every level.
+        recursive: When ``False``, only the files directly inside ``root``
+            are yielded.
+        skip_paths: Optional absolute directory paths that must not be
+            descended into.
+        ordered: When ``True``, each directory listing is sorted by name so
+            the output order is deterministic.
+        observer: Optional :class:`~sortium.instrumentation.Observer`
+            counting directory listings and listing errors.
+
+    Yields:
+        ``os.DirEntry`` objects for files.
+    """
+    stack: List[str] = [root]
+    visited_links: Set[Tuple[int, int]] = set()
+
+    while stack:
+        listing = _list_for_walk(
+            stack.pop(), ignore_set, recursive, skip_paths, ordered, observer
+        )
+        if listing is None:
+            continue
+        files, dirs = listing
+
+        yield from files
+
+        stack.extend(reversed(_subdirs_to_visit(dirs, visited_links)))
+
+
+def walk_files_parallel(
+    root: str,
+    ignore_set: Set[str],
+    max_workers: int,
+    skip_paths: Set[str] | None = None,
+    ordered: bool = False,
+    max_pending: int | None = None,
+    observer: "Observer | None" = None,
+) -> Iterator[os.DirEntry]:
+    """Yields files below ``root`` while listing directories concurrently.
+
+    Directory listings are issued on a bounded thread pool so that many
+    ``scandir`` round-trips can be in flight at once, which hides the latency
+    of network and FUSE filesystems. The calling thread coordinates the walk
+    and yields files as listings complete.
+
+    Args:
+        root: Directory to scan.
+        ignore_set: File and directory names to skip at every level.
+        max_workers: Number of listing threads.
+        skip_paths: Optional absolute directory paths that must not be
+            descended into.
+        ordered: When ``True``, files are yielded in exactly the same order
+            as ``walk_files(..., ordered=True)``; listings are still
+            prefetched concurrently. When ``False``, files are yielded in
+            completion order.
+        max_pending: Maximum number of directory listings queued on the pool
+            at any time. Unordered walks list the deepest pending
+            directories first, so this also bounds how many partially
+            visited listings are kept per level. Defaults to
+            ``4 * max_workers``.
+        observer: Optional :class:`~sortium.instrumentation.Observer`
+            counting directory listings and listing errors.
+
+    Yields:
+        ``os.DirEntry`` objects for files.
+    """
+    max_pending = max(1, max_pending or 4 * max_workers)
+    pool = ThreadPoolExecutor(
+        max_workers=max_workers, thread_name_prefix="sortium-scan"
+    )
+    try:
+        if ordered:
+            yield from _walk_ordered(
+                pool, root, ignore_set, skip_paths, max_pending, observer
+            )
+        else:
+            yield from _walk_unordered(
+                pool, root, ignore_set, skip_paths, max_pending, observer
+            )
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def _next_deepest_subdir(
+    frontier: List[Tuple[int, int, Iterator[os.DirEntry]]],
+    visited_links: Set[Tuple[int, int]],
+) -> Tuple[str, int] | None:
+    """Pops the next directory to list from the deepest pending listing."""
+    while frontier:
+        neg_depth, _, entries = frontier[0]
+        for entry in entries:
+            link_key = _symlink_target_key(entry)
+            if link_key is not None:
+                if link_key in visited_links:
+                    continue
+                visited_links.add(link_key)
+            return entry.path, -neg_depth
+        heapq.heappop(frontier)
+    return None
+
+
+def _walk_unordered(
+    pool: ThreadPoolExecutor,
+    root: str,
+    ignore_set: Set[str],
+    skip_paths: Set[str] | None,
+    max_pending: int,
+    observer: "Observer | None" = None,
+) -> Iterator[os.DirEntry]:
+    """Completion-order traversal that lists the deepest directories first.
+
+    The frontier is a heap of the subdirectory lists of completed listings,
+    keyed by depth and consumed lazily. Shallower directories are only
+    submitted once every deeper one has been, so the walk stays depth-first
+    and the frontier holds about ``max_pending`` listings per level instead
+    of every directory of the widest level.
+    """
+    frontier: List[Tuple[int, int, Iterator[os.DirEntry]]] = []
+    in_flight: Dict[Future, int] = {
+        pool.submit(
+            _list_for_walk, root, ignore_set, True, skip_paths, False, observer
+        ): 0
+    }
+    visited_links: Set[Tuple[int, int]] = set()
+    pushed = 0
+
+    while True:
+        while len(in_flight) < max_pending:
+            pending = _next_deepest_subdir(frontier, visited_links)
+            if pending is None:
+                break
+            path, depth = pending
+            future = pool.submit(
+                _list_for_walk, path, ignore_set, True, skip_paths, False, observer
+            )
+            in_flight[future] = depth
+        if not in_flight:
+            return
+
+        done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+        for future in done:
+            depth = in_flight.pop(future)
+            listing = future.result()
+            if listing is None:
+                continue
+            files, dirs = listing
+            if dirs:
+                pushed += 1
+                heapq.heappush(frontier, (-(depth + 1), -pushed, iter(dirs)))
+            yield from files
+
+
+def _walk_ordered(
+    pool: ThreadPoolExecutor,
+    root: str,
+    ignore_set: Set[str],
+    skip_paths: Set[str] | None,
+    max_pending: int,
+    observer: "Observer | None" = None,
+) -> Iterator[os.DirEntry]:
+    """Deterministic depth-first traversal with listing prefetch.
+
+    The stack holds ``[path, future]`` pairs. After each directory is
+    consumed, the directories that will be visited next (the top of the
+    stack) are submitted ahead of time, up to ``max_pending`` outstanding
+    listings.
+    """
+    stack: List[list] = [[root, None]]
+    outstanding = 0
+    visited_links: Set[Tuple[int, int]] = set()
+
+    while stack:
+        path, future = stack.pop()
+        if future is None:
+            listing = _list_for_walk(path, ignore_set, True, skip_paths, True, observer)
+        else:
+            outstanding -= 1
+            listing = future.result()
+
+        if listing is not None:
+            files, dirs = listing
+            for sub_path in reversed(_subdirs_to_visit(dirs, visited_links)):
+                stack.append([sub_path, None])
+
+        lowest = max(len(stack) - max_pending, 0)
+        for idx in range(len(stack) - 1, lowest - 1, -1):
+            if outstanding >= max_pending:
+                break
+            node = stack[idx]
+            if node[1] is None:
+                node[1] = pool.submit(
+                    _list_for_walk, node[0], ignore_set, True, skip_paths, True, observer
+                )
+                outstanding += 1
+
+        if listing is not None:
+            yield from files
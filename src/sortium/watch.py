@@ -0,0 +1,377 @@
+"""Watch mode: sort files continuously as they arrive in a folder.
+
+:class:`SortWatcher` watches the top level of a directory and moves every
+new file into its category folder using a :class:`~sortium.sorter.Sorter`'s
+category mapping. On Linux, file events come from ``inotify`` (through
+``ctypes``, no third-party dependency); elsewhere, or when ``inotify`` is
+unavailable, the directory is polled.
+
+Files are not moved the moment an event arrives:
+
+* **Debouncing** -- a file is handled only once no event has been seen for
+  it for ``debounce`` seconds, so bursts of writes collapse into one move.
+* **Settle check** -- a file modified less than ``settle_time`` seconds ago
+  is assumed to be still being written and is checked again later.
+* **Retry** -- a file whose move fails (e.g. a destination that is briefly
+  locked or unwritable) is queued again after ``retry_backoff`` seconds,
+  doubling per failure up to :data:`MAX_RETRY_BACKOFF`, since no new event
+  may ever arrive for it.
+
+Ready files are moved in micro-batches. Destinations are resolved with the
+same collision-safe :class:`~sortium.file_utils.DestinationIndex` used by
+plans, and every completed move is appended to a JSON Lines plan log so the
+whole session can be audited and reversed with
+``FileUtils.apply_move_plan(log, reverse=True)``.
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import logging
+import os
+import select
+import struct
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Sequence
+from uuid import uuid4
+
+from .executor import _check_and_move, _new_dir_handles
+from .file_utils import DestinationIndex, _build_ignore_set
+from .plans import PlanLog
+
+logger = logging.getLogger(__name__)
+
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_Q_OVERFLOW = 0x00004000
+_IN_ISDIR = 0x40000000
+_INOTIFY_EVENT = struct.Struct("iIII")
+
+DEFAULT_WATCH_LOG = "sortium_watch_log.jsonl"
+"""File name of the plan log written when none is given."""
+
+MAX_RETRY_BACKOFF = 60.0
+"""Longest delay, in seconds, before retrying a failed move."""
+
+
+def _load_libc_inotify():
+    """Returns libc if it exposes the inotify API, otherwise ``None``."""
+    if not hasattr(os, "O_NONBLOCK"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+class _InotifySource:
+    """Reports file names closed after writing, or moved into, a directory."""
+
+    def __init__(self, libc, folder: str):
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        watch = libc.inotify_add_watch(
+            fd, os.fsencode(folder), _IN_CLOSE_WRITE | _IN_MOVED_TO
+        )
+        if watch < 0:
+            err = ctypes.get_errno()
+            os.close(fd)
+            raise OSError(err, os.strerror(err), folder)
+        self._fd = fd
+        self._folder = folder
+
+    def wait(self, timeout: float) -> Iterable[str] | None:
+        """Waits up to ``timeout`` seconds for events.
+
+        Returns:
+            File names with events, or ``None`` if the kernel queue
+            overflowed and the directory must be rescanned.
+        """
+        ready, _, _ = select.select([self._fd], [], [], max(timeout, 0))
+        if not ready:
+            return []
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        names: List[str] = []
+        offset = 0
+        while offset < len(data):
+            _, mask, _, length = _INOTIFY_EVENT.unpack_from(data, offset)
+            offset += _INOTIFY_EVENT.size
+            raw_name = data[offset : offset + length].rstrip(b"\0")
+            offset += length
+            if mask & _IN_Q_OVERFLOW:
+                return None
+            if raw_name and not mask & _IN_ISDIR:
+                names.append(os.fsdecode(raw_name))
+        return names
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+
+class _PollingSource:
+    """Reports file names whose size or mtime changed since the last poll."""
+
+    def __init__(self, folder: str, interval: float):
+        self._folder = folder
+        self._interval = interval
+        self._seen: Dict[str, tuple] = {}
+
+    def wait(self, timeout: float) -> Iterable[str] | None:
+        time.sleep(max(min(timeout, self._interval), 0))
+        current: Dict[str, tuple] = {}
+        changed: List[str] = []
+        try:
+            with os.scandir(self._folder) as listing:
+                for entry in listing:
+                    try:
+                        if not entry.is_file():
+                            continue
+                        st = entry.stat()
+                    except OSError:
+                        continue
+                    signature = (st.st_size, st.st_mtime_ns)
+                    current[entry.name] = signature
+                    if self._seen.get(entry.name) != signature:
+                        changed.append(entry.name)
+        except OSError:
+            pass
+        self._seen = current
+        return changed
+
+    def close(self) -> None:
+        self._seen.clear()
+
+
+class SortWatcher:
+    """Continuously sorts files arriving in a folder by category.
+
+    Attributes:
+        folder (Path): Directory being watched (top level only).
+        dest_root (Path): Base directory for the category folders.
+        plan_log (Path): JSON Lines plan log receiving every completed move.
+        backend (str): ``"inotify"`` or ``"polling"``.
+        stats (Dict[str, int]): ``moved``, ``failed`` (failed move
+            attempts, each retried later) and ``batches`` counters for the
+            session.
+    """
+
+    def __init__(
+        self,
+        sorter,
+        folder_path: str,
+        dest_folder_path: str | None = None,
+        plan_log: str | None = None,
+        ignore_dir: Sequence[str] | None = None,
+        debounce: float = 0.5,
+        settle_time: float = 1.0,
+        batch_size: int = 256,
+        poll_interval: float = 1.0,
+        use_inotify: bool | None = None,
+        retry_backoff: float = 1.0,
+    ):
+        """Prepares a watcher; call :meth:`run` to start sorting.
+
+        Args:
+            sorter: The ``Sorter`` whose category mapping classifies files.
+            folder_path: Directory to watch.
+            dest_folder_path: Base directory for category folders. Defaults
+                to ``folder_path``.
+            plan_log: Path of the JSON Lines plan log. Defaults to
+                ``sortium_watch_log.jsonl`` inside the destination base.
+                An existing log is appended to.
+            ignore_dir: File names to leave alone, in addition to the
+                default ignore list.
+            debounce: Quiet period, in seconds, required after a file's last
+                event before it is handled.
+            settle_time: Minimum age, in seconds, of a file's modification
+                time before it is moved.
+            batch_size: Maximum number of files moved per micro-batch.
+            poll_interval: Seconds between directory scans in polling mode.
+            use_inotify: ``True`` to require inotify, ``False`` to always
+                poll, ``None`` to use inotify when available.
+            retry_backoff: Seconds before the first retry of a failed move;
+                the delay doubles with each further failure of that file.
+
+        Raises:
+            NotADirectoryError: If ``folder_path`` is not a directory.
+            OSError: If ``use_inotify`` is ``True`` and inotify is unavailable.
+        """
+        self.folder = Path(folder_path)
+        if not self.folder.is_dir():
+            raise NotADirectoryError(f"The path '{folder_path}' is not a directory.")
+        self.dest_root = Path(dest_folder_path) if dest_folder_path else self.folder
+        self.plan_log = Path(plan_log) if plan_log else self.dest_root / DEFAULT_WATCH_LOG
+        self._sorter = sorter
+        self._ignore_set = _build_ignore_set(ignore_dir)
+        self._debounce = debounce
+        self._settle_ns = int(settle_time * 1e9)
+        self._batch_size = max(1, batch_size)
+        self._pending: Dict[str, float] = {}
+        self._failures: Dict[str, int] = {}
+        self._retry_backoff = retry_backoff
+        self._index = DestinationIndex()
+        self._skip = {os.path.abspath(self.plan_log)}
+        self.stats = {"moved": 0, "failed": 0, "batches": 0}
+
+        self._source = None
+        libc = _load_libc_inotify() if use_inotify is not False else None
+        if libc is not None:
+            try:
+                self._source = _InotifySource(libc, str(self.folder))
+            except (OSError, AttributeError):
+                if use_inotify:
+                    raise
+        elif use_inotify:
+            raise OSError(errno.ENOSYS, "inotify is not available on this platform")
+        if self._source is None:
+            self._source = _PollingSource(str(self.folder), poll_interval)
+            self.backend = "polling"
+        else:
+            self.backend = "inotify"
+
+    def _enqueue(self, names: Iterable[str], now: float) -> None:
+        for name in names:
+            if name in self._ignore_set:
+                continue
+            path = os.path.join(self.folder, name)
+            if os.path.abspath(path) in self._skip:
+                continue
+            self._pending[path] = now
+
+    def _rescan(self, now: float) -> None:
+        """Queues every file currently in the folder."""
+        try:
+            with os.scandir(self.folder) as listing:
+                names = [entry.name for entry in listing if entry.is_file()]
+        except OSError:
+            return
+        self._enqueue(names, now)
+
+    def _take_ready(self, now: float) -> List[str]:
+        """Removes and returns up to one batch of debounced, settled files."""
+        ready: List[str] = []
+        wall_ns = time.time_ns()
+        for path, last_event in list(self._pending.items()):
+            if now - last_event < self._debounce:
+                continue
+            try:
+                st = os.stat(path)
+            except OSError:
+                del self._pending[path]
+                self._failures.pop(path, None)
+                continue
+            if wall_ns - st.st_mtime_ns < self._settle_ns:
+                continue  # still being written; check again later
+            del self._pending[path]
+            ready.append(path)
+            if len(ready) >= self._batch_size:
+                break
+        return ready
+
+    def _retry_later(self, path: str) -> None:
+        """Queues ``path`` again once its backoff delay has passed."""
+        failures = self._failures.get(path, 0) + 1
+        self._failures[path] = failures
+        delay = min(self._retry_backoff * 2 ** (failures - 1), MAX_RETRY_BACKOFF)
+        # _take_ready waits ``debounce`` past the recorded event time.
+        self._pending[path] = time.monotonic() + delay - self._debounce
+
+    def _move_batch(self, paths: List[str], log: PlanLog) -> None:
+        moved: List[Dict[str, Any]] = []
+        handles = _new_dir_handles()
+        try:
+            for path in paths:
+                name = os.path.basename(path)
+                category = self._sorter._get_category(self._sorter.suffix_trie.match(name))
+                dest = str(self._index.reserve(self.dest_root / category, name))
+                error_msg = _check_and_move(path, dest, True, handles)
+                if error_msg:
+                    self.stats["failed"] += 1
+                    logger.error(error_msg)
+                    # The destination folder changed behind our back; relist it.
+                    self._index = DestinationIndex()
+                    self._retry_later(path)
+                    continue
+                self._failures.pop(path, None)
+                moved.append(
+                    {"source_path": path, "destination_path": dest, "category": category}
+                )
+        finally:
+            if handles is not None:
+                handles.close()
+        if moved:
+            log.append(moved)
+        self.stats["moved"] += len(moved)
+        self.stats["batches"] += 1
+
+    def run(
+        self,
+        duration: float | None = None,
+        stop_event: threading.Event | None = None,
+    ) -> Dict[str, int]:
+        """Watches and sorts until stopped.
+
+        Files already present when the watch starts are sorted too.
+
+        Args:
+            duration: Optional number of seconds after which to stop.
+            stop_event: Optional event that stops the watch when set.
+
+        Returns:
+            The session ``stats``.
+        """
+        header = {
+            "plan_id": str(uuid4()),
+            "version": 1,
+            "strategy": "watch",
+            "generated_at": datetime.now(timezone.utc).isoformat(),
+            "source_root": str(self.folder),
+            "destination_root": str(self.dest_root),
+        }
+        deadline = None if duration is None else time.monotonic() + duration
+        logger.info(
+            "Watching '%s' (%s); logging to '%s'.", self.folder, self.backend, self.plan_log
+        )
+        with PlanLog(self.plan_log, header) as log:
+            self._rescan(time.monotonic())
+            while not (stop_event is not None and stop_event.is_set()):
+                now = time.monotonic()
+                if deadline is not None and now >= deadline:
+                    break
+                timeout = self._debounce if self._pending else 0.5
+                if deadline is not None:
+                    timeout = min(timeout, deadline - now)
+                names = self._source.wait(timeout)
+                now = time.monotonic()
+                if names is None:
+                    self._rescan(now)
+                else:
+                    self._enqueue(names, now)
+                batch = self._take_ready(now)
+                while batch:
+                    self._move_batch(batch, log)
+                    batch = self._take_ready(now)
+        return self.stats
+
+    def close(self) -> None:
+        """Releases the event source."""
+        if self._source is not None:
+            self._source.close()
+            self._source = None
+
+    def __enter__(self) -> "SortWatcher":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
@@ -1,9 +1,15 @@
 # src/tests/test_file_utils.py
+import errno
 import json
+import os
 import pytest
 from pathlib import Path
 from datetime import datetime, timedelta
-from sortium.file_utils import FileUtils
+from sortium import executor, walker
+from sortium.file_utils import DestinationIndex, FileUtils
+from sortium.journal import MoveJournal, read_journal
+from sortium.plans import PlanWriter, load_plan
+from sortium.progress import OperationCancelled, ProgressReporter
 
 # Initialize once, as it's stateless
 file_utils = FileUtils()
@@ -121,6 +127,62 @@ def test_find_unique_extensions_with_ignore(file_tree: Path):
     assert ".pdf" not in extensions
 
 
+def test_profile_extensions_counts_merges_and_samples(tmp_path: Path):
+    """Profiles counts, sizes and categories; shards merge to the whole."""
+    for shard in ("left", "right"):
+        for depth in range(3):
+            folder = tmp_path / shard / "/".join(["d"] * depth)
+            folder.mkdir(parents=True, exist_ok=True)
+            for idx in range(10):
+                (folder / f"photo{idx}.JPG").write_bytes(b"x" * (100 * (idx + 1)))
+            (folder / "notes.txt").write_bytes(b"x" * 7)
+    (tmp_path / "README").write_bytes(b"x" * 3)
+
+    profiler = FileUtils(progress=lambda progress: None)
+    histogram = profiler.profile_extensions(str(tmp_path), max_workers=2)
+    summary = histogram.to_dict()
+    assert summary["file_count"] == 67
+    assert list(summary["extensions"]) == [".jpg", ".txt", ""]
+    jpg = summary["extensions"][".jpg"]
+    assert jpg["category"] == "Images"
+    assert (jpg["file_count"], jpg["total_size"]) == (60, 6 * 5500)
+    assert (jpg["min_size"], jpg["max_size"]) == (100, 1000)
+    assert 450 <= jpg["p50"] <= 560 and 850 <= jpg["p90"] <= 1000
+    assert summary["extensions"][""]["category"] == "Others"
+
+    merged = file_utils.profile_extensions(str(tmp_path / "left"), max_workers=1)
+    merged.merge(file_utils.profile_extensions(str(tmp_path / "right")))
+    merged.merge(
+        file_utils.profile_extensions(str(tmp_path), ignore_dir=["left", "right"])
+    )
+    assert merged.to_dict() == summary
+
+    # Seeds mix in the (per-run) root path; a low rate keeps this independent of it.
+    sampled = file_utils.profile_extensions(str(tmp_path), sample=0.05, seed=3)
+    assert sampled.sampled is True
+    assert sampled.directories < histogram.directories
+    assert file_utils.profile_extensions(str(tmp_path), sample=1.0).to_dict() == summary
+    with pytest.raises(ValueError):
+        file_utils.profile_extensions(str(tmp_path), sample=0)
+
+    # Compound extensions are keyed as the sorters key them.
+    archives = tmp_path / "archives"
+    archives.mkdir()
+    (archives / "backup.tar.gz").write_bytes(b"x" * 5)
+    (archives / "log.gz").write_bytes(b"x" * 2)
+    compound = file_utils.profile_extensions(str(archives)).to_dict()["extensions"]
+    assert {ext: stats["category"] for ext, stats in compound.items()} == {
+        ".tar.gz": "Archives",
+        ".gz": "Archives",
+    }
+    snapshot = json.loads(
+        file_utils.export_directory_structure(
+            str(archives), str(tmp_path / "archives.json"), rollups=True
+        ).read_text()
+    )
+    assert set(snapshot["extensions"]) == {".tar.gz", ".gz"}
+
+
 def test_flatten_dir(file_tree: Path):
     """Tests moving all nested files into a single directory."""
     dest_path = file_tree / "flattened"
@@ -194,6 +256,156 @@ def test_apply_move_plan_forward_and_reverse(tmp_path: Path):
     assert not (dest_dir / "example.txt").exists()
 
 
+def test_plan_writer_json_matches_v1_layout(tmp_path: Path):
+    """The streamed version 1 plan is a regular JSON document."""
+    header = {"plan_id": "p", "version": 1, "metadata": {"recursive": True}}
+    entries = [{"source_path": "a", "destination_path": "b"}, {"source_path": "c"}]
+
+    with PlanWriter(tmp_path / "plan.json", header, "json") as writer:
+        for entry in entries:
+            writer.write(entry)
+    with PlanWriter(tmp_path / "empty.json", header, "json"):
+        pass
+
+    data = json.loads((tmp_path / "plan.json").read_text())
+    assert data["entries"] == entries
+    assert data["entry_count"] == 2
+    assert data["metadata"] == {"recursive": True}
+    assert json.loads((tmp_path / "empty.json").read_text())["entries"] == []
+
+    loaded_header, loaded_entries = load_plan(tmp_path / "plan.json")
+    assert loaded_header["plan_id"] == "p"
+    assert list(loaded_entries) == entries
+
+
+def test_apply_move_plan_concurrent(tmp_path: Path):
+    """Concurrent execution matches sequential results, skips and errors."""
+    source_dir = tmp_path / "source"
+    source_dir.mkdir()
+    entries = []
+    for idx in range(40):
+        (source_dir / f"file_{idx}.txt").write_text(str(idx))
+        entries.append(
+            {
+                "source_path": str(source_dir / f"file_{idx}.txt"),
+                "destination_path": str(tmp_path / "dest" / f"d{idx % 3}" / f"file_{idx}.txt"),
+                "skip": idx == 5,
+            }
+        )
+    entries.append(
+        {
+            "source_path": str(source_dir / "missing.txt"),
+            "destination_path": str(tmp_path / "dest" / "missing.txt"),
+        }
+    )
+    plan_file = tmp_path / "plan.json"
+    plan_file.write_text(json.dumps({"plan_id": "test", "entries": entries}))
+
+    forward = file_utils.apply_move_plan(str(plan_file), max_workers=4)
+    assert forward["entries"] == 41
+    assert forward["moved"] == 39
+    assert forward["errors"] == [
+        f"Source path does not exist: {source_dir / 'missing.txt'}"
+    ]
+    assert (tmp_path / "dest" / "d1" / "file_4.txt").read_text() == "4"
+    assert (source_dir / "file_5.txt").is_file()
+
+    reverse = file_utils.apply_move_plan(str(plan_file), reverse=True, max_workers=4)
+    assert reverse["moved"] == 39
+    assert (source_dir / "file_4.txt").read_text() == "4"
+    assert not any((tmp_path / "dest" / "d1").iterdir())
+
+
+@pytest.mark.skipif(not executor._DIR_FD_RENAME, reason="needs dir_fd rename support")
+def test_apply_move_plan_dir_fd_fast_path(tmp_path: Path, monkeypatch):
+    """Same-device moves use renameat and never reach shutil.move."""
+    (tmp_path / "a.txt").write_text("a")
+    plan_file = tmp_path / "plan.json"
+    plan_file.write_text(
+        json.dumps(
+            {
+                "entries": [
+                    {
+                        "source_path": str(tmp_path / "a.txt"),
+                        "destination_path": str(tmp_path / "new" / "a.txt"),
+                    }
+                ]
+            }
+        )
+    )
+
+    def fail_move(*args, **kwargs):
+        raise AssertionError("shutil.move should not be used on one device")
+
+    monkeypatch.setattr(executor.shutil, "move", fail_move)
+    summary = file_utils.apply_move_plan(str(plan_file))
+
+    assert summary["moved"] == 1
+    assert (tmp_path / "new" / "a.txt").read_text() == "a"
+
+
+def test_apply_move_plan_reuses_path_of_moved_directory(tmp_path: Path):
+    """A path freed by a directory move names the new directory afterwards."""
+    for folder, content in (("d", "old"), ("w", "new")):
+        (tmp_path / folder).mkdir()
+        (tmp_path / folder / "b.txt").write_text(content)
+    (tmp_path / "d" / "a.txt").write_text("a")
+    moves = [("d/a.txt", "x/a.txt"), ("d", "z"), ("w", "d"), ("d/b.txt", "x/b.txt")]
+    plan_file = tmp_path / "plan.json"
+    plan_file.write_text(
+        json.dumps(
+            {
+                "entries": [
+                    {
+                        "source_path": str(tmp_path / source),
+                        "destination_path": str(tmp_path / dest),
+                    }
+                    for source, dest in moves
+                ]
+            }
+        )
+    )
+
+    summary = file_utils.apply_move_plan(str(plan_file))
+
+    assert summary["moved"] == 4 and summary["errors"] == []
+    assert (tmp_path / "x" / "b.txt").read_text() == "new"
+    assert (tmp_path / "z" / "b.txt").read_text() == "old"
+    assert list((tmp_path / "d").iterdir()) == []
+
+
+@pytest.mark.skipif(not executor._DIR_FD_RENAME, reason="needs dir_fd rename support")
+def test_apply_move_plan_cross_device_fallback(tmp_path: Path, monkeypatch):
+    """A rename refused with EXDEV falls back to copying."""
+    (tmp_path / "a.txt").write_text("a")
+    plan_file = tmp_path / "plan.json"
+    plan_file.write_text(
+        json.dumps(
+            {
+                "entries": [
+                    {
+                        "source_path": str(tmp_path / "a.txt"),
+                        "destination_path": str(tmp_path / "dest" / "a.txt"),
+                    }
+                ]
+            }
+        )
+    )
+    real_rename = os.rename
+
+    def cross_device_rename(src, dst, *, src_dir_fd=None, dst_dir_fd=None):
+        if src_dir_fd is not None:
+            raise OSError(errno.EXDEV, "Invalid cross-device link")
+        return real_rename(src, dst)
+
+    monkeypatch.setattr(executor.os, "rename", cross_device_rename)
+    summary = file_utils.apply_move_plan(str(plan_file), max_workers=2)
+
+    assert summary == {"entries": 1, "moved": 1, "errors": []}
+    assert (tmp_path / "dest" / "a.txt").read_text() == "a"
+    assert not (tmp_path / "a.txt").exists()
+
+
 def test_iter_all_files_recursive_default_ignore(tmp_path: Path):
     """Ensures built-in ignore entries are always skipped."""
     visible = tmp_path / "keep.txt"
@@ -239,3 +451,473 @@ def test_export_directory_structure(tmp_path: Path):
     assert "docs" in child_names
     assert child_names["docs"]["type"] == "directory"
     assert ".git" not in child_names
+
+
+def test_export_directory_structure_streams_json_dump_format(tmp_path: Path):
+    """Streamed output matches json.dump(indent=2) and survives symlink loops."""
+    (tmp_path / "b.txt").write_text("bb")
+    (tmp_path / "A.txt").write_text("a")
+    (tmp_path / "zeta").mkdir()
+    (tmp_path / "zeta" / "deep").mkdir()
+    (tmp_path / "zeta" / "deep" / "x.bin").write_bytes(b"123")
+    (tmp_path / "empty").mkdir()
+    os.symlink(tmp_path / "zeta", tmp_path / "zeta" / "deep" / "loop")
+
+    output_file = tmp_path / "structure.json"
+    file_utils.export_directory_structure(str(tmp_path), str(output_file))
+
+    text = output_file.read_text(encoding="utf-8")
+    data = json.loads(text)
+    assert text == json.dumps(data, indent=2)
+    assert [child["name"] for child in data["children"]] == [
+        "empty",
+        "zeta",
+        "A.txt",
+        "b.txt",
+    ]
+    assert data["children"][0]["children"] == []
+    deep = data["children"][1]["children"][0]
+    assert deep["children"][0] == {
+        "name": "loop",
+        "path": str(tmp_path / "zeta" / "deep" / "loop"),
+        "type": "directory",
+        "children": [],
+        "error": "symlink-loop",
+    }
+    assert deep["children"][1]["size"] == 3
+
+
+def test_export_directory_structure_rollups_and_summary(tmp_path: Path):
+    """Directory nodes carry recursive rollups; summaries keep big dirs only."""
+    tree = tmp_path / "tree"
+    (tree / "big" / "inner").mkdir(parents=True)
+    (tree / "big" / "inner" / "a.TXT").write_bytes(b"x" * 600)
+    (tree / "big" / "b.txt").write_bytes(b"x" * 500)
+    (tree / "small").mkdir()
+    (tree / "small" / "c.jpg").write_bytes(b"x" * 10)
+    (tree / "README").write_bytes(b"x" * 5)
+
+    output_file = tmp_path / "rollups.json"
+    file_utils.export_directory_structure(str(tree), str(output_file), rollups=True)
+    text = output_file.read_text(encoding="utf-8")
+    data = json.loads(text)
+    assert text == json.dumps(data, indent=2)
+    assert (data["total_size"], data["file_count"]) == (1115, 4)
+    assert data["extensions"] == {
+        "": {"file_count": 1, "total_size": 5},
+        ".jpg": {"file_count": 1, "total_size": 10},
+        ".txt": {"file_count": 2, "total_size": 1100},
+    }
+    big = data["children"][0]
+    assert list(big)[3:] == ["children", "total_size", "file_count", "extensions"]
+    assert big["children"][0]["total_size"] == 600
+
+    summary_file = tmp_path / "summary.json"
+    file_utils.export_directory_structure(
+        str(tree), str(summary_file), min_dir_size=100
+    )
+    text = summary_file.read_text(encoding="utf-8")
+    summary = json.loads(text)
+    assert text == json.dumps(summary, indent=2)
+    assert summary["total_size"] == 1115
+    assert [child["name"] for child in summary["children"]] == ["big"]
+    assert [child["name"] for child in summary["children"][0]["children"]] == ["inner"]
+
+    before = tmp_path / "plain.json"
+    file_utils.export_directory_structure(str(tree), str(before))
+    plan_path = file_utils.diff_snapshots(
+        str(before), str(output_file), plan_output=str(tmp_path / "diff.json")
+    )
+    assert list(load_plan(str(plan_path))[1]) == []
+
+
+def test_export_directory_structure_deep_tree(tmp_path: Path):
+    """Exports trees deeper than the interpreter recursion limit."""
+    deep_dir = tmp_path / "tree"
+    deep_dir.mkdir()
+    for _ in range(1100):
+        deep_dir = deep_dir / "d"
+        deep_dir.mkdir()
+    (deep_dir / "bottom.txt").write_text("end")
+
+    output_file = tmp_path / "structure.json"
+    try:
+        file_utils.export_directory_structure(str(tmp_path / "tree"), str(output_file))
+        text = output_file.read_text(encoding="utf-8")
+        assert text.count('"type": "directory"') == 1101
+        assert '"name": "bottom.txt"' in text
+        assert text.endswith("\n}")
+    finally:
+        # shutil.rmtree recurses per level, so tear the tree down iteratively.
+        (deep_dir / "bottom.txt").unlink()
+        while deep_dir != tmp_path / "tree":
+            deep_dir.rmdir()
+            deep_dir = deep_dir.parent
+
+
+def test_diff_snapshots_reports_changes_and_repairs_moves(tmp_path: Path):
+    """Diffs two snapshots and applies the diff to restore moved items."""
+    tree = tmp_path / "tree"
+    (tree / "album" / "2020").mkdir(parents=True)
+    (tree / "album" / "2020" / "a.jpg").write_bytes(b"aaaa")
+    (tree / "album" / "2020" / "b.jpg").write_bytes(b"bb")
+    (tree / "docs").mkdir()
+    (tree / "docs" / "report.txt").write_text("report")
+    (tree / "docs" / "notes.txt").write_text("notes")
+    (tree / "old.log").write_text("log")
+    before = tmp_path / "before.json"
+    file_utils.export_directory_structure(str(tree), str(before))
+
+    (tree / "archive").mkdir()
+    (tree / "album").rename(tree / "archive" / "photos")
+    (tree / "docs" / "report.txt").rename(tree / "report.txt")
+    (tree / "docs" / "notes.txt").write_text("more notes")
+    (tree / "old.log").unlink()
+    (tree / "new.txt").write_text("new")
+    after = tmp_path / "after.json"
+    file_utils.export_directory_structure(str(tree), str(after))
+
+    plan_path = file_utils.diff_snapshots(
+        str(before), str(after), plan_output=str(tmp_path / "diff.json")
+    )
+    entries = list(load_plan(str(plan_path))[1])
+    changes = {
+        (entry["category"], entry["source_path"]): entry for entry in entries
+    }
+    assert changes[("moved", str(tree / "report.txt"))]["destination_path"] == str(
+        tree / "docs" / "report.txt"
+    )
+    moved_dir = changes[("moved", str(tree / "archive" / "photos"))]
+    assert moved_dir["type"] == "directory"
+    assert moved_dir["destination_path"] == str(tree / "album")
+    resized = changes[("resized", str(tree / "docs" / "notes.txt"))]
+    assert (resized["before_size"], resized["after_size"]) == (5, 10)
+    assert changes[("added", str(tree / "new.txt"))]["skip"] is True
+    assert changes[("added", str(tree / "archive"))]["type"] == "directory"
+    assert changes[("removed", str(tree / "old.log"))]["skip"] is True
+    assert len(entries) == 6
+
+    summary = file_utils.apply_move_plan(str(plan_path))
+    assert summary["moved"] == 2
+    assert (tree / "album" / "2020" / "a.jpg").read_bytes() == b"aaaa"
+    assert (tree / "docs" / "report.txt").read_text() == "report"
+
+
+def test_iter_all_files_recursive_deep_tree(tmp_path: Path):
+    """Walks trees deeper than the interpreter recursion limit."""
+    deep_dir = tmp_path
+    for _ in range(1100):
+        deep_dir = deep_dir / "d"
+        deep_dir.mkdir()
+    (deep_dir / "bottom.txt").touch()
+
+    try:
+        files = list(file_utils.iter_all_files_recursive(str(tmp_path)))
+        assert [p.name for p in files] == ["bottom.txt"]
+    finally:
+        # shutil.rmtree recurses per level, so tear the tree down iteratively.
+        (deep_dir / "bottom.txt").unlink()
+        while deep_dir != tmp_path:
+            deep_dir.rmdir()
+            deep_dir = deep_dir.parent
+
+
+def test_iter_all_files_recursive_as_entries(file_tree: Path):
+    """Yields lightweight entries carrying the path string and cached stat."""
+    (file_tree / "main_doc.txt").write_text("hello")
+
+    entries = {
+        entry.name: entry
+        for entry in file_utils.iter_all_files_recursive(
+            str(file_tree), as_entries=True
+        )
+    }
+
+    doc = entries["main_doc.txt"]
+    assert isinstance(doc.path, str)
+    assert doc.suffix == ".txt"
+    assert doc.stat().st_size == 5
+    assert entries["deep_archive.zip"].path == str(
+        file_tree / "sub_dir" / "deep_dir" / "deep_archive.zip"
+    )
+
+
+def test_iter_all_files_recursive_symlink_cycle(tmp_path: Path):
+    """Terminates when a symlinked directory points back at an ancestor."""
+    (tmp_path / "a.txt").touch()
+    try:
+        (tmp_path / "loop").symlink_to(tmp_path, target_is_directory=True)
+    except (OSError, NotImplementedError):
+        pytest.skip("Symlinks are not supported on this platform.")
+
+    names = [p.name for p in file_utils.iter_all_files_recursive(str(tmp_path))]
+
+    assert names.count("a.txt") == 2
+
+
+def test_iter_all_files_recursive_parallel(file_tree: Path):
+    """Parallel traversal yields the same files as the sequential walk."""
+    sequential = {
+        str(p) for p in file_utils.iter_all_files_recursive(str(file_tree))
+    }
+    parallel = {
+        str(p)
+        for p in file_utils.iter_all_files_recursive(str(file_tree), max_workers=4)
+    }
+
+    assert parallel == sequential
+
+
+def test_walk_files_parallel_lists_deepest_directories_first(tmp_path: Path):
+    """Unordered walks finish each subtree before starting a shallower sibling."""
+    for top in range(6):
+        nested = tmp_path / f"d{top}" / "sub" / "leaf"
+        nested.mkdir(parents=True)
+        (nested / "f.txt").touch()
+        (tmp_path / f"d{top}" / "f.txt").touch()
+
+    found = [
+        Path(entry.path).relative_to(tmp_path).parts[0]
+        for entry in walker.walk_files_parallel(
+            str(tmp_path), set(), max_workers=2, max_pending=1
+        )
+    ]
+
+    assert sorted(found) == sorted([f"d{top}" for top in range(6)] * 2)
+    tops = [top for idx, top in enumerate(found) if idx == 0 or found[idx - 1] != top]
+    assert len(tops) == 6
+
+
+def test_iter_all_files_recursive_parallel_ordered(tmp_path: Path):
+    """Ordered parallel traversal is deterministic and matches sequential order."""
+    for top in ("b", "a", "c"):
+        for sub in ("y", "x"):
+            nested = tmp_path / top / sub
+            nested.mkdir(parents=True)
+            for name in ("2.txt", "1.txt"):
+                (nested / name).touch()
+        (tmp_path / top / "0.txt").touch()
+
+    ordered_utils = FileUtils(scan_workers=3, ordered_scan=True)
+    expected = [
+        str(p)
+        for p in file_utils.iter_all_files_recursive(
+            str(tmp_path), max_workers=1, ordered=True
+        )
+    ]
+
+    for _ in range(3):
+        result = [str(p) for p in ordered_utils.iter_all_files_recursive(str(tmp_path))]
+        assert result == expected
+    assert expected[0] == str(tmp_path / "a" / "0.txt")
+    assert expected[1] == str(tmp_path / "a" / "x" / "1.txt")
+
+
+def test_find_unique_extensions_parallel(file_tree: Path):
+    """Parallel scans feed find_unique_extensions through the same interface."""
+    parallel_utils = FileUtils(scan_workers=4)
+
+    assert parallel_utils.find_unique_extensions(
+        str(file_tree)
+    ) == file_utils.find_unique_extensions(str(file_tree))
+
+
+def test_destination_index_reserves_unique_names(tmp_path: Path):
+    """Resolves collisions against disk and earlier reservations."""
+    (tmp_path / "report.pdf").touch()
+    (tmp_path / "report (1).pdf").touch()
+    index = DestinationIndex()
+
+    first = index.reserve(tmp_path, "report.pdf")
+    second = index.reserve(tmp_path, "report.pdf")
+    fresh = index.reserve(tmp_path / "missing", "report.pdf")
+
+    assert first.name == "report (2).pdf"
+    assert second.name == "report (3).pdf"
+    assert fresh == tmp_path / "missing" / "report.pdf"
+
+
+def test_plan_destination_path_with_index(tmp_path: Path):
+    """Planned destinations sharing an index never collide."""
+    index = DestinationIndex()
+    dest = tmp_path / "dest"
+
+    planned = {
+        file_utils.plan_destination_path(
+            str(tmp_path / sub / "notes.txt"), str(dest), index
+        )
+        for sub in ("a", "b", "c")
+    }
+
+    assert {p.name for p in planned} == {"notes.txt", "notes (1).txt", "notes (2).txt"}
+
+
+def _write_numbered_plan(tmp_path: Path, count: int) -> Path:
+    source_dir = tmp_path / "source"
+    source_dir.mkdir()
+    header = {"plan_id": "journal-test", "version": 1}
+    plan_file = tmp_path / "plan.jsonl"
+    with PlanWriter(plan_file, header, "jsonl") as writer:
+        for idx in range(count):
+            (source_dir / f"file_{idx}.txt").write_text(str(idx))
+            writer.write(
+                {
+                    "source_path": str(source_dir / f"file_{idx}.txt"),
+                    "destination_path": str(tmp_path / "dest" / f"file_{idx}.txt"),
+                }
+            )
+    return plan_file
+
+
+def test_resume_move_plan_after_interruption(tmp_path: Path):
+    """Resuming skips journaled entries and recovers unsynced moves."""
+    plan_file = _write_numbered_plan(tmp_path, 10)
+    journal_file = tmp_path / "plan.journal"
+    _, entries = load_plan(plan_file)
+    entries = list(entries)
+
+    # Simulate a crash: entries 0-3 journaled, entry 4 moved but not logged.
+    with MoveJournal(journal_file, {"plan_id": "journal-test", "reverse": False}) as journal:
+        for idx in range(4):
+            os.renames(entries[idx]["source_path"], entries[idx]["destination_path"])
+            journal.record(idx)
+    os.renames(entries[4]["source_path"], entries[4]["destination_path"])
+
+    summary = file_utils.resume_move_plan(str(plan_file), str(journal_file))
+
+    assert summary == {"entries": 10, "moved": 5, "errors": [], "recovered": 1}
+    assert read_journal(journal_file)[1] == list(range(10))
+    assert sorted(p.name for p in (tmp_path / "dest").iterdir()) == sorted(
+        f"file_{idx}.txt" for idx in range(10)
+    )
+
+
+def test_rollback_move_plan_undoes_journaled_moves(tmp_path: Path):
+    """Rollback moves back exactly what the journal records, then drops it."""
+    plan_file = _write_numbered_plan(tmp_path, 6)
+    journal_file = tmp_path / "plan.journal"
+    (tmp_path / "source" / "file_5.txt").unlink()
+
+    applied = file_utils.apply_move_plan(
+        str(plan_file), journal_file=str(journal_file), max_workers=2
+    )
+    assert applied["moved"] == 5
+    assert sorted(read_journal(journal_file)[1]) == [0, 1, 2, 3, 4]
+    with pytest.raises(FileExistsError):
+        file_utils.apply_move_plan(str(plan_file), journal_file=str(journal_file))
+
+    summary = file_utils.rollback_move_plan(str(plan_file), str(journal_file))
+
+    assert summary == {"entries": 5, "moved": 5, "errors": []}
+    assert not journal_file.exists()
+    assert (tmp_path / "source" / "file_3.txt").read_text() == "3"
+    assert not any((tmp_path / "dest").iterdir())
+
+
+def test_find_duplicates_plans_quarantine_moves(tmp_path: Path):
+    """Identical files are grouped in stages and copies planned for quarantine."""
+    big = os.urandom(300 * 1024)
+    (tmp_path / "a").mkdir()
+    (tmp_path / "b").mkdir()
+    (tmp_path / "a" / "big.bin").write_bytes(big)
+    (tmp_path / "b" / "big copy.bin").write_bytes(big)
+    # Same size and same edges, different middle: only the full hash tells.
+    (tmp_path / "b" / "near.bin").write_bytes(big[:150_000] + b"x" + big[150_001:])
+    (tmp_path / "a" / "note.txt").write_text("hello")
+    (tmp_path / "b" / "note.txt").write_text("hello")
+    (tmp_path / "b" / "other.txt").write_text("world")
+    (tmp_path / "empty1").touch()
+    (tmp_path / "empty2").touch()
+    os.link(tmp_path / "a" / "note.txt", tmp_path / "a" / "note-link.txt")
+
+    plan_path = file_utils.find_duplicates(
+        str(tmp_path), plan_output=str(tmp_path / "dupes.json"), max_workers=2
+    )
+    plan = json.loads(plan_path.read_text())
+    moves = {
+        e["source_path"]: (e["destination_path"], e["duplicate_of"])
+        for e in plan["entries"]
+    }
+    quarantine = tmp_path / "sortium_duplicates"
+    assert moves == {
+        str(tmp_path / "b" / "big copy.bin"): (
+            str(quarantine / "b" / "big copy.bin"),
+            str(tmp_path / "a" / "big.bin"),
+        ),
+        str(tmp_path / "b" / "note.txt"): (
+            str(quarantine / "b" / "note.txt"),
+            moves[str(tmp_path / "b" / "note.txt")][1],
+        ),
+    }
+    # Hard links share one inode: one of them is kept, neither is quarantined.
+    assert moves[str(tmp_path / "b" / "note.txt")][1] in {
+        str(tmp_path / "a" / "note.txt"),
+        str(tmp_path / "a" / "note-link.txt"),
+    }
+    assert plan["metadata"]["fully_hashed"] == 3
+
+    file_utils.apply_move_plan(str(plan_path))
+    assert (quarantine / "b" / "note.txt").read_text() == "hello"
+    assert not (tmp_path / "b" / "big copy.bin").exists()
+
+
+def test_apply_move_plan_progress_and_cancellation(tmp_path: Path):
+    """Progress reports counts and bytes; returning False cancels the run."""
+    plan_file = _write_numbered_plan(tmp_path, 10)
+    journal_file = tmp_path / "plan.journal"
+    reports = []
+
+    def cancel_after_four(progress):
+        reports.append(progress)
+        return progress.files < 4
+
+    utils = FileUtils(progress=cancel_after_four, progress_interval=0)
+    with pytest.raises(OperationCancelled) as cancelled:
+        utils.apply_move_plan(str(plan_file), journal_file=str(journal_file))
+
+    summary = cancelled.value.summary
+    assert summary["cancelled"] is True
+    assert summary["moved"] == 4
+    assert reports[-1].done and reports[-1].phase == "apply"
+    assert reports[-1].bytes == sum(
+        len(p.read_text()) for p in (tmp_path / "dest").iterdir()
+    )
+
+    # The journal lets a plain FileUtils finish the job.
+    resumed = file_utils.resume_move_plan(str(plan_file), str(journal_file))
+    assert resumed["moved"] == 6
+    assert len(list((tmp_path / "dest").iterdir())) == 10
+
+
+def test_concurrent_execution_cancels_pending_batches(tmp_path: Path):
+    """Concurrent runs stop handing out batches once cancelled."""
+    plan_file = _write_numbered_plan(tmp_path, 40)
+    reporter = ProgressReporter(lambda progress: False, "apply", interval=0)
+    _, entries = load_plan(plan_file)
+
+    with pytest.raises(OperationCancelled) as cancelled:
+        executor.execute_plan(entries, max_workers=2, chunk_size=1, progress=reporter)
+
+    summary = cancelled.value.summary
+    assert summary["errors"] == []
+    assert summary["moved"] == len(list((tmp_path / "dest").iterdir()))
+    assert summary["moved"] + len(list((tmp_path / "source").iterdir())) == 40
+
+
+def test_progress_reports_total_and_eta(tmp_path: Path):
+    """Plans with a known entry count get totals and an ETA."""
+    plan_file = _write_numbered_plan(tmp_path, 5)
+    json_plan = tmp_path / "plan.json"
+    with PlanWriter(json_plan, {"plan_id": "eta"}, "json") as writer:
+        for _, entry in zip(range(5), load_plan(plan_file)[1]):
+            writer.write(entry)
+    reports = []
+
+    utils = FileUtils(progress=reports.append, progress_interval=0)
+    summary = utils.apply_move_plan(str(json_plan))
+
+    assert summary["moved"] == 5
+    assert [report.files for report in reports] == [1, 2, 3, 4, 5, 5]
+    assert all(report.total_files == 5 for report in reports)
+    assert reports[-1].eta == 0
+    assert reports[-1].files_per_second > 0
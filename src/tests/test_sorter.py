@@ -1,10 +1,28 @@
 # src/tests/test_sorter.py
+import asyncio
 import json
+import os
+import re
+import threading
+import zipfile
 import pytest
 from pathlib import Path
 import time
+from datetime import datetime
+import sortium.aio as aio_module
+import sortium.sorter as sorter_module
+import sortium.watch as watch_module
+from sortium.aio import AsyncFileUtils, AsyncSorter
 from sortium.sorter import Sorter
 from sortium.file_utils import FileUtils, _generate_unique_path
+from sortium.instrumentation import PhaseRecorder
+from sortium.matching import RegexRouter
+from sortium.plans import BinaryPlan, convert_plan, load_plan
+from sortium.progress import OperationCancelled
+from sortium.scan_index import ScanIndex
+from sortium.sniff import ContentSniffer, sniff_bytes
+from sortium.suffix_trie import SuffixTrie
+from sortium.walker import FileEntry
 
 
 @pytest.fixture
@@ -120,6 +138,25 @@ def test_sort_by_type_with_collision(sorter_instance: Sorter, tmp_path: Path):
     assert (img_dir / "image (1).jpg").is_file()
 
 
+def test_sort_by_type_same_name_in_plan(sorter_instance: Sorter, tmp_path: Path):
+    """Files sharing a name get distinct destinations within one plan."""
+    for sub in ("a", "b"):
+        (tmp_path / sub).mkdir()
+        (tmp_path / sub / "report.pdf").write_text(sub)
+
+    plan_path = sorter_instance.sort_by_type(
+        str(tmp_path), plan_output=str(tmp_path / "plan.json"), recursive=True
+    )
+    plan_data = json.loads(plan_path.read_text())
+    destinations = {entry["destination_path"] for entry in plan_data["entries"]}
+    assert len(destinations) == 2
+
+    summary = sorter_instance.file_utils.apply_move_plan(str(plan_path))
+    assert summary["errors"] == []
+    assert (tmp_path / "Documents" / "report.pdf").is_file()
+    assert (tmp_path / "Documents" / "report (1).pdf").is_file()
+
+
 def test_sort_by_date(sorter_instance: Sorter, file_tree: Path):
     """Tests sorting files by their modification date."""
     # First, sort by type to create category folders
@@ -213,3 +250,806 @@ def test_sort_plan_can_be_reversed(sorter_instance: Sorter, file_tree: Path):
     # Files restored to original positions
     assert (file_tree / "main_image.jpg").is_file()
     assert not (file_tree / "Images" / "main_image.jpg").exists()
+
+
+def test_sort_by_type_jsonl_plan(sorter_instance: Sorter, file_tree: Path):
+    """Writes a streaming JSON Lines plan that applies and reverses."""
+    plan_path = sorter_instance.sort_by_type(
+        str(file_tree), plan_output=str(file_tree / "plan_type.jsonl")
+    )
+    lines = [json.loads(line) for line in plan_path.read_text().splitlines()]
+    header, entries, footer = lines[0], lines[1:-1], lines[-1]
+    assert header["format"] == "jsonl"
+    assert header["strategy"] == "type"
+    assert len(entries) == 5
+    assert footer["entry_count"] == 5
+
+    summary = sorter_instance.file_utils.apply_move_plan(str(plan_path))
+    assert summary == {"entries": 5, "moved": 5, "errors": []}
+    assert (file_tree / "Images" / "main_image.jpg").is_file()
+
+    sorter_instance.file_utils.apply_move_plan(str(plan_path), reverse=True)
+    assert (file_tree / "main_image.jpg").is_file()
+
+
+def test_default_plan_inside_source_is_not_planned(file_tree: Path):
+    """A plan streamed into the scanned folder never plans its own move."""
+    sorter = Sorter(plan_format="jsonl")
+    plan_path = sorter.sort_by_type(str(file_tree))
+
+    assert plan_path.parent == file_tree
+    assert plan_path.suffix == ".jsonl"
+    sources = [
+        json.loads(line).get("source_path")
+        for line in plan_path.read_text().splitlines()[1:-1]
+    ]
+    assert str(plan_path) not in sources
+    assert len(sources) == 5
+
+
+def test_sort_by_type_binary_plan(sorter_instance: Sorter, file_tree: Path):
+    """Binary plans support random access, category counts and reversal."""
+    plan_path = sorter_instance.sort_by_type(
+        str(file_tree), plan_output=str(file_tree / "plan_type.splan"), recursive=True
+    )
+
+    with BinaryPlan(plan_path) as plan:
+        assert len(plan) == 9
+        assert plan.header["strategy"] == "type"
+        assert plan.header["version"] == 2
+        assert plan.category_counts()["Images"] == 2
+        last = plan[-1]
+        assert Path(last["destination_path"]).parent.name == last["category"]
+
+    summary = sorter_instance.file_utils.apply_move_plan(str(plan_path))
+    assert summary["moved"] == 9
+    assert (file_tree / "Images" / "nested_image.png").is_file()
+
+    undo_path = convert_plan(plan_path, file_tree / "undo.jsonl", invert=True)
+    summary = sorter_instance.file_utils.apply_move_plan(str(undo_path))
+    assert summary["moved"] == 9
+    assert (file_tree / "sub_dir" / "nested_image.png").is_file()
+    assert not (file_tree / "Images").joinpath("nested_image.png").exists()
+
+
+def test_sort_by_extension_incremental_scan_index(
+    sorter_instance: Sorter, tmp_path: Path
+):
+    """A scan index limits later plans to new files and skips unchanged dirs."""
+    source = tmp_path / "source"
+    (source / "nested").mkdir(parents=True)
+    for name in ("a.txt", "b.py", "nested/c.txt"):
+        (source / name).write_text(name)
+    old = time.time() - 3600
+    for folder in (source, source / "nested"):
+        os.utime(folder, (old, old))
+    index = ScanIndex(tmp_path / "scan.sqlite")
+
+    first = sorter_instance.sort_by_extension(
+        str(source),
+        str(tmp_path / "dest"),
+        plan_output=str(tmp_path / "first.json"),
+        scan_index=index,
+    )
+    assert json.loads(first.read_text())["entry_count"] == 3
+    assert index.stats["files_changed"] == 3
+
+    (source / "new.md").write_text("new")
+    second = sorter_instance.sort_by_extension(
+        str(source),
+        str(tmp_path / "dest"),
+        plan_output=str(tmp_path / "second.json"),
+        scan_index=index,
+    )
+    entries = json.loads(second.read_text())["entries"]
+    assert [Path(e["source_path"]).name for e in entries] == ["new.md"]
+    assert index.stats == {
+        "dirs_scanned": 1,
+        "dirs_skipped": 1,
+        "files_changed": 1,
+        "files_skipped": 3,
+    }
+    index.close()
+
+    # The index is only a cache: deleting it makes the next run a full scan.
+    (tmp_path / "scan.sqlite").unlink()
+    third = sorter_instance.sort_by_extension(
+        str(source),
+        str(tmp_path / "dest"),
+        plan_output=str(tmp_path / "third.json"),
+        scan_index=str(tmp_path / "scan.sqlite"),
+    )
+    assert json.loads(third.read_text())["entry_count"] == 4
+
+
+@pytest.mark.filterwarnings("error::pytest.PytestUnraisableExceptionWarning")
+@pytest.mark.parametrize("pass_open_index", [False, True])
+def test_cancelled_plan_leaves_scan_index_untouched(tmp_path: Path, pass_open_index):
+    """Files of a cancelled plan are planned again by the next incremental run."""
+    source = tmp_path / "source"
+    source.mkdir()
+    old = time.time() - 2 * 86400
+    for idx in range(50):
+        path = source / f"file_{idx}.txt"
+        path.write_text(str(idx))
+        os.utime(path, (old, old))
+    os.utime(source, (old, old))
+    index_path = tmp_path / "scan.sqlite"
+    index = ScanIndex(index_path) if pass_open_index else str(index_path)
+
+    cancelling = Sorter(progress=lambda progress: False, progress_interval=0)
+    with pytest.raises(OperationCancelled):
+        cancelling.sort_by_type(
+            str(source), str(tmp_path / "dest"),
+            plan_output=str(tmp_path / "cancelled.json"), scan_index=index,
+        )
+
+    rerun = Sorter().sort_by_type(
+        str(source), str(tmp_path / "dest"),
+        plan_output=str(tmp_path / "rerun.json"), scan_index=index,
+    )
+    assert json.loads(rerun.read_text())["entry_count"] == 50
+    if pass_open_index:
+        index.close()
+
+
+@pytest.mark.parametrize("use_inotify", [None, False])
+def test_watch_sorts_new_files_and_logs_moves(
+    sorter_instance: Sorter, tmp_path: Path, use_inotify
+):
+    """Watch mode sorts existing and arriving files and logs every move."""
+    inbox = tmp_path / "inbox"
+    inbox.mkdir()
+    (inbox / "early.jpg").write_text("early")
+    dest = tmp_path / "sorted"
+    log = tmp_path / "watch.jsonl"
+    stop = threading.Event()
+    results = {}
+
+    def run_watch():
+        results["stats"] = sorter_instance.watch(
+            str(inbox),
+            str(dest),
+            plan_log=str(log),
+            stop_event=stop,
+            debounce=0.05,
+            settle_time=0.05,
+            use_inotify=use_inotify,
+        )
+
+    worker = threading.Thread(target=run_watch)
+    worker.start()
+    try:
+        time.sleep(0.2)
+        (inbox / "late.pdf").write_text("late")
+        deadline = time.monotonic() + 10
+        while time.monotonic() < deadline and not (dest / "Documents" / "late.pdf").exists():
+            time.sleep(0.05)
+    finally:
+        stop.set()
+        worker.join()
+
+    assert (dest / "Images" / "early.jpg").read_text() == "early"
+    assert (dest / "Documents" / "late.pdf").read_text() == "late"
+    assert results["stats"]["moved"] == 2
+
+    summary = sorter_instance.file_utils.apply_move_plan(str(log), reverse=True)
+    assert summary["moved"] == 2
+    assert sorted(p.name for p in inbox.iterdir()) == ["early.jpg", "late.pdf"]
+
+
+def test_watch_retries_failed_moves(sorter_instance: Sorter, tmp_path: Path, monkeypatch):
+    """A file whose first move fails is retried instead of being dropped."""
+    inbox = tmp_path / "inbox"
+    inbox.mkdir()
+    (inbox / "locked.pdf").write_text("locked")
+    dest = tmp_path / "sorted"
+    real_move = watch_module._check_and_move
+    attempts = []
+
+    def flaky_move(source, destination, *args):
+        attempts.append(source)
+        if len(attempts) == 1:
+            return f"Error moving '{source}': destination busy"
+        return real_move(source, destination, *args)
+
+    monkeypatch.setattr(watch_module, "_check_and_move", flaky_move)
+    stop = threading.Event()
+    results = {}
+
+    def run_watch():
+        results["stats"] = sorter_instance.watch(
+            str(inbox), str(dest), plan_log=str(tmp_path / "watch.jsonl"),
+            stop_event=stop, debounce=0.05, settle_time=0.0, use_inotify=False,
+            retry_backoff=0.05,
+        )
+
+    worker = threading.Thread(target=run_watch)
+    worker.start()
+    try:
+        deadline = time.monotonic() + 10
+        while time.monotonic() < deadline and not (dest / "Documents" / "locked.pdf").exists():
+            time.sleep(0.05)
+    finally:
+        stop.set()
+        worker.join()
+
+    assert (dest / "Documents" / "locked.pdf").read_text() == "locked"
+    assert len(attempts) == 2
+    assert results["stats"]["failed"] == 1
+    assert results["stats"]["moved"] == 1
+
+
+@pytest.mark.parametrize("match_mode", ["match", "search", "fullmatch"])
+def test_regex_router_matches_sequential_rules(match_mode):
+    """The combined matcher picks the same first-matching rule as a loop."""
+    rules = {
+        "Reports": r"report_\d{4}",
+        "Invoices": r".*invoice.*\.pdf$",
+        "Pdfs": r".*\.pdf",
+        "Years": r"\d{4}",
+        "Notes": r"notes|memo",
+    }
+    names = [
+        "report_2023.csv",
+        "report_2023",
+        "acme_invoice_7.pdf",
+        "scan.pdf",
+        "2024 summary.txt",
+        "summary 2024",
+        "memo.txt",
+        "weekly_notes",
+        "image.png",
+    ]
+    router = RegexRouter(rules, match_mode)
+    assert router.combined
+
+    for name in names:
+        expected = next(
+            (
+                (category, pattern)
+                for category, pattern in rules.items()
+                if getattr(re, match_mode)(pattern, name)
+            ),
+            None,
+        )
+        assert router.route(name) == expected, name
+
+
+def test_regex_router_fallback_and_prefilter():
+    """Backreferences and global flags disable combining; literals enable the prefilter."""
+    fallback = RegexRouter({"Doubled": r"(\w)\1.*", "Any": r".*"})
+    assert not fallback.combined
+    assert fallback.route("aab") == ("Doubled", r"(\w)\1.*")
+    assert fallback.route("abc") == ("Any", r".*")
+
+    # A global flag must not leak into the other rules.
+    flagged = RegexRouter({"A": r"abc", "B": r"(?i)xyz"})
+    assert not flagged.combined
+    assert flagged.route("ABC") is None
+    assert flagged.route("XYZ") == ("B", r"(?i)xyz")
+    assert RegexRouter({"A": r"abc", "B": r"(?i:xyz)"}).combined
+
+    literal = RegexRouter({"Logs": r"log_.*", "Pdf": r".*\.pdf$"})
+    assert literal._prefilter
+    assert literal.route("log_1.txt") == ("Logs", r"log_.*")
+    assert literal.route("a.pdf") == ("Pdf", r".*\.pdf$")
+    assert literal.route("readme.md") is None
+
+    with pytest.raises(ValueError):
+        RegexRouter({}, "scan")
+
+
+def test_sort_by_composite_type_then_date(sorter_instance: Sorter, tmp_path: Path):
+    """Nested type/date folders come from one plan with one move per file."""
+    source = tmp_path / "source"
+    (source / "nested").mkdir(parents=True)
+    photo = source / "photo.jpg"
+    report = source / "nested" / "report.pdf"
+    photo.write_text("p")
+    report.write_text("r")
+    stamp = datetime(2024, 1, 3, 12, 0).timestamp()
+    os.utime(photo, (stamp, stamp))
+    os.utime(report, (stamp, stamp))
+
+    plan_path = sorter_instance.sort_by_composite(
+        str(source),
+        ["type", "date"],
+        str(tmp_path / "sorted"),
+        plan_output=str(tmp_path / "plan.json"),
+    )
+    plan = json.loads(plan_path.read_text())
+    assert plan["strategy"] == "composite"
+    assert plan["metadata"]["keys"] == ["type", "date"]
+    assert plan["entry_count"] == 2
+
+    sorter_instance.file_utils.apply_move_plan(str(plan_path))
+    assert (tmp_path / "sorted" / "Images" / "03-Jan-2024" / "photo.jpg").is_file()
+    assert (tmp_path / "sorted" / "Documents" / "03-Jan-2024" / "report.pdf").is_file()
+
+
+def test_sort_by_composite_regex_and_callable(sorter_instance: Sorter, tmp_path: Path):
+    """Unmatched regex keys skip files; callables add custom levels."""
+    for name in ("invoice_1.pdf", "invoice_2.txt", "other.pdf"):
+        (tmp_path / name).write_text(name)
+
+    def size_bucket(item):
+        return "small" if item.stat().st_size < 100 else "large"
+
+    plan_path = sorter_instance.sort_by_composite(
+        str(tmp_path),
+        ["regex", "extension", size_bucket],
+        str(tmp_path / "sorted"),
+        plan_output=str(tmp_path / "plan.json"),
+        recursive=False,
+        regex={"Invoices": r"invoice_"},
+    )
+    entries = json.loads(plan_path.read_text())["entries"]
+    planned = sorted(
+        Path(e["destination_path"]).relative_to(tmp_path / "sorted").as_posix()
+        for e in entries
+    )
+    assert planned == [
+        "Invoices/pdf/small/invoice_1.pdf",
+        "Invoices/txt/small/invoice_2.txt",
+    ]
+
+    with pytest.raises(ValueError):
+        sorter_instance.sort_by_composite(str(tmp_path), ["colour"])
+
+
+def test_sort_by_type_sniffs_extensionless_files(tmp_path: Path, monkeypatch):
+    """Unknown extensions are classified by content, and results are cached."""
+    source = tmp_path / "dump"
+    source.mkdir()
+    (source / "scan_0001").write_bytes(b"%PDF-1.7\n...")
+    (source / "IMG_2").write_bytes(b"\x89PNG\r\n\x1a\n" + b"\0" * 32)
+    (source / "blob.dat").write_bytes(b"no signature here")
+    (source / "photo.jpg").write_bytes(b"%PDF-1.4 misnamed")
+    cache = tmp_path / "sniff.sqlite"
+
+    with ContentSniffer(cache_path=cache) as sniffer:
+        sorter = Sorter(sniffer=sniffer)
+        plan_path = sorter.sort_by_type(
+            str(source), str(tmp_path / "out"), plan_output=str(tmp_path / "plan.json")
+        )
+    entries = {
+        Path(e["source_path"]).name: (e["category"], e.get("sniffed_extension"))
+        for e in json.loads(plan_path.read_text())["entries"]
+    }
+    assert entries == {
+        "scan_0001": ("Documents", ".pdf"),
+        "IMG_2": ("Images", ".png"),
+        "blob.dat": ("Others", None),
+        "photo.jpg": ("Images", None),  # known extension: not sniffed
+    }
+
+    # A second run is served from the persistent cache without reading files.
+    def fail_read(self, path):
+        raise AssertionError(f"unexpected read of {path}")
+
+    monkeypatch.setattr(ContentSniffer, "_read_head", fail_read)
+    with ContentSniffer(mode="always", cache_path=cache) as sniffer:
+        items = [
+            FileEntry(str(source / name), name)
+            for name in ("scan_0001", "IMG_2", "blob.dat")
+        ]
+        assert [ext for _, ext in sniffer.iter_sniffed(items, lambda item: True)] == [
+            ".pdf",
+            ".png",
+            None,
+        ]
+
+
+def test_sniff_bytes_signature_table():
+    """Container formats are told apart by their inner markers."""
+    assert sniff_bytes(b"\xff\xd8\xff\xe0") == ".jpg"
+    assert sniff_bytes(b"PK\x03\x04" + b"\0" * 26 + b"[Content_Types].xmlword/") == ".docx"
+    assert sniff_bytes(b"PK\x03\x04" + b"\0" * 40) == ".zip"
+    assert sniff_bytes(b"\0\0\0\x18ftypisom") == ".mp4"
+    assert sniff_bytes(b"RIFF\0\0\0\0WAVEfmt ") == ".wav"
+    assert sniff_bytes(b"\x7fELF\x02\x01") == ".bin"
+    pe = bytearray(256)
+    pe[0:2], pe[60:64], pe[128:132] = b"MZ", (128).to_bytes(4, "little"), b"PE\0\0"
+    assert sniff_bytes(bytes(pe)) == ".exe"
+    assert sniff_bytes(b"MZ-1000 manual" + b" " * 100) is None
+    bmp = b"BM" + (70).to_bytes(4, "little") + b"\0" * 4 + (54).to_bytes(4, "little")
+    assert sniff_bytes(bmp + (40).to_bytes(4, "little") + b"\0" * 16) == ".bmp"
+    assert sniff_bytes(b"BMW service notes, 2024") is None
+    assert sniff_bytes(b"\0" * 257 + b"ustar\x0000") == ".tar"
+    assert sniff_bytes(b"plain text") is None
+
+
+def test_weak_sniffs_do_not_override_extensions(tmp_path: Path):
+    """Office files and text starting like a magic number keep their category."""
+    source = tmp_path / "source"
+    source.mkdir()
+    with zipfile.ZipFile(source / "report.docx", "w") as archive:
+        archive.writestr("[Content_Types].xml", "<Types>" + " " * 600 + "</Types>")
+        archive.writestr("word/document.xml", "<w:document/>")
+    with zipfile.ZipFile(source / "bundle.zip", "w") as archive:
+        archive.writestr("readme.txt", "hi")
+    (source / "misnamed.docx").write_bytes(b"%PDF-1.7\n...")
+    (source / "notes.txt").write_text("BMW service notes")
+    (source / "readme.md").write_text("MZ-1000 manual" + " " * 100)
+    assert sniff_bytes((source / "report.docx").read_bytes()[:512]) == ".zip"
+
+    sorter = Sorter(sniffer=ContentSniffer(mode="always"))
+    plan_path = sorter.sort_by_type(
+        str(source), str(tmp_path / "out"), plan_output=str(tmp_path / "plan.json")
+    )
+    entries = {
+        Path(e["source_path"]).name: (e["category"], e.get("sniffed_extension"))
+        for e in json.loads(plan_path.read_text())["entries"]
+    }
+    assert entries == {
+        "report.docx": ("Documents", None),
+        "bundle.zip": ("Archives", ".zip"),
+        "misnamed.docx": ("Documents", ".pdf"),
+        "notes.txt": ("Documents", None),
+        "readme.md": ("Documents", None),
+    }
+
+
+def test_phase_recorder_reports_plan_and_apply(tmp_path: Path):
+    """An observer receives phase timings, counters and per-phase profiles."""
+    source = tmp_path / "source"
+    (source / "nested").mkdir(parents=True)
+    (source / "a.txt").write_text("hello")
+    (source / "nested" / "a.txt").write_text("world!")
+    (source / "b.jpg").write_bytes(b"img")
+
+    recorder = PhaseRecorder(profile_dir=tmp_path / "profiles")
+    sorter = Sorter(observer=recorder)
+    plan_path = sorter.sort_by_type(
+        str(source), str(tmp_path / "out"), plan_output=str(tmp_path / "plan.json"),
+        recursive=True,
+    )
+    sorter.file_utils.apply_move_plan(str(plan_path))
+
+    report = recorder.report()
+    assert set(report["phases"]) == {"plan", "scan", "probe", "serialize", "apply"}
+    assert report["phases"]["serialize"]["slices"] == 3
+    assert report["phases"]["plan"]["slices"] == 1
+    counters = report["counters"]
+    assert counters["files_scanned"] == 3
+    assert counters["dirs_listed"] >= 2
+    assert counters["collision_probes"] == 1  # the second a.txt
+    assert counters["bytes_moved"] == len("hello") + len("world!") + len("img")
+    assert counters["errors"] == 0
+
+    profiles = recorder.write_profiles()
+    assert {path.name for path in profiles} >= {"plan.prof", "scan.prof", "apply.prof"}
+    assert all(path.stat().st_size > 0 for path in profiles)
+
+
+def test_sort_plan_cancellation_removes_partial_plan(tmp_path: Path):
+    """Cancelling while planning raises and leaves no half-written plan."""
+    for idx in range(20):
+        (tmp_path / f"file_{idx}.txt").touch()
+    plan_file = tmp_path / "plan.jsonl"
+    sorter = Sorter(progress=lambda progress: progress.files < 5, progress_interval=0)
+
+    with pytest.raises(OperationCancelled) as cancelled:
+        sorter.sort_by_type(str(tmp_path), plan_output=str(plan_file))
+
+    assert cancelled.value.phase == "plan"
+    assert cancelled.value.summary is None
+    assert not plan_file.exists()
+
+
+def test_async_sorter_runs_jobs_and_cancels(tmp_path: Path):
+    """Async jobs share one loop; cancelled jobs stop and leave no plan."""
+    for name in ("one", "two"):
+        (tmp_path / name).mkdir()
+        for idx in range(5):
+            (tmp_path / name / f"{name}_{idx}.txt").write_text(name)
+
+    async def sort_and_apply():
+        async with AsyncSorter(max_concurrency=2) as async_sorter:
+            plans = await asyncio.gather(
+                *(
+                    async_sorter.sort_by_type(
+                        str(tmp_path / name), plan_output=str(tmp_path / f"{name}.json")
+                    )
+                    for name in ("one", "two")
+                )
+            )
+            entries = [entry async for entry in async_sorter.file_utils.iter_plan(plans[0], 2)]
+            summaries = [await async_sorter.file_utils.apply_move_plan(str(p)) for p in plans]
+            return entries, summaries
+
+    entries, summaries = asyncio.run(sort_and_apply())
+    assert len(entries) == 5
+    assert [summary["moved"] for summary in summaries] == [5, 5]
+    assert (tmp_path / "one" / "Documents" / "one_0.txt").is_file()
+
+    started = threading.Event()
+    release = threading.Event()
+
+    def blocking_progress(progress):
+        started.set()
+        release.wait(5)
+
+    (tmp_path / "three").mkdir()
+    for idx in range(5):
+        (tmp_path / "three" / f"three_{idx}.txt").write_text("three")
+
+    async def cancel_jobs():
+        sorter = Sorter(progress=blocking_progress, progress_interval=0)
+        async with AsyncSorter(sorter, max_concurrency=1) as async_sorter:
+            running = asyncio.create_task(
+                async_sorter.sort_by_type(
+                    str(tmp_path / "three"), plan_output=str(tmp_path / "running.json")
+                )
+            )
+            queued = asyncio.create_task(
+                async_sorter.sort_by_type(
+                    str(tmp_path / "three"), plan_output=str(tmp_path / "queued.json")
+                )
+            )
+            await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+            running.cancel()
+            queued.cancel()
+            await asyncio.sleep(0.05)
+            release.set()
+            return await asyncio.gather(running, queued, return_exceptions=True)
+
+    results = asyncio.run(cancel_jobs())
+    assert all(isinstance(result, asyncio.CancelledError) for result in results)
+    assert not (tmp_path / "running.json").exists()
+    assert not (tmp_path / "queued.json").exists()
+
+
+def test_async_sorter_uses_cached_sniffer_and_scan_index(tmp_path: Path):
+    """SQLite-backed sniffer caches and scan indexes work from pool threads."""
+    source = tmp_path / "source"
+    source.mkdir()
+    (source / "scan_0001").write_bytes(b"%PDF-1.7\n...")
+    (source / "IMG_2").write_bytes(b"\x89PNG\r\n\x1a\n" + b"\0" * 32)
+
+    async def run_jobs(sorter):
+        async with AsyncSorter(sorter, max_concurrency=2) as async_sorter:
+            return await asyncio.gather(
+                async_sorter.sort_by_type(
+                    str(source), str(tmp_path / "out"),
+                    plan_output=str(tmp_path / "sniffed.json"),
+                ),
+                async_sorter.sort_by_type(
+                    str(source), str(tmp_path / "out"),
+                    plan_output=str(tmp_path / "again.json"),
+                ),
+            )
+
+    with ContentSniffer(cache_path=tmp_path / "sniff.sqlite") as sniffer:
+        plans = asyncio.run(run_jobs(Sorter(sniffer=sniffer)))
+    for plan in plans:
+        categories = sorted(e["category"] for e in json.loads(plan.read_text())["entries"])
+        assert categories == ["Documents", "Images"]
+
+    with ScanIndex(tmp_path / "scan.sqlite") as index:
+
+        async def run_indexed():
+            async with AsyncSorter() as async_sorter:
+                return await async_sorter.sort_by_type(
+                    str(source), str(tmp_path / "out"),
+                    plan_output=str(tmp_path / "indexed.json"), scan_index=index,
+                )
+
+        plan = asyncio.run(run_indexed())
+    assert json.loads(plan.read_text())["entry_count"] == 2
+
+
+def test_async_iter_plan_cancel_waits_for_running_batch(tmp_path: Path, monkeypatch):
+    """Cancelling a plan reader closes the plan only after its batch is read."""
+    started = threading.Event()
+    state = {"closed": False}
+
+    def slow_plan(plan_file):
+        def entries():
+            try:
+                for idx in range(20):
+                    started.set()
+                    time.sleep(0.02)
+                    yield {"source_path": str(idx)}
+            finally:
+                state["closed"] = True
+
+        return {}, entries()
+
+    monkeypatch.setattr(aio_module, "load_plan", slow_plan)
+
+    async def consume():
+        async with AsyncFileUtils() as file_utils:
+            async def read_all():
+                return [entry async for entry in file_utils.iter_plan("plan.jsonl")]
+
+            reader = asyncio.create_task(read_all())
+            await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+            reader.cancel()
+            return await asyncio.gather(reader, return_exceptions=True)
+
+    (result,) = asyncio.run(consume())
+    assert isinstance(result, asyncio.CancelledError)
+    assert state["closed"]
+
+
+def test_sharded_planning_matches_single_process(tmp_path: Path):
+    """Process-pool plans hold the same moves, with names unique across shards."""
+    source = tmp_path / "source"
+    for folder in ("alpha", "beta", "gamma/deep"):
+        (source / folder).mkdir(parents=True)
+        for name in ("report.pdf", "photo.JPG", "notes", "clip.mp4"):
+            (source / folder / name).write_text(folder)
+    (source / "report.pdf").write_text("root")
+    dest = tmp_path / "sorted"
+    (dest / "Documents").mkdir(parents=True)
+    (dest / "Documents" / "report.pdf").write_text("existing")
+
+    sorter = Sorter()
+    for strategy in ("type", "extension"):
+        sort = getattr(sorter, f"sort_by_{strategy}")
+        single = sort(
+            str(source), str(dest), plan_output=str(tmp_path / f"{strategy}.json"),
+            recursive=True,
+        )
+        sharded = sort(
+            str(source), str(dest), plan_output=str(tmp_path / f"{strategy}.jsonl"),
+            recursive=True, processes=2,
+        )
+        single_entries = list(load_plan(str(single))[1])
+        sharded_entries = list(load_plan(str(sharded))[1])
+        assert len(sharded_entries) == 13
+        assert sorted(e["source_path"] for e in sharded_entries) == sorted(
+            e["source_path"] for e in single_entries
+        )
+        destinations = [e["destination_path"] for e in sharded_entries]
+        assert len(set(destinations)) == len(destinations)
+        assert {tuple(e) for e in sharded_entries} == {tuple(e) for e in single_entries}
+        if strategy == "type":
+            documents = sorted(
+                Path(d).name for d in destinations if Path(d).parent.name == "Documents"
+            )
+            assert documents == [f"report ({n}).pdf" for n in range(1, 5)]
+        else:
+            assert (
+                sorter.sort_by_extension(
+                    str(source), str(dest), plan_output=str(tmp_path / "again.jsonl"),
+                    recursive=True, processes=2,
+                ).read_text().splitlines()[1:]
+                == sharded.read_text().splitlines()[1:]
+            )
+
+    with pytest.raises(ValueError):
+        sorter.sort_by_type(str(source), processes=2, scan_index=str(tmp_path / "i.db"))
+
+
+def test_compound_extensions_use_longest_match(sorter_instance: Sorter, tmp_path: Path):
+    """``backup.tar.gz`` is an archive of extension ``.tar.gz`` in every strategy."""
+    trie = SuffixTrie([".gz", ".tar.gz", ".jpg"])
+    assert trie.match("A.TAR.GZ") == ".tar.gz"
+    assert trie.match("x.foo.gz") == ".gz"
+    assert trie.match("tar.gz") == ".gz"
+    assert trie.match(".bashrc") == ""
+    assert trie.match("photo.jpg.part") == ".part"
+
+    source = tmp_path / "source"
+    source.mkdir()
+    for name in ("backup.tar.gz", "log.gz", "photo.jpg"):
+        (source / name).write_text(name)
+
+    plan = json.loads(
+        sorter_instance.sort_by_type(
+            str(source), plan_output=str(tmp_path / "type.json")
+        ).read_text()
+    )
+    by_name = {Path(e["source_path"]).name: e for e in plan["entries"]}
+    assert by_name["backup.tar.gz"]["category"] == "Archives"
+    assert by_name["backup.tar.gz"]["extension"] == ".tar.gz"
+    assert by_name["log.gz"]["extension"] == ".gz"
+
+    plan_path = sorter_instance.sort_by_extension(
+        str(source), str(tmp_path / "by_ext"), plan_output=str(tmp_path / "ext.jsonl"),
+        processes=2,
+    )
+    folders = {
+        Path(e["source_path"]).name: Path(e["destination_path"]).parent.name
+        for e in load_plan(str(plan_path))[1]
+    }
+    assert folders == {"backup.tar.gz": "tar.gz", "log.gz": "gz", "photo.jpg": "jpg"}
+
+    plan = json.loads(
+        sorter_instance.sort_by_composite(
+            str(source), ["extension"], str(tmp_path / "composite"),
+            plan_output=str(tmp_path / "composite.json"),
+        ).read_text()
+    )
+    assert {
+        Path(e["destination_path"]).parent.name for e in plan["entries"]
+    } == {"tar.gz", "gz", "jpg"}
+
+
+def test_sort_by_date_granularity_and_source(sorter_instance: Sorter, tmp_path: Path):
+    """Date buckets follow the granularity, date source and label format."""
+    stamps = {
+        ("Images", "a.jpg"): datetime(2024, 1, 3, 12, 0),
+        ("Images", "b.jpg"): datetime(2024, 1, 7, 9, 0),
+        ("Images", "c.jpg"): datetime(2024, 2, 1, 8, 0),
+        ("Documents", "d.pdf"): datetime(2023, 12, 31, 23, 0),
+    }
+    for (folder, name), moment in stamps.items():
+        path = tmp_path / folder / name
+        path.parent.mkdir(exist_ok=True)
+        path.write_text(name)
+        os.utime(path, (moment.timestamp(), moment.timestamp()))
+
+    def folders(**kwargs):
+        plan_path = sorter_instance.sort_by_date(
+            str(tmp_path), ["Images", "Documents", "Missing"],
+            plan_output=str(tmp_path / "plan.json"), **kwargs,
+        )
+        plan = json.loads(plan_path.read_text())
+        return plan, {
+            Path(e["source_path"]).name: e["date_folder"] for e in plan["entries"]
+        }
+
+    plan, by_day = folders()
+    assert by_day == {
+        "a.jpg": "03-Jan-2024", "b.jpg": "07-Jan-2024",
+        "c.jpg": "01-Feb-2024", "d.pdf": "31-Dec-2023",
+    }
+    assert [e["category"] for e in plan["entries"]] == ["Images"] * 3 + ["Documents"]
+    assert {e["modified_at"] for e in plan["entries"]} >= {"2024-01-03T12:00:00"}
+    assert plan["metadata"]["date_format"] == "%d-%b-%Y"
+
+    assert folders(granularity="month")[1] == {
+        "a.jpg": "Jan-2024", "b.jpg": "Jan-2024", "c.jpg": "Feb-2024", "d.pdf": "Dec-2023",
+    }
+    assert folders(granularity="week")[1] == {
+        "a.jpg": "2024-W01", "b.jpg": "2024-W01", "c.jpg": "2024-W05", "d.pdf": "2023-W52",
+    }
+    assert folders(granularity="year", date_format="%Y")[1]["d.pdf"] == "2023"
+    assert folders(granularity="week", date_format="%Y-%m-%d", max_workers=1)[1] == {
+        "a.jpg": "2024-01-01", "b.jpg": "2024-01-01",
+        "c.jpg": "2024-01-29", "d.pdf": "2023-12-25",
+    }
+
+    plan, _ = folders(date_source="ctime")
+    assert "changed_at" in plan["entries"][0]
+    assert folders(date_source="birthtime")[0]["metadata"]["date_source"] == "birthtime"
+
+    with pytest.raises(ValueError):
+        sorter_instance.sort_by_date(str(tmp_path), ["Images"], granularity="hour")
+    with pytest.raises(ValueError):
+        sorter_instance.sort_by_date(str(tmp_path), ["Images"], date_source="atime")
+
+
+def test_sort_by_date_streams_and_stats_each_file_once(tmp_path: Path, monkeypatch):
+    """Date planning stats every file once and streams rows in small chunks."""
+    monkeypatch.setattr(sorter_module, "_DATE_CHUNK_SIZE", 2)
+    monkeypatch.setattr(sorter_module, "_DATE_QUEUE_CHUNKS", 1)
+    for folder in ("Images", "Documents"):
+        (tmp_path / folder).mkdir()
+        for idx in range(15):
+            (tmp_path / folder / f"{folder}_{idx}.dat").write_text(str(idx))
+
+    recorder = PhaseRecorder()
+    sorter = Sorter(observer=recorder)
+    plan_path = sorter.sort_by_date(
+        str(tmp_path), ["Images", "Documents"], plan_output=str(tmp_path / "plan.jsonl"),
+        max_workers=2,
+    )
+    entries = list(load_plan(str(plan_path))[1])
+    assert [e["category"] for e in entries] == ["Images"] * 15 + ["Documents"] * 15
+    counters = recorder.report()["counters"]
+    assert counters["files_scanned"] == 30
+    assert counters["stat_calls"] == 30
+
+    # Cancelling mid-plan stops the workers blocked on their full queues.
+    cancelling = Sorter(progress=lambda progress: progress.files < 3, progress_interval=0)
+    with pytest.raises(OperationCancelled):
+        cancelling.sort_by_date(
+            str(tmp_path), ["Images", "Documents"],
+            plan_output=str(tmp_path / "cancelled.jsonl"),
+        )
+    assert not (tmp_path / "cancelled.jsonl").exists()